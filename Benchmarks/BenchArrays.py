@@ -0,0 +1,42 @@
+# Compares the eager expansion of arrays and lists with the lazy views (see
+# SVDArrays) on a device where every register is a list of 256 elements.
+
+# add the top directory where the module itself sits
+import site
+site.addsitedir("..")
+
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+from SVDReader import SVDReader
+from SyntheticSVD import generate
+
+
+# measure time and memory retained by the array/list resolution
+def measure(device: dict, lazy: bool):
+    # start tracing
+    tracemalloc.start()
+    start = time.perf_counter()
+    # resolve the arrays
+    result = SVDReader._resolve(device, resolve_derivations=False,
+                                resolve_inheritance=False,
+                                lazy_arrays_lists=lazy)
+    elapsed = time.perf_counter() - start
+    # memory that is still in use after the resolution
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # return the measurements
+    return result, elapsed, current
+
+
+# build the device
+root = ET.fromstring(generate(peripherals=20, registers=16, fields=4,
+                              derived_every=1, dim=256))
+device = SVDReader._process_device(root)
+
+# compare the two
+for lazy in (False, True):
+    result, elapsed, retained = measure(device, lazy)
+    print(f"{'Lazy' if lazy else 'Eager'}: {elapsed * 1000:.1f} ms, "
+          f"{retained / 1024:.1f} KiB retained, "
+          f"{len(result['peripherals']['P0']['registers'])} registers in P0")
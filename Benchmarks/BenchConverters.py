@@ -0,0 +1,39 @@
+# Measures every memoized scalar converter on a million typical literals, with
+# and without the memo (the plain converter is still available as
+# '__wrapped__')
+
+# add the top directory where the module itself sits
+import site
+site.addsitedir("..")
+
+import time
+from SVDReader import SVDReader
+
+# number of the conversions per converter
+count = 1000000
+# converters along with the literals these typically get
+converters = (
+    ('integer', SVDReader._convert_integer, ('0', '4', '16', '0x10')),
+    ('boolean', SVDReader._convert_boolean, ('true', 'false', '1')),
+    ('scaled_non_negative_integer',
+     SVDReader._convert_scaled_non_negative_integer,
+     ('0x00000000', '0xFFFFFFFF', '32', '0x4', '0x1000')),
+    ('enumerated_value_data_type',
+     SVDReader._convert_enumerated_value_data_type,
+     ('0', '1', '0x3', '#01', '0b1x')),
+    ('bit_range_type', SVDReader._convert_bit_range_type,
+     ('[0:0]', '[7:0]', '[15:8]', '[31:0]')),
+)
+
+# measure all the converters
+for name, converter, literals in converters:
+    # input data
+    data = [literals[i % len(literals)] for i in range(count)]
+    # both variants
+    for variant, function in (('memoized', converter),
+                              ('plain', converter.__wrapped__)):
+        start = time.perf_counter()
+        for x in data:
+            function(x)
+        print(f"{name} ({variant}): "
+              f"{(time.perf_counter() - start) * 1000:.1f} ms")
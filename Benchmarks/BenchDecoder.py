@@ -0,0 +1,32 @@
+# Measures decoding and encoding of a million register samples with the
+# vectorized decoder (see SVDDecoder), requires numpy
+
+# add the top directory where the module itself sits
+import site
+site.addsitedir("..")
+
+import time
+import numpy as np
+import xml.etree.ElementTree as ET
+from SVDReader import SVDReader
+from SVDDecoder import RegisterDecoder
+from SyntheticSVD import generate
+
+
+# build the device and pick the first register
+device = SVDReader.process(ET.fromstring(generate(peripherals=1)))
+register = next(iter(device['peripherals']['P0']['registers'].values()))
+decoder = RegisterDecoder(register)
+# random samples
+words = np.random.randint(0, 2 ** 32, size=1000000, dtype=np.uint64)
+
+# measure all the directions
+start = time.perf_counter()
+decoded = decoder.decode(words)
+print(f"decode: {(time.perf_counter() - start) * 1000:.1f} ms")
+start = time.perf_counter()
+decoder.decode_labels(words)
+print(f"decode_labels: {(time.perf_counter() - start) * 1000:.1f} ms")
+start = time.perf_counter()
+decoder.encode(decoded)
+print(f"encode: {(time.perf_counter() - start) * 1000:.1f} ms")
@@ -0,0 +1,31 @@
+# Measures the time to the first lookup of the lazy device against the full
+# processing of synthetic devices of different sizes, e.g.
+# 'python BenchLazy.py 100 1000'
+
+# add the top directory where the module itself sits
+import site
+site.addsitedir("..")
+
+import sys
+import time
+import xml.etree.ElementTree as ET
+from SVDReader import SVDReader
+from SVDLazy import LazyDevice
+from SyntheticSVD import generate
+
+# numbers of peripherals to try
+sizes = [int(s) for s in sys.argv[1:]] or [100, 1000]
+# go through the sizes
+for size in sizes:
+    data = generate(peripherals=size).encode()
+    # whole device
+    start = time.perf_counter()
+    device = SVDReader.process(ET.fromstring(data))
+    full = time.perf_counter() - start
+    # last peripheral of the lazy one (derived, so its base is parsed too)
+    start = time.perf_counter()
+    lazy = LazyDevice(data)
+    lazy['peripherals'][list(lazy['peripherals'])[-1]]
+    first = time.perf_counter() - start
+    print(f"{size} peripherals: full {full * 1000:.1f} ms, first lookup "
+          f"{first * 1000:.1f} ms ({len(lazy.parsed)} parsed)")
@@ -0,0 +1,40 @@
+# Compares the memory footprint of the nested dictionaries produced by the
+# parser with the compact object model (see SVDModel) on a synthetic device.
+
+# add the top directory where the module itself sits
+import site
+site.addsitedir("..")
+
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+from SVDReader import SVDReader
+from SyntheticSVD import generate
+
+
+# measure time and memory retained by the device processed into given model
+def measure(root: ET.Element, model: str):
+    # start tracing
+    tracemalloc.start()
+    start = time.perf_counter()
+    # process the device
+    result = SVDReader.process(root, model=model)
+    elapsed = time.perf_counter() - start
+    # memory that is still in use after the processing
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # return the measurements
+    return result, elapsed, current
+
+
+# build the device
+root = ET.fromstring(generate(peripherals=100, registers=32, fields=8,
+                              derived_every=1))
+
+# compare the two
+for model in ('dict', 'objects'):
+    result, elapsed, retained = measure(root, model)
+    print(f"{model}: {elapsed * 1000:.1f} ms, "
+          f"{retained / 1024 / 1024:.2f} MiB retained")
+    # drop the result before the next measurement
+    del result
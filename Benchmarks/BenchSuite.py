@@ -0,0 +1,129 @@
+# Measures every processing stage separately (time and memory) on synthetic
+# devices of given sizes and saves the results as json so that these can be
+# compared between the revisions, e.g.
+#   python BenchSuite.py --peripherals 10 100 --output results.json
+
+# add the top directory where the module itself sits
+import site
+site.addsitedir("..")
+
+import io
+import sys
+import json
+import time
+import argparse
+import platform
+import tracemalloc
+import xml.etree.ElementTree as ET
+from SVDReader import SVDReader
+from SVDWriter import SVDWriter
+from SVDHeader import HeaderGenerator
+from SyntheticSVD import generate
+
+
+# resolution of derivations works in place, wrap it so that every stage
+# returns its output
+def resolve_derivations(device: dict):
+    SVDReader._resolve_derivations(device)
+    return device
+
+
+# header is written to memory, the device is passed on to the next stage
+def generate_header(device: dict):
+    HeaderGenerator(device).write(io.StringIO())
+    return device
+
+
+# processing stages in order, each one takes the output of the previous one
+stages = (
+    ('process_device', SVDReader._process_device),
+    ('resolve_derivations', resolve_derivations),
+    ('resolve_implicit_inheritance', SVDReader._resolve_implicit_inheritance),
+    ('resolve_arrays_lists', SVDReader._resolve_arrays_lists),
+    ('header_generate', generate_header),
+    ('writer_process', SVDWriter.process),
+)
+
+
+# run all the stages on the document, 'measure' wraps every stage call and
+# returns (output, measurement)
+def run(text: str, measure):
+    # parsing the xml itself is a stage as well
+    value, results = text, dict()
+    value, results['xml_parse'] = measure(ET.fromstring, value)
+    # all the other stages
+    for name, stage in stages:
+        value, results[name] = measure(stage, value)
+    # return the measurements
+    return results
+
+
+# measure the execution time
+def measure_time(stage, value):
+    start = time.perf_counter()
+    value = stage(value)
+    return value, time.perf_counter() - start
+
+
+# measure the peak memory and the memory retained by the stage output
+def measure_memory(stage, value):
+    tracemalloc.start()
+    value = stage(value)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return value, {'peak_bytes': peak, 'retained_bytes': current}
+
+
+# benchmark the single device configuration
+def bench(params: dict, repeat: int):
+    # build the document
+    text = generate(**params)
+    # best time of all the runs
+    times = [run(text, measure_time) for _ in range(repeat)]
+    # memory is measured separately since tracing slows everything down
+    memory = run(text, measure_memory)
+    # merge the results
+    return {name: {'time_s': min(t[name] for t in times), **memory[name]}
+            for name in memory}
+
+
+# parse the command line
+parser = argparse.ArgumentParser(description="Benchmark the processing "
+                                             "stages on synthetic devices")
+parser.add_argument('--peripherals', type=int, nargs='+', default=[10, 100])
+parser.add_argument('--registers', type=int, default=32)
+parser.add_argument('--fields', type=int, default=8)
+parser.add_argument('--derived-every', type=int, default=4)
+parser.add_argument('--dim', type=int, default=0)
+parser.add_argument('--cluster-depth', type=int, default=0)
+parser.add_argument('--repeat', type=int, default=3)
+parser.add_argument('--output', help="json file to store the results in")
+args = parser.parse_args()
+
+# gather the results for every size of the device
+report = {
+    'python': platform.python_version(),
+    'platform': platform.platform(),
+    'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    'runs': []
+}
+for peripherals in args.peripherals:
+    params = {'peripherals': peripherals, 'registers': args.registers,
+              'fields': args.fields, 'derived_every': args.derived_every,
+              'dim': args.dim, 'cluster_depth': args.cluster_depth}
+    results = bench(params, args.repeat)
+    report['runs'].append({'params': params, 'stages': results})
+    # human readable summary
+    print(f"peripherals={peripherals}")
+    for name, r in results.items():
+        print(f"  {name:30} {r['time_s'] * 1000:10.1f} ms "
+              f"{r['peak_bytes'] / 1024 / 1024:10.2f} MiB peak "
+              f"{r['retained_bytes'] / 1024 / 1024:10.2f} MiB retained")
+
+# store the results
+if args.output:
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+else:
+    json.dump(report, sys.stdout)
+    print()
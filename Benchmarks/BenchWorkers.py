@@ -0,0 +1,27 @@
+# Measures the parsing of peripherals of a big synthetic device using pools of
+# different sizes, e.g. 'python BenchWorkers.py 1 2 4 8'. The document is
+# given as bytes so that the workers get the byte ranges of the peripherals
+
+# add the top directory where the module itself sits
+import site
+site.addsitedir("..")
+
+import sys
+import time
+from SVDReader import SVDReader
+from SyntheticSVD import generate
+
+
+# parsing is done in the main guard since the workers import this script
+if __name__ == '__main__':
+    # numbers of workers to try
+    workers = [int(w) for w in sys.argv[1:]] or [1, 2, 4]
+    # build the device
+    data = generate(peripherals=1000, registers=32, fields=8).encode()
+    # go through the pool sizes
+    for w in workers:
+        start = time.perf_counter()
+        device = SVDReader._process_document(data, workers=w)
+        elapsed = time.perf_counter() - start
+        print(f"{w} worker(s): {elapsed * 1000:.1f} ms, "
+              f"{len(device['peripherals'])} peripherals")
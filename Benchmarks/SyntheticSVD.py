@@ -0,0 +1,86 @@
+# Generator of synthetic svd documents used by the benchmarks. Documents are
+# built as plain text so that generating even a huge device takes no time
+# compared to parsing it.
+
+# add the top directory where the module itself sits
+import site
+site.addsitedir("..")
+
+
+# build the svd document with 'peripherals' peripherals where every
+# 'derived_every'-th one is fully defined and the following ones derive from
+# it. Fully defined peripherals contain 'registers' registers each having
+# 'fields' fields with a two-valued enumeration. When 'dim' is given then
+# every register is a list of 'dim' elements. With 'cluster_depth' set the
+# registers are placed within that many levels of nested clusters.
+def generate(peripherals=100, registers=32, fields=8, derived_every=4,
+             dim=0, cluster_depth=0):
+    # device header
+    out = ['<?xml version="1.0" encoding="utf-8"?>\n<device>'
+           '<name>SYNTHETIC</name><version>1.0</version>'
+           '<description>Synthetic device</description>'
+           '<cpu><name>CM4</name><revision>r0p1</revision>'
+           '<endian>little</endian><mpuPresent>true</mpuPresent>'
+           '<fpuPresent>true</fpuPresent><nvicPrioBits>4</nvicPrioBits>'
+           '<vendorSystickConfig>false</vendorSystickConfig></cpu>'
+           '<addressUnitBits>8</addressUnitBits><width>32</width>'
+           '<size>32</size><resetValue>0x00000000</resetValue>'
+           '<resetMask>0xFFFFFFFF</resetMask><peripherals>']
+    # generate all peripherals
+    for p in range(peripherals):
+        # base address of the peripheral
+        address = 0x40000000 + p * 0x1000
+        # derived peripheral
+        if p % derived_every:
+            out.append(f'<peripheral derivedFrom="P{p - p % derived_every}">'
+                       f'<name>P{p}</name>'
+                       f'<baseAddress>{address:#010x}</baseAddress>'
+                       f'<interrupt><name>P{p}_IRQ</name><value>{p}</value>'
+                       f'</interrupt></peripheral>')
+            continue
+        # fully defined one
+        out.append(f'<peripheral><name>P{p}</name>'
+                   f'<description>Peripheral {p}</description>'
+                   f'<groupName>G{p}</groupName>'
+                   f'<baseAddress>{address:#010x}</baseAddress>'
+                   f'<addressBlock><offset>0</offset><size>0x1000</size>'
+                   f'<usage>registers</usage></addressBlock>'
+                   f'<interrupt><name>P{p}_IRQ</name><value>{p}</value>'
+                   f'</interrupt><registers>')
+        # nested clusters
+        for c in range(cluster_depth):
+            out.append(f'<cluster><name>C{c}</name>'
+                       f'<description>Cluster {c}</description>'
+                       f'<addressOffset>0</addressOffset>')
+        # registers
+        for r in range(registers):
+            # dimensional information
+            if dim:
+                out.append(f'<register><dim>{dim}</dim>'
+                           f'<dimIncrement>{registers * 4:#x}</dimIncrement>'
+                           f'<name>R{r}_%s</name>')
+            else:
+                out.append(f'<register><name>R{r}</name>')
+            out.append(f'<description>Register {r}</description>'
+                       f'<addressOffset>{r * 4:#x}</addressOffset>'
+                       f'<resetValue>0x00000000</resetValue><fields>')
+            # fields
+            for f in range(fields):
+                width = 32 // fields
+                out.append(f'<field><name>F{f}</name>'
+                           f'<description>Field {f}</description>'
+                           f'<bitOffset>{f * width}</bitOffset>'
+                           f'<bitWidth>{width}</bitWidth>'
+                           f'<enumeratedValues><name>F{f}_E</name>'
+                           f'<enumeratedValue><name>OFF</name>'
+                           f'<value>0</value></enumeratedValue>'
+                           f'<enumeratedValue><name>ON</name>'
+                           f'<value>1</value></enumeratedValue>'
+                           f'</enumeratedValues></field>')
+            out.append('</fields></register>')
+        out.append('</cluster>' * cluster_depth)
+        out.append('</registers></peripheral>')
+    # close the document
+    out.append('</peripherals></device>')
+    # return the document text
+    return ''.join(out)
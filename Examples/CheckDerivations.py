@@ -0,0 +1,67 @@
+# Regression checks of the derivation resolution on small hand-made devices.
+# Every check processes the device and compares what the derived element
+# ended up with against what is expected, run as: python CheckDerivations.py
+
+# add the top directory where the module itself sits
+import site
+site.addsitedir("..")
+
+# import the parser
+import xml.etree.ElementTree as ET
+# import the svd parser itself
+from SVDReader import SVDReader
+
+# device header, peripherals are put in between
+header = ('<device><name>D</name><version>1</version><description>d'
+          '</description><cpu><name>CM4</name><revision>r0p1</revision>'
+          '<endian>little</endian><mpuPresent>true</mpuPresent>'
+          '<fpuPresent>true</fpuPresent><nvicPrioBits>4</nvicPrioBits>'
+          '<vendorSystickConfig>false</vendorSystickConfig></cpu>'
+          '<addressUnitBits>8</addressUnitBits><width>32</width><size>32'
+          '</size><resetValue>0</resetValue><resetMask>0xFFFFFFFF</resetMask>'
+          '<peripherals>%s</peripherals></device>')
+
+
+# register 'R' with the given fields
+def register(fields):
+    return ('<register><name>R</name><description>r</description>'
+            '<addressOffset>0</addressOffset><fields>' +
+            ''.join(f'<field><name>{f}</name><description>f</description>'
+                    f'<bitOffset>{i}</bitOffset><bitWidth>1</bitWidth>'
+                    f'</field>' for i, f in enumerate(fields)) +
+            '</fields></register>')
+
+
+# peripheral 'name' at 'address' with the registers, optionally derived
+def peripheral(name, address, registers='', derived_from=None):
+    attrib = f' derivedFrom="{derived_from}"' if derived_from else ''
+    return (f'<peripheral{attrib}><name>{name}</name>'
+            f'<baseAddress>{address}</baseAddress>'
+            f'<registers>{registers}</registers></peripheral>')
+
+
+# P3.X derives from P2.R, P2 derives from P1
+p1 = peripheral('P1', '0x1000', register(['a']))
+p3 = peripheral('P3', '0x3000', '<register derivedFrom="P2.R"><name>X</name>'
+                '<addressOffset>4</addressOffset></register>')
+# check name, peripherals and the expected fields of P3.X
+checks = (
+    # P2 overrides R: the merged register has to be found, not the original
+    ('overridden base', p1 + peripheral('P2', '0x2000', register(['b']), 'P1')
+     + p3, ['a', 'b']),
+    # P2 comes after P3 and inherits R from P1: forward reference
+    ('forward reference', p1 + p3 + peripheral('P2', '0x2000', '', 'P1'),
+     ['a']),
+)
+
+# run all the checks
+failed = 0
+for name, peripherals, expected in checks:
+    device = SVDReader.process(ET.fromstring(header % peripherals))
+    fields = list(device['peripherals']['P3']['registers']['X']['fields'])
+    ok = fields == expected
+    failed += not ok
+    print(f"{name}: {'ok' if ok else 'FAILED'} ({fields})")
+# report the failure with the exit code
+if failed:
+    raise SystemExit(1)
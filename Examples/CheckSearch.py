@@ -0,0 +1,37 @@
+# Checks of the fuzzy search ranking on small hand-made devices: results that
+# have the same score have to come in the order of their paths, no matter how
+# many of these there are. Run as: python CheckSearch.py
+
+# add the top directory where the module itself sits
+import site
+site.addsitedir("..")
+
+# import the search
+from SVDSearch import SVDSearch
+
+# many peripherals with the same registers: every 'R3' ties with the others
+device = {'peripherals': {f"P{i}": {'registers': {'R3': {}, 'R30': {}}}
+                          for i in range(200)}}
+search = SVDSearch(device)
+# all the matches, ranked
+everything = [path for _, path, _ in search.search('r3', limit=1000)]
+# check name, query, limit and the expected paths
+checks = (
+    # exact matches first, ties ordered by the path
+    ('ties', 'r3', 5, ['P0.R3', 'P1.R3', 'P10.R3', 'P100.R3', 'P101.R3']),
+    # limit cuts the full ranking
+    ('cut', 'r3', 250, everything[:250]),
+    # single character query, prefix matches
+    ('single character', 'r', 3, ['P0.R3', 'P1.R3', 'P10.R3']),
+)
+
+# run all the checks
+failed = 0
+for name, query, limit, expected in checks:
+    paths = [path for _, path, _ in search.search(query, limit=limit)]
+    ok = paths == expected
+    failed += not ok
+    print(f"{name}: {'ok' if ok else 'FAILED'} ({paths[:5]})")
+# report the failure with the exit code
+if failed:
+    raise SystemExit(1)
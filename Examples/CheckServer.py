@@ -0,0 +1,100 @@
+# Round-trip checks of the lookup daemon: the server is started within the
+# thread on a temporary socket and queried with the client, the register
+# found by its address has to be decodable by the path that was reported.
+# Run as: python CheckServer.py
+
+# add the top directory where the module itself sits
+import site
+site.addsitedir("..")
+
+import os
+import time
+import asyncio
+import tempfile
+import threading
+# import the server and the client
+from SVDServer import SVDServer, SVDClient
+
+# device with the array of clusters that hold a register, the field of it has
+# an anonymous enumerated value
+document = (
+    '<device><name>D</name><version>1</version><description>d</description>'
+    '<cpu><name>CM4</name><revision>r0p1</revision><endian>little</endian>'
+    '<mpuPresent>true</mpuPresent><fpuPresent>true</fpuPresent>'
+    '<nvicPrioBits>4</nvicPrioBits><vendorSystickConfig>false'
+    '</vendorSystickConfig></cpu><addressUnitBits>8</addressUnitBits>'
+    '<width>32</width><size>32</size><resetValue>0</resetValue>'
+    '<resetMask>0xFFFFFFFF</resetMask>'
+    '<peripherals><peripheral><name>TIM1</name>'
+    '<baseAddress>0x40000000</baseAddress><registers><cluster><dim>4</dim>'
+    '<dimIncrement>8</dimIncrement><name>CH[%s]</name><description>c'
+    '</description><addressOffset>0x10</addressOffset><register>'
+    '<name>CCR</name><description>r</description><addressOffset>4'
+    '</addressOffset><fields><field><name>MODE</name><description>f'
+    '</description><bitOffset>0</bitOffset><bitWidth>2</bitWidth>'
+    '<enumeratedValues><enumeratedValue><name>OFF</name><value>0</value>'
+    '</enumeratedValue><enumeratedValue><description>Running</description>'
+    '<value>1</value></enumeratedValue></enumeratedValues></field>'
+    '</fields></register></cluster></registers></peripheral></peripherals>'
+    '</device>')
+
+
+
+# serve until cancelled
+def serve(loop, task):
+    try:
+        loop.run_until_complete(task)
+    except asyncio.CancelledError:
+        pass
+
+
+# run all the checks within the temporary directory
+failed = 0
+with tempfile.TemporaryDirectory() as tmp:
+    path, socket_path = os.path.join(tmp, 'd.svd'), os.path.join(tmp, 's')
+    with open(path, 'w') as f:
+        f.write(document)
+    # serve within the thread
+    loop = asyncio.new_event_loop()
+    task = loop.create_task(SVDServer(socket_path).serve())
+    thread = threading.Thread(target=serve, args=(loop, task))
+    thread.start()
+    while not os.path.exists(socket_path):
+        time.sleep(0.01)
+    try:
+        with SVDClient(socket_path, timeout=10) as client:
+            # register of the second element of the array
+            info = client.address(path, 0x40000000 + 0x10 + 8 + 4)
+            by_address = client.decode(path, 1, address=info['address'])
+            by_name = client.decode(path, 1, name=info['path'])
+            # (name, result, expected)
+            checks = (
+                ('address', info['path'], 'TIM1.CH[1].CCR'),
+                ('decode by path', by_name, by_address),
+                ('anonymous value', by_name['fields']['MODE']['enum'],
+                 'Running'),
+                ('named value', client.decode(path, 0, name=info['path'])
+                 ['fields']['MODE']['enum'], 'OFF'),
+                ('register by path', client.register(path, info['path'],
+                                                     depth=0)['fields'],
+                 ['MODE']),
+            )
+            for name, result, expected in checks:
+                ok = result == expected
+                failed += not ok
+                print(f"{name}: {'ok' if ok else 'FAILED'} ({result})")
+            # index beyond the array
+            try:
+                client.decode(path, 1, name='TIM1.CH[4].CCR')
+                ok = False
+            except Exception:
+                ok = True
+            failed += not ok
+            print(f"index out of range: {'ok' if ok else 'FAILED'}")
+    # stop the server
+    finally:
+        loop.call_soon_threadsafe(task.cancel)
+        thread.join()
+# report the failure with the exit code
+if failed:
+    raise SystemExit(1)
@@ -0,0 +1,248 @@
+from bisect import bisect_left, bisect_right
+
+
+# index of the absolute addresses of the device elements (as produced by the
+# svd parser with arrays and lists resolved): peripherals, their address
+# blocks, clusters and registers. Every element is an interval of addresses
+# and the intervals are kept sorted by their starting address so that the
+# lookups are done with bisection. Registers do not nest and only the
+# alternate ones overlap, so these are kept on their own along with the
+# running maximum of their ends: going back from the bisection point stops as
+# soon as no earlier register can reach the address, which only takes a few
+# steps. Containers (peripherals, address blocks and clusters) nest in each
+# other, so the addresses they cover are split into the elementary segments
+# instead, every one holding all the containers that cover it: a single
+# bisection gives all the containers of the address.
+class AddressMap:
+    # order of the kinds of elements that start at the same address, outer
+    # ones come first
+    _ranks = {'peripheral': 0, 'address_block': 1, 'cluster': 2,
+              'register': 3}
+
+    # build the map for given device
+    def __init__(self, device: dict):
+        # size of the addressable unit in bits
+        self._unit = device.get('address_unit_bits') or 8
+        # default register size in bits
+        self._size = (device.get('reg_properties') or {}).get('size') or \
+            device.get('width') or 32
+        # all the entries
+        entries = []
+        # process all the peripherals
+        for name, address, p in self._elements(device['peripherals'],
+                                               'base_address', 0):
+            self._add_peripheral(entries, name, address, p)
+        # sort by the address, outer (bigger) elements first, alternates last
+        entries.sort(key=self._order)
+        # starting addresses (for the bisection)
+        self._starts = [e['address'] for e in entries]
+        # store the entries
+        self._entries = entries
+        # registers on their own, with the running maximum of their ends
+        self._registers = [e for e in entries if e['kind'] == 'register']
+        self._register_starts = [e['address'] for e in self._registers]
+        self._register_max_ends, max_end = [], 0
+        for e in self._registers:
+            max_end = max(max_end, e['address'] + e['size'])
+            self._register_max_ends.append(max_end)
+        # elementary segments of the containers
+        self._bounds, self._covers = self._segments(
+            [e for e in entries if e['kind'] != 'register'])
+
+    # sorting key of the entries: by the address, outer (bigger) elements
+    # first, alternates last
+    @staticmethod
+    def _order(e: dict):
+        return (e['address'], AddressMap._ranks[e['kind']], -e['size'],
+                e['alternate'])
+
+    # split the addresses covered by the (sorted) containers into the
+    # elementary segments. Returns the sorted list of the segment starts and
+    # the list of the tuples of containers (in their order) that cover every
+    # segment
+    @staticmethod
+    def _segments(containers: list):
+        # empty containers do not cover anything
+        containers = [e for e in containers if e['size'] > 0]
+        # ends of the containers in their order
+        ends = sorted((e['address'] + e['size'], i)
+                      for i, e in enumerate(containers))
+        points = sorted({e['address'] for e in containers} |
+                        {end for end, _ in ends})
+        # sweep over the points, keeping the set of the active containers
+        bounds, covers, active, i, j = [], [], set(), 0, 0
+        for point in points:
+            # containers that end here
+            changed = False
+            while j < len(ends) and ends[j][0] == point:
+                active.discard(ends[j][1])
+                j, changed = j + 1, True
+            # containers that start here
+            while i < len(containers) and containers[i]['address'] == point:
+                active.add(i)
+                i, changed = i + 1, True
+            # segments that are covered by the same containers share these
+            bounds.append(point)
+            covers.append(tuple(containers[k] for k in sorted(active))
+                          if changed or not covers else covers[-1])
+        return bounds, covers
+
+    # containers that cover the address, in their order
+    def _containers(self, addr: int):
+        i = bisect_right(self._bounds, addr) - 1
+        return self._covers[i] if i >= 0 else ()
+
+    # registers that cover the address, in their order
+    def _registers_at(self, addr: int):
+        i = bisect_right(self._register_starts, addr) - 1
+        found = []
+        # go back until no register can reach the address
+        while i >= 0 and self._register_max_ends[i] > addr:
+            e = self._registers[i]
+            if e['address'] + e['size'] > addr:
+                found.append(e)
+            i -= 1
+        # restore the order
+        found.reverse()
+        return found
+
+    # yield (name, address, node) for all the elements of the collection.
+    # Arrays are expanded into their elements, 'offset_name' is the key that
+    # holds the offset of the element relative to 'base'
+    @staticmethod
+    def _elements(collection: dict, offset_name: str, base: int):
+        for name, node in collection.items():
+            # address of the (first) element
+            address = base + (node.get(offset_name) or 0)
+            # array: expand
+            if "[%s]" in name:
+                dim = node.get('dim') or {}
+                for i in range(dim.get('dim') or 0):
+                    yield (name.replace("%s", str(i)),
+                           address + i * (dim.get('increment') or 0), node)
+            # plain element
+            else:
+                yield name, address, node
+
+    # size of the register in addressable units
+    def _register_size(self, node: dict):
+        # size in bits
+        size = (node.get('reg_properties') or {}).get('size') or self._size
+        # round up to the addressable units
+        return max(1, -(-size // self._unit))
+
+    # create an entry
+    @staticmethod
+    def _entry(kind: str, path: str, address: int, size: int, node: dict,
+               alternate: bool):
+        return {'kind': kind, 'path': path, 'address': address, 'size': size,
+                'node': node, 'alternate': alternate}
+
+    # add the peripheral along with its address block and contents
+    def _add_peripheral(self, entries: list, name: str, address: int,
+                        node: dict):
+        # alternate peripherals overlap the ones they are alternate to
+        alternate = bool(node.get('alternate_to'))
+        # add the contents, this gives us the extent of the registers
+        lo, hi = self._add_contents(entries, node, name, address, alternate)
+        # address block defines the extent of the peripheral
+        block = node.get('address_block')
+        if block and block.get('size'):
+            b_lo = address + (block.get('offset') or 0)
+            b_hi = b_lo + block['size']
+            entries.append(self._entry('address_block', name, b_lo,
+                                       b_hi - b_lo, block, alternate))
+            # peripheral covers both the block and the registers
+            lo, hi = min(lo, b_lo), max(hi, b_hi)
+        # empty peripheral
+        if lo >= hi:
+            lo, hi = address, address
+        # add the peripheral itself
+        entries.append(self._entry('peripheral', name, lo, hi - lo, node,
+                                   alternate))
+
+    # add all the clusters and registers of the node, return the extent
+    # (lo, hi) of these
+    def _add_contents(self, entries: list, node: dict, path: str, base: int,
+                      alternate: bool):
+        # extent of the contents, empty for now
+        lo, hi = float('inf'), float('-inf')
+        # clusters
+        for name, address, c in self._elements(node.get('clusters') or {},
+                                               'offset', base):
+            # alternate clusters (and everything within these)
+            c_alternate = alternate or bool(c.get('alternate_to'))
+            c_path = f"{path}.{name}"
+            # process the contents first
+            c_lo, c_hi = self._add_contents(entries, c, c_path, address,
+                                            c_alternate)
+            # cluster starts at its address, ends where its contents end
+            c_hi = max(address, c_hi)
+            entries.append(self._entry('cluster', c_path, address,
+                                       c_hi - address, c, c_alternate))
+            # update the extent
+            lo, hi = min(lo, address), max(hi, c_hi)
+        # registers
+        for name, address, r in self._elements(node.get('registers') or {},
+                                               'offset', base):
+            size = self._register_size(r)
+            entries.append(self._entry(
+                'register', f"{path}.{name}", address, size, r,
+                alternate or bool(r.get('alternate_to'))))
+            # update the extent
+            lo, hi = min(lo, address), max(hi, address + size)
+        # return the extent
+        return lo, hi
+
+    # yield all the entries that contain the address, in the order of the
+    # starting address (outer elements first)
+    def regions(self, addr: int):
+        return iter(sorted([*self._containers(addr),
+                            *self._registers_at(addr)], key=self._order))
+
+    # get the register that the address belongs to. Returns the dictionary
+    # with the fully qualified 'path' of the register, its 'address', 'size'
+    # (in addressable units), the 'node' itself, the 'fields' layout (list
+    # of name, bit offset and bit width sorted by the offset) and 'alternates'
+    # (paths of the other registers that occupy the same address). None is
+    # returned if the address does not belong to any register.
+    def lookup(self, addr: int):
+        # registers at the address
+        registers = self._registers_at(addr)
+        # nothing found
+        if not registers:
+            return None
+        # prefer the register that is not an alternate one
+        primary = next((e for e in registers if not e['alternate']),
+                       registers[0])
+        # build the layout of the fields
+        fields = sorted(({'name': name,
+                          'bit_offset': f.get('bit_offset'),
+                          'bit_width': f.get('bit_width')}
+                         for name, f in
+                         (primary['node'].get('fields') or {}).items()),
+                        key=lambda f: f['bit_offset'] or 0)
+        # return the information
+        return {**primary, 'fields': fields,
+                'alternates': [e['path'] for e in registers
+                               if e is not primary]}
+
+    # yield the entries of given kind ('register', 'cluster', 'peripheral',
+    # 'address_block' or None for all) that overlap the addresses from 'lo'
+    # (inclusive) to 'hi' (exclusive) in the order of their addresses
+    def range(self, lo: int, hi: int, kind='register'):
+        # entries that start before 'lo' but reach into the range
+        before = sorted((e for e in [*self._containers(lo),
+                                     *self._registers_at(lo)]
+                         if e['address'] < lo), key=self._order)
+        # entries that start within the range
+        start = bisect_left(self._starts, lo)
+        stop = bisect_left(self._starts, hi)
+        # report all in order
+        for e in [*before, *self._entries[start:stop]]:
+            if kind is None or e['kind'] == kind:
+                yield e
+
+    # number of indexed entries
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,138 @@
+from collections.abc import Mapping
+from SVDReader import SVDReader
+
+
+# read-only view of a single node of the device dictionary in which the
+# dimensional information (arrays and lists) is resolved lazily. Elements of
+# the lists are not stored anywhere: the view is created on access from the
+# shared template node and the values that differ (name, offset, dim), all the
+# other keys are served directly from the template.
+class SVDArrayElement(Mapping):
+    __slots__ = ('_node', '_overrides')
+
+    # create the view of the 'node' with some of its keys overridden
+    def __init__(self, node: dict, overrides=None):
+        self._node = node
+        self._overrides = overrides
+
+    # get the value, collections are wrapped in views as well
+    def __getitem__(self, key):
+        # overridden value
+        if self._overrides and key in self._overrides:
+            return self._overrides[key]
+        # get the value from the template
+        value = self._node[key]
+        # collections that contain arrays/lists are resolved lazily as well
+        if key in SVDArrayCollection.levels:
+            return SVDArrayCollection(value, key)
+        # return the plain value
+        return value
+
+    # iterate over the keys of the template followed by the new ones
+    def __iter__(self):
+        yield from self._node
+        # keys that are not present within the template
+        if self._overrides:
+            yield from (k for k in self._overrides if k not in self._node)
+
+    # number of keys
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    # produce a plain dictionary (same as the one that would be created if
+    # the arrays and lists were resolved eagerly)
+    def materialize(self) -> dict:
+        return {k: v.materialize() if hasattr(v, 'materialize') else v
+                for k, v in self.items()}
+
+    # show what we are
+    def __repr__(self):
+        return f"{type(self).__name__}({self.get('name')!r})"
+
+
+# read-only view of a collection (peripherals, clusters, registers, fields)
+# that expands the arrays and lists on access. Only the names of the list
+# elements are generated (once the collection is first looked into), the
+# elements themselves are lightweight views of the shared template.
+class SVDArrayCollection(Mapping):
+    __slots__ = ('_collection', '_level', '_templates', '_elements')
+
+    # levels of hierarchy that are subject to array/list expansion
+    levels = ('peripherals', 'clusters', 'registers', 'fields')
+
+    # create the view of the 'collection' that belongs to 'level'
+    def __init__(self, collection: dict, level: str):
+        self._collection = collection
+        self._level = level
+        # names generated for the list templates (template key -> names)
+        self._templates = None
+        # name -> (template, offset) mapping of list elements
+        self._elements = None
+
+    # check if node is a list template
+    @staticmethod
+    def _is_list(node: dict):
+        return "%s" in node['name'] and "[%s]" not in node['name']
+
+    # generate the names of all the list elements
+    def _expand(self):
+        # already done?
+        if self._templates is not None:
+            return
+        # start with empty collections
+        self._templates, self._elements = dict(), dict()
+        # process all the list templates
+        for key, node in self._collection.items():
+            if self._is_list(node):
+                # build up the namespace for the list
+                namespace = SVDReader._create_list_namespace(node)
+                # store the names and the offsets
+                self._templates[key] = [name for name, _ in namespace]
+                for name, offset in namespace:
+                    self._elements[name] = (node, offset)
+
+    # get the element view by its name
+    def __getitem__(self, name):
+        # plain element or an array
+        node = self._collection.get(name)
+        if node is not None and not self._is_list(node):
+            # arrays are marked as such
+            if "[%s]" in node['name']:
+                return SVDArrayElement(node, {'is_array': True})
+            # nothing changes for plain elements
+            return SVDArrayElement(node)
+        # list elements
+        self._expand()
+        node, offset = self._elements[name]
+        # offset field of the level
+        offset_name = SVDReader._dim_offsets[self._level]
+        # compute the element values that differ from the template
+        return SVDArrayElement(node, {
+            'name': name,
+            'dim': dict(),
+            offset_name: node.get(offset_name, 0) + offset
+        })
+
+    # iterate over the element names, list elements are placed where their
+    # template was
+    def __iter__(self):
+        for key, node in self._collection.items():
+            # list gets expanded
+            if self._is_list(node):
+                self._expand()
+                yield from self._templates[key]
+            # plain element or an array
+            else:
+                yield key
+
+    # number of the elements
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    # produce a plain dictionary with all the elements
+    def materialize(self) -> dict:
+        return {k: v.materialize() for k, v in self.items()}
+
+    # show what we are
+    def __repr__(self):
+        return f"{type(self).__name__}({self._level!r}, {list(self)!r})"
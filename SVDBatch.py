@@ -0,0 +1,93 @@
+import os
+import sys
+import json
+import argparse
+from SVDReader import SVDReader
+
+
+# command line interface for processing many svd files at once. Every file
+# gets a single line of report (plain text or json), failures do not stop the
+# batch but make the exit code non-zero. Run as: python -m SVDBatch --help
+class SVDBatch:
+    # expand the directories into the lists of svd files within these
+    @staticmethod
+    def find_files(paths: list):
+        for path in paths:
+            # walk the directory tree
+            if os.path.isdir(path):
+                for top, dirs, files in os.walk(path):
+                    # keep the order stable
+                    dirs.sort()
+                    for name in sorted(files):
+                        if name.lower().endswith('.svd'):
+                            yield os.path.join(top, name)
+            # plain file
+            else:
+                yield path
+
+    # build the report line for the result of 'SVDReader.process_many()'
+    @staticmethod
+    def report(result: dict, as_json: bool):
+        # summary of the result, elapsed time is not known when the pool
+        # has failed
+        error, elapsed = result['error'], result['elapsed']
+        device = result['summary'] or {}
+        summary = {
+            'path': result['path'],
+            'ok': error is None,
+            'elapsed': None if elapsed is None else round(elapsed, 6),
+            'peripherals': device.get('peripherals'),
+            'error': error and {k: error[k] for k in ('type', 'message')}
+        }
+        # machine readable form
+        if as_json:
+            return json.dumps(summary)
+        # human readable form
+        status = "ok" if summary['ok'] else \
+            f"FAILED {error['type']}: {error['message']}"
+        if elapsed is None:
+            return f"{result['path']}: {status}"
+        return f"{result['path']}: {status} ({elapsed:.3f} s)"
+
+    # parse the command line and do the processing, returns the exit code
+    @staticmethod
+    def main(argv=None):
+        # build the parser
+        parser = argparse.ArgumentParser(
+            prog="python -m SVDBatch",
+            description="Process many svd files and report the outcome")
+        parser.add_argument('paths', nargs='+',
+                            help="svd files or directories to search for these")
+        parser.add_argument('-j', '--workers', type=int, default=os.cpu_count(),
+                            help="number of worker processes")
+        parser.add_argument('--cache-dir', default=None,
+                            help="directory of the cache of processed devices")
+        parser.add_argument('--json', action='store_true',
+                            help="report every file as a line of json")
+        parser.add_argument('--no-derivations', action='store_true',
+                            help="do not resolve the derivations")
+        parser.add_argument('--no-inheritance', action='store_true',
+                            help="do not resolve the implicit inheritance")
+        parser.add_argument('--no-arrays-lists', action='store_true',
+                            help="do not resolve the arrays and lists")
+        args = parser.parse_args(argv)
+        # process all the files, only the summaries are needed
+        failed = 0
+        for result in SVDReader.process_many(
+                SVDBatch.find_files(args.paths), workers=args.workers,
+                summary_only=True,
+                cache_dir=args.cache_dir,
+                resolve_derivations=not args.no_derivations,
+                resolve_inheritance=not args.no_inheritance,
+                resolve_arrays_lists=not args.no_arrays_lists):
+            # count the failures
+            failed += result['error'] is not None
+            # report the file
+            print(SVDBatch.report(result, args.json), flush=True)
+        # non-zero exit code if anything went wrong
+        return 1 if failed else 0
+
+
+# run from the command line
+if __name__ == '__main__':
+    sys.exit(SVDBatch.main())
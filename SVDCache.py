@@ -0,0 +1,118 @@
+import os
+import pickle
+import hashlib
+import tempfile
+
+
+# persistent on-disk cache of processed devices. Entries are keyed by the hash
+# of the svd document contents, the processing options and the version of the
+# processing code, so the cache never needs to be invalidated by hand: changing
+# any of these just produces a different key. Devices are stored using pickle
+# which keeps the sub-trees shared within the device shared after loading as
+# well. The total size of the cache is bounded, least recently used entries
+# are removed first.
+class SVDCache:
+    # version of the processing code. Bump it every time the structure of the
+    # produced dictionaries changes so that stale entries do not get loaded
+    version = 5
+    # extension of the cache files
+    _extension = '.svdc'
+
+    # create the cache within given directory, 'max_size' is the limit of the
+    # total size of the entries in bytes
+    def __init__(self, cache_dir: str, max_size=256 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        # make sure that the directory exists
+        os.makedirs(cache_dir, exist_ok=True)
+
+    # build the key for the svd document contents processed with given options
+    @staticmethod
+    def key(data: bytes, **options) -> str:
+        # hash the document itself
+        digest = hashlib.sha256(data)
+        # followed by the version and all the options in a stable order
+        digest.update(repr((SVDCache.version,
+                            sorted(options.items()))).encode())
+        # return the hex digest
+        return digest.hexdigest()
+
+    # path of the file that holds the entry
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + self._extension)
+
+    # get the device stored under the key, None is returned if there is no
+    # such entry (or if the entry cannot be read)
+    def get(self, key: str):
+        # path to the entry
+        path = self._path(key)
+        # try to load the device
+        try:
+            with open(path, 'rb') as f:
+                device = pickle.load(f)
+        # no such entry
+        except FileNotFoundError:
+            return None
+        # broken entry (e.g. written by an incompatible python), drop it
+        except Exception:
+            self._remove(path)
+            return None
+        # mark the entry as recently used
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        # return the device
+        return device
+
+    # store the device under the key
+    def put(self, key: str, device: dict):
+        # write to the temporary file first so that other processes never see
+        # partially written entries
+        fd, tmp = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(device, f, protocol=pickle.HIGHEST_PROTOCOL)
+            # move in place
+            os.replace(tmp, self._path(key))
+        # clean up after ourselves
+        except BaseException:
+            self._remove(tmp)
+            raise
+        # make sure we fit within the size limit
+        self._evict()
+
+    # remove the file, ignore the errors (other process may have been faster)
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    # remove least recently used entries until the total size of the cache
+    # fits within the limit
+    def _evict(self):
+        # gather (mtime, size, path) for all the entries
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(self._extension):
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, entry.path))
+        # total size of the cache
+        total = sum(size for _, size, _ in entries)
+        # remove the oldest entries first
+        for _, size, path in sorted(entries):
+            if total <= self.max_size:
+                break
+            self._remove(path)
+            total -= size
+
+    # remove all the entries
+    def clear(self):
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(self._extension):
+                self._remove(entry.path)
@@ -0,0 +1,140 @@
+# numpy is optional, it is only needed by the decoder itself
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# decoder (and encoder) of the raw register values compiled from the register
+# node (as produced by the svd parser). All the work is done on whole numpy
+# arrays of samples at once: decoding splits the array of raw register words
+# into the structured array with one column per field, encoding does the
+# opposite. Enumerated values may be decoded to their names as well.
+class RegisterDecoder:
+    # unsigned integer types that fit given number of bits
+    _types = ((8, 'u1'), (16, 'u2'), (32, 'u4'), (64, 'u8'))
+
+    # compile the decoder for the register, 'size' is the register size in
+    # bits (taken from the register properties if not given)
+    def __init__(self, register: dict, size=None):
+        # we cannot do anything without numpy
+        if np is None:
+            raise Exception("RegisterDecoder requires numpy")
+        # size of the register
+        size = size or (register.get('reg_properties') or {}).get('size') \
+            or 32
+        # type of the register words
+        self.word_type = np.dtype(self._type_for(size))
+        # value of the bits that are not covered by any field
+        self.reset_value = (register.get('reg_properties') or {}).get(
+            'reset_value') or 0
+        # compile the fields: (name, offset, mask, labels, values)
+        self.fields = []
+        for name, field in (register.get('fields') or {}).items():
+            # position and size of the field
+            offset = field.get('bit_offset') or 0
+            width = field.get('bit_width') or 0
+            mask = (1 << width) - 1
+            # enumerated values as sorted arrays of values and names
+            enums = {v['value']: v_name
+                     for e in (field.get('enumerated_values') or {}).values()
+                     for v_name, v in
+                     (e.get('enumerated_value') or {}).items()
+                     if v.get('value') is not None}
+            values = np.array(sorted(enums), dtype='u8')
+            labels = np.array([enums[v] for v in sorted(enums)] or [''])
+            # store the compiled field
+            self.fields.append((name, offset, mask, labels, values))
+        # type of the decoded samples: one column per field
+        self.dtype = np.dtype([(name, self._type_for(mask.bit_length()))
+                               for name, _, mask, _, _ in self.fields])
+
+    # smallest unsigned integer type that holds given number of bits
+    @staticmethod
+    def _type_for(bits: int):
+        for size, code in RegisterDecoder._types:
+            if bits <= size:
+                return code
+        # oops!
+        raise Exception(f"Unsupported size of {bits} bits")
+
+    # decode the array of raw register words into the structured array of
+    # field values
+    def decode(self, words):
+        # make sure we have the array of the right type
+        words = np.asarray(words).astype(self.word_type, copy=False)
+        # output array
+        out = np.empty(words.shape, dtype=self.dtype)
+        # extract every field from all the samples at once
+        for name, offset, mask, _, _ in self.fields:
+            out[name] = (words >> self.word_type.type(offset)) & \
+                self.word_type.type(mask)
+        # return the decoded samples
+        return out
+
+    # decode the array of raw register words into the dictionary of arrays
+    # with the names of the enumerated values (empty string where the value
+    # is not enumerated). Fields without enumerated values are omitted
+    def decode_labels(self, words):
+        # decode the numbers first
+        decoded = self.decode(words)
+        # output dictionary
+        out = dict()
+        # process the fields with enumerated values
+        for name, _, _, labels, values in self.fields:
+            # no enumerated values
+            if not len(values):
+                continue
+            # locate the values within the sorted array of enumerated ones
+            column = decoded[name].astype('u8')
+            pos = np.searchsorted(values, column)
+            pos = np.minimum(pos, len(values) - 1)
+            # values that are not enumerated get empty labels
+            out[name] = np.where(values[pos] == column, labels[pos], '')
+        # return the labels
+        return out
+
+    # encode the field values into the array of raw register words. 'columns'
+    # is the structured array (e.g. returned by 'decode()') or a dictionary
+    # of arrays (or scalars) keyed by the field names. Columns of strings are
+    # treated as names of the enumerated values. Bits of the fields that are
+    # not given are taken from the reset value of the register
+    def encode(self, columns):
+        # structured arrays are accessed by the field names as well
+        names = columns.dtype.names if hasattr(columns, 'dtype') else columns
+        # shape of the output
+        shape = np.broadcast_shapes(*(np.shape(columns[n]) for n in names))
+        # start with the reset value
+        words = np.full(shape, self.reset_value, dtype=self.word_type)
+        # put all the fields in place
+        for name, offset, mask, labels, values in self.fields:
+            # field not given
+            if name not in names:
+                continue
+            # get the values
+            column = np.asarray(columns[name])
+            # names of the enumerated values
+            if column.dtype.kind in 'USO':
+                column = self._encode_labels(name, column, labels, values)
+            # position the values within the words
+            column = column.astype(self.word_type) & self.word_type.type(mask)
+            shift = self.word_type.type(offset)
+            field_mask = self.word_type.type(mask << offset)
+            words = (words & ~field_mask) | (column << shift)
+        # return the words
+        return words
+
+    # convert the names of the enumerated values to the values
+    @staticmethod
+    def _encode_labels(name: str, column, labels, values):
+        # sort the names so that we can search within them
+        order = np.argsort(labels)
+        sorted_labels = labels[order]
+        # locate the names
+        pos = np.searchsorted(sorted_labels, column)
+        pos = np.minimum(pos, len(labels) - 1)
+        # all the names must be known
+        if not len(values) or not np.all(sorted_labels[pos] == column):
+            raise Exception(f"Unknown enumerated value name for field {name}")
+        # return the values
+        return values[order[pos]]
@@ -0,0 +1,381 @@
+import re
+from SVDStats import SVDStats
+
+
+# generator of the CMSIS-style C header for the device (as produced by the svd
+# parser with the derivations and arrays/lists resolved). The header holds
+# the interrupt numbers, one structure type for every distinct peripheral
+# layout (preceded by the sub-structures of its clusters) with the gaps
+# between the registers filled with the reserved padding, the positions and
+# masks of the fields along with their enumerated values, the base addresses
+# and the peripheral instances. Peripherals of the same layout (e.g. the
+# derived ones) share the type. Text is produced as it goes, nothing besides
+# the small buffer is kept in memory. Offsets are assumed to be in bytes and
+# the registers are expected to be naturally aligned (as the compiler does
+# not know about the layout of the hardware).
+class HeaderGenerator:
+    # c types of the registers that fit given number of bytes
+    _types = ((1, 'uint8_t'), (2, 'uint16_t'), (4, 'uint32_t'),
+              (8, 'uint64_t'))
+    # characters that may not appear within the identifiers
+    _invalid = re.compile(r'\W')
+
+    # set up the generator for the device, output is produced in chunks of
+    # (roughly) 'buffer_size' characters
+    def __init__(self, device: dict, buffer_size=64 * 1024):
+        self.device = device
+        self.buffer_size = buffer_size
+        # default register size in bits
+        self._size = (device.get('reg_properties') or {}).get('size') or \
+            device.get('width') or 32
+        # (id of the node, register size) -> layout id
+        self._layouts = dict()
+        # layout -> layout id, equal layouts get the same id
+        self._ids = dict()
+        # (layout id, padding) -> (type name, size) of the produced structures
+        self._structs = dict()
+
+    # make the identifier out of the element name, array brackets and
+    # placeholders are removed
+    @staticmethod
+    def _ident(name: str):
+        name = name.replace("[%s]", "").replace("%s", "")
+        return HeaderGenerator._invalid.sub("_", name)
+
+    # make the description fit within the comment
+    @staticmethod
+    def _comment(text):
+        return " ".join((text or "").split()).replace("*/", "* /")
+
+    # integer literal of the value
+    @staticmethod
+    def _literal(value: int):
+        return f"0x{value:X}UL" if value <= 0xFFFFFFFF else f"0x{value:X}ULL"
+
+    # c type of the register of given size in bits
+    @staticmethod
+    def _type(bits: int):
+        for size, name in HeaderGenerator._types:
+            if bits <= size * 8:
+                return size, name
+        # oops!
+        raise Exception(f"Unsupported register size of {bits} bits")
+
+    # yield (name, offset delta) for every instance of the element, arrays and
+    # (unresolved) lists are expanded
+    @staticmethod
+    def _instances(name: str, node: dict):
+        # plain element
+        if "%s" not in name:
+            yield name, 0
+            return
+        # one instance per index
+        dim = node.get('dim') or {}
+        index = dim.get('index') or [str(i) for i in range(dim.get('dim')
+                                                           or 0)]
+        increment = dim.get('increment') or 0
+        for i, idx in enumerate(index):
+            yield name.replace("[%s]", "%s").replace("%s", idx), i * increment
+
+    # size of the register in bits, 'size' is the inherited one
+    @staticmethod
+    def _reg_size(node: dict, size: int):
+        return (node.get('reg_properties') or {}).get('size') or size
+
+    # dimension of the element in the form that may be compared
+    @staticmethod
+    def _dim(node: dict):
+        dim = node.get('dim')
+        if not dim:
+            return None
+        return dim.get('dim'), dim.get('increment'), \
+            tuple(dim.get('index') or ())
+
+    # id of the layout of the node contents (everything within it, but not
+    # its own position): equal ids mean the same structure types and macros.
+    # Layouts of the sub-elements are referenced by their ids, so these stay
+    # small. Fields are the most numerous, these are described in place
+    def _layout(self, node: dict, size: int):
+        key = (id(node), size)
+        # already known?
+        layout_id = self._layouts.get(key)
+        if layout_id is not None:
+            return layout_id
+        # register size within the node
+        size = self._reg_size(node, size)
+        layout = [size]
+        # clusters and registers along with their positions
+        for level in ('clusters', 'registers'):
+            for name, elem in (node.get(level) or {}).items():
+                layout.append((level, name, elem.get('offset'),
+                               elem.get('description'), self._dim(elem),
+                               self._layout(elem, size)))
+        # fields
+        for name, f in (node.get('fields') or {}).items():
+            evs = f.get('enumerated_values')
+            layout.append((name, f.get('bit_offset'), f.get('bit_width'),
+                           self._dim(f), self._enums(evs) if evs else None))
+        # equal layouts get the same id
+        layout_id = self._ids.setdefault(tuple(layout), len(self._ids))
+        self._layouts[key] = layout_id
+        return layout_id
+
+    # id of the named enumerated values of the field
+    def _enums(self, evs: dict):
+        key = (id(evs), None)
+        # already known?
+        layout_id = self._layouts.get(key)
+        if layout_id is not None:
+            return layout_id
+        # names and values
+        layout = tuple((name, ev.get('value')) for e in evs.values()
+                       for name, ev in (e.get('enumerated_value') or
+                                        {}).items() if ev.get('name'))
+        # equal ones get the same id
+        layout_id = self._ids.setdefault(layout, len(self._ids))
+        self._layouts[key] = layout_id
+        return layout_id
+
+    # yield the lines of the structure type for the node (and the ones of its
+    # clusters before it). Returns the name of the type and its size in
+    # bytes, the structure is padded up to 'pad_to' bytes. Types are produced
+    # once for every layout, nothing is produced for the empty nodes (and the
+    # name is None)
+    def _struct(self, node: dict, path: str, size: int, pad_to=0):
+        # already produced?
+        key = (self._layout(node, size), pad_to)
+        if key in self._structs:
+            return self._structs[key]
+        # register size within the node
+        size = self._reg_size(node, size)
+        # members: (offset, size, declaration, comment)
+        members = []
+        # clusters, their types go first
+        for name, c in (node.get('clusters') or {}).items():
+            dim = c.get('dim') or {}
+            array = "[%s]" in name
+            c_type, c_size = yield from self._struct(
+                c, f"{path}_{self._ident(name)}", size,
+                array and dim.get('increment') or 0)
+            # empty cluster
+            if c_type is None:
+                continue
+            offset = c.get('offset') or 0
+            comment = self._comment(c.get('description'))
+            # array of structures is only possible if these do not overlap
+            if array and dim.get('increment') == c_size:
+                members.append((offset, c_size * dim.get('dim'),
+                                f"{c_type} {self._ident(name)}"
+                                f"[{dim.get('dim')}];", comment))
+                continue
+            # separate instances otherwise
+            for i_name, delta in self._instances(name, c):
+                members.append((offset + delta, c_size,
+                                f"{c_type} {self._ident(i_name)};", comment))
+        # registers
+        for name, r in (node.get('registers') or {}).items():
+            r_size, r_type = self._type(self._reg_size(r, size))
+            dim = r.get('dim') or {}
+            offset = r.get('offset') or 0
+            comment = self._comment(r.get('description'))
+            # plain array if the registers follow each other
+            if "[%s]" in name and dim.get('increment') == r_size:
+                members.append((offset, r_size * dim.get('dim'),
+                                f"__IO {r_type} {self._ident(name)}"
+                                f"[{dim.get('dim')}];", comment))
+                continue
+            # separate instances otherwise
+            for i_name, delta in self._instances(name, r):
+                members.append((offset + delta, r_size,
+                                f"__IO {r_type} {self._ident(i_name)};",
+                                comment))
+        # nothing to put within the structure
+        if not members:
+            self._structs[key] = None, 0
+            return self._structs[key]
+        # lay the members out in the order of the offsets, the ones that
+        # start at the same offset become the union
+        members.sort(key=lambda m: (m[0], -m[1]))
+        yield "typedef struct {"
+        pos, reserved, i = 0, 0, 0
+        while i < len(members):
+            offset = members[i][0]
+            # all the members at this offset
+            j = i
+            while j < len(members) and members[j][0] == offset:
+                j += 1
+            group, i = members[i:j], j
+            # member that starts within the previous one cannot be expressed
+            if offset < pos:
+                for _, _, decl, _ in group:
+                    yield f"  /* 0x{offset:08X}: {decl} overlaps */"
+                continue
+            # fill the gap
+            if offset > pos:
+                yield f"  __I  uint8_t RESERVED{reserved}[{offset - pos}];"
+                reserved += 1
+            # single member or union of the alternate ones
+            indent = "  " if len(group) == 1 else "    "
+            if len(group) > 1:
+                yield "  union {"
+            for _, _, decl, comment in group:
+                yield f"{indent + decl:<34} /*!< 0x{offset:08X}: {comment} */"
+            if len(group) > 1:
+                yield "  };"
+            pos = offset + max(m[1] for m in group)
+        # pad up to the requested size
+        if pad_to > pos:
+            yield f"  __I  uint8_t RESERVED{reserved}[{pad_to - pos}];"
+            pos = pad_to
+        yield f"}} {path}_Type;"
+        yield ""
+        # return the type
+        self._structs[key] = f"{path}_Type", pos
+        return self._structs[key]
+
+    # yield the position, mask and enumerated values macros of all the
+    # fields within the node
+    def _macros(self, node: dict, path: str):
+        # clusters
+        for name, c in (node.get('clusters') or {}).items():
+            yield from self._macros(c, f"{path}_{self._ident(name)}")
+        # registers
+        for name, r in (node.get('registers') or {}).items():
+            r_path = f"{path}_{self._ident(name)}"
+            for f_name, f in (r.get('fields') or {}).items():
+                for i_name, delta in self._instances(f_name, f):
+                    f_path = f"{r_path}_{self._ident(i_name)}"
+                    offset = (f.get('bit_offset') or 0) + delta
+                    mask = (1 << (f.get('bit_width') or 0)) - 1
+                    yield f"#define {f_path}_Pos {offset}U"
+                    yield f"#define {f_path}_Msk " \
+                          f"({self._literal(mask)} << {f_path}_Pos)"
+                    # enumerated values, the anonymous ones are skipped
+                    done = set()
+                    for evs in (f.get('enumerated_values') or {}).values():
+                        for ev_name, ev in (evs.get('enumerated_value') or
+                                            {}).items():
+                            if not ev.get('name') or ev.get('value') is None \
+                                    or ev_name in done:
+                                continue
+                            done.add(ev_name)
+                            yield f"#define {f_path}_{self._ident(ev_name)}" \
+                                  f" {self._literal(ev['value'])}"
+
+    # yield all the lines of the header
+    def _lines(self):
+        device = self.device
+        name = self._ident(device.get('name') or "DEVICE")
+        guard = f"{name.upper()}_H"
+        # preamble
+        yield f"/* {name}: {self._comment(device.get('description'))} */"
+        yield f"#ifndef {guard}"
+        yield f"#define {guard}"
+        yield ""
+        yield "#include <stdint.h>"
+        yield ""
+        yield "#ifdef __cplusplus"
+        yield 'extern "C" {'
+        yield "#endif"
+        yield ""
+        # access qualifiers (unless these come from the core header)
+        for qualifier, definition in (("__I", "volatile const"),
+                                      ("__O", "volatile"),
+                                      ("__IO", "volatile")):
+            yield f"#ifndef {qualifier}"
+            yield f"#define {qualifier} {definition}"
+            yield "#endif"
+        yield ""
+        # processor configuration
+        cpu = device.get('cpu')
+        if cpu:
+            yield "/* processor and core peripherals */"
+            for macro, key in (("__MPU_PRESENT", 'mpu_present'),
+                               ("__FPU_PRESENT", 'fpu_present'),
+                               ("__NVIC_PRIO_BITS", 'nvic_priority_bits'),
+                               ("__Vendor_SysTickConfig", 'vendor_systick')):
+                if cpu.get(key) is not None:
+                    yield f"#define {macro} {int(cpu[key])}"
+            yield ""
+        peripherals = device.get('peripherals') or {}
+        # interrupt numbers, every one once, in the order of the values
+        interrupts = dict()
+        for p in peripherals.values():
+            for i_name, i in (p.get('interrupts') or {}).items():
+                interrupts.setdefault(i_name, i)
+        if interrupts:
+            yield "/* interrupt numbers */"
+            yield "typedef enum {"
+            for i_name, i in sorted(interrupts.items(),
+                                    key=lambda e: e[1].get('value') or 0):
+                yield f"  {self._ident(i_name) + '_IRQn':<32} = " \
+                      f"{i.get('value') or 0}, " \
+                      f"/*!< {self._comment(i.get('description'))} */"
+            yield "} IRQn_Type;"
+            yield ""
+        # structure types and field macros, once per layout
+        types, used, p_types = dict(), set(), []
+        for p_name, p in peripherals.items():
+            layout_id = self._layout(p, self._size)
+            # new layout
+            if layout_id not in types:
+                # preferred name of the type, unless taken already
+                prefix = self._ident(p.get('header_struct_name') or p_name)
+                if prefix in used:
+                    prefix = self._ident(p_name)
+                while prefix in used:
+                    prefix += "_"
+                used.add(prefix)
+                yield f"/* {prefix}: {self._comment(p.get('description'))} */"
+                types[layout_id], _ = yield from self._struct(p, prefix,
+                                                              self._size)
+                yield from self._macros(p, prefix)
+                yield ""
+            p_types.append(types[layout_id])
+        # base addresses and instances of all the peripherals
+        if peripherals:
+            yield "/* base addresses */"
+            for p_name, p in peripherals.items():
+                base = p.get('base_address') or 0
+                for i_name, delta in self._instances(p_name, p):
+                    yield f"#define {self._ident(i_name) + '_BASE':<32} " \
+                          f"{self._literal(base + delta)}"
+            yield ""
+            yield "/* peripheral instances */"
+            for (p_name, p), p_type in zip(peripherals.items(), p_types):
+                # no registers at all, no type
+                if p_type is None:
+                    continue
+                for i_name, _ in self._instances(p_name, p):
+                    i_name = self._ident(i_name)
+                    yield f"#define {i_name:<32} " \
+                          f"(({p_type} *) {i_name}_BASE)"
+            yield ""
+        # closing
+        yield "#ifdef __cplusplus"
+        yield "}"
+        yield "#endif"
+        yield ""
+        yield f"#endif /* {guard} */"
+
+    # yield the header text in chunks
+    def generate(self):
+        buffer, buffered = [], 0
+        for line in self._lines():
+            buffer.append(line)
+            buffered += len(line) + 1
+            # time to give it away?
+            if buffered >= self.buffer_size:
+                buffer.append("")
+                yield "\n".join(buffer)
+                buffer, buffered = [], 0
+        # whatever is left
+        buffer.append("")
+        yield "\n".join(buffer)
+
+    # write the header to the (text) file object. Time spent is reported to
+    # 'stats' (see SVDStats) unless it is None
+    def write(self, fileobj, stats=None):
+        with SVDStats.timer(stats, 'header_write'):
+            for chunk in self.generate():
+                fileobj.write(chunk)
@@ -0,0 +1,171 @@
+import copy
+import hashlib
+import xml.etree.ElementTree as ET
+from SVDReader import SVDReader
+from SVDModel import SVDModel
+
+
+# incremental processing of the svd documents that change a little between the
+# runs (e.g. while editing the file). Every peripheral sub-tree is hashed and
+# only the peripherals whose hashes have changed since the previous run are
+# parsed again. Resolution is then redone only for the changed peripherals
+# and the ones that derive (directly or not) from them, the rest of the
+# resolved peripherals is taken from the previous run. Returned devices share
+# the unchanged peripherals with each other, do not modify them in place.
+class SVDIncremental:
+    # set up the processing options, these are the same as in
+    # 'SVDReader.process()'
+    def __init__(self, resolve_derivations=True, resolve_inheritance=True,
+                 resolve_arrays_lists=True, lazy_arrays_lists=False,
+                 model='dict'):
+        self.resolve_derivations = resolve_derivations
+        self.resolve_inheritance = resolve_inheritance
+        self.resolve_arrays_lists = resolve_arrays_lists
+        self.lazy_arrays_lists = lazy_arrays_lists
+        self.model = model
+        # hash of the device element without the peripherals
+        self._header_hash = None
+        # name -> hash of the peripheral element
+        self._hashes = dict()
+        # name -> parsed (not resolved) peripheral
+        self._raw = dict()
+        # name -> names of the peripherals it depends on (derives from)
+        self._deps = dict()
+        # name -> list of (name, resolved peripheral) tuples (more than one
+        # when the peripheral is a list)
+        self._resolved = dict()
+        # peripherals converted to the object model during the last run
+        self._objects = dict()
+        # names of the peripherals parsed and resolved during the last run
+        self.parsed, self.resolved = set(), set()
+
+    # hash of the element (and everything within it). Elements are visited in
+    # preorder and the number of sub-elements of every one of them is hashed
+    # as well, which is enough to tell the structures apart. Tails are not
+    # taken into account as these only hold the whitespaces between the
+    # elements.
+    @staticmethod
+    def _hash(elem: ET.Element):
+        return hashlib.sha256("\0".join(
+            repr((e.tag, e.text, e.attrib, len(e)))
+            for e in elem.iter()).encode()).digest()
+
+    # names of the peripherals that the derivations within the peripheral
+    # refer to. Paths with as many parts as the depth of the element that
+    # holds these start at the peripheral level (see 'SVDIndex.locate()'),
+    # shorter ones stay within the peripheral itself.
+    @staticmethod
+    def _dependencies(node: dict, depth=1, deps=None):
+        # start with an empty set
+        if deps is None:
+            deps = set()
+        # got the derivation?
+        path = node.get('derived_from')
+        if path:
+            names = path.split('.')
+            if len(names) >= depth:
+                deps.add(names[0])
+        # go in depth
+        for level_name, collection in SVDReader._next_level(node):
+            for elem in collection.values():
+                SVDIncremental._dependencies(elem, depth + 1, deps)
+        # return the gathered names
+        return deps
+
+    # process the device, reusing whatever is possible from the previous run
+    def process(self, root: ET.Element):
+        # device element without the peripherals
+        header = ET.Element(root.tag, root.attrib)
+        header.extend(e for e in root if e.tag != 'peripherals')
+        header_hash = self._hash(header)
+        # header has changed (or this is the first run): everything that was
+        # inherited from the device is stale
+        if header_hash != self._header_hash:
+            self._resolved = dict()
+            self._header_hash = header_hash
+        # parse the header
+        device = SVDReader._process_device(header)
+        # peripherals as they are now
+        hashes, changed = dict(), set()
+        for elem in root.find('peripherals') or []:
+            digest = self._hash(elem)
+            # known peripheral that did not change (name is stripped the
+            # same way as when parsing)
+            name = (elem.findtext('name') or '').strip()
+            if self._hashes.get(name) == digest and name in self._raw:
+                hashes[name] = digest
+                continue
+            # parse it
+            name, peripheral = SVDReader._process_peripheral(elem)
+            hashes[name] = digest
+            self._raw[name] = peripheral
+            self._deps[name] = self._dependencies(peripheral)
+            changed.add(name)
+        # forget the peripherals that are gone
+        removed = set(self._hashes) - set(hashes)
+        for name in removed:
+            for d in (self._raw, self._deps, self._resolved):
+                d.pop(name, None)
+        self._hashes = hashes
+        # peripherals that need to be resolved: changed ones, ones that were
+        # not resolved yet and the ones that depend on any of these
+        dirty = changed | (set(hashes) - set(self._resolved))
+        stale = dirty | removed
+        # propagate until nothing changes
+        while True:
+            more = {n for n in hashes if n not in dirty and
+                    self._deps[n] & stale}
+            if not more:
+                break
+            dirty |= more
+            stale |= more
+        # peripherals required for the resolution: dirty ones along with all
+        # that these depend on
+        required, todo = set(), list(dirty)
+        while todo:
+            name = todo.pop()
+            if name in required or name not in self._raw:
+                continue
+            required.add(name)
+            todo.extend(self._deps[name])
+        # resolve within a device that only holds the required peripherals
+        # (copies, since resolution of derivations works in place)
+        if dirty:
+            partial = {**device, 'peripherals': {
+                n: copy.deepcopy(self._raw[n]) for n in hashes
+                if n in required}}
+            partial = SVDReader._resolve_dict(partial,
+                                              self.resolve_derivations,
+                                              self.resolve_inheritance, False)
+            # create the arrays and lists for every peripheral
+            for name in dirty:
+                peripheral = partial['peripherals'][name]
+                if self.resolve_arrays_lists and not self.lazy_arrays_lists:
+                    self._resolved[name] = list(
+                        SVDReader._resolve_arrays_lists(
+                            peripheral, 'peripherals').items())
+                else:
+                    self._resolved[name] = [(name, peripheral)]
+            # the device itself may have been changed by the resolution
+            device = {**partial, 'peripherals': dict()}
+        # otherwise the header still needs the inheritance resolved
+        elif self.resolve_inheritance:
+            device = SVDReader._resolve_implicit_inheritance(device)
+        # put the device together in the document order
+        for name in hashes:
+            device['peripherals'].update(self._resolved[name])
+        # remember what was done
+        self.parsed, self.resolved = changed, dirty
+        # object model: unchanged peripherals are the very same nodes as in
+        # the previous run so their converted counterparts can be reused
+        if self.model == 'objects' and not (self.resolve_arrays_lists and
+                                            self.lazy_arrays_lists):
+            memo = dict(self._objects)
+            objects = SVDModel._convert(device, 'device', memo)
+            self._objects = {id(p): memo[id(p)]
+                             for p in device['peripherals'].values()}
+            return objects
+        # present the device as requested
+        return SVDReader._present(
+            device, self.resolve_arrays_lists and self.lazy_arrays_lists,
+            self.model)
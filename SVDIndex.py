@@ -0,0 +1,143 @@
+# class that indexes all the elements of the device dictionary (as produced by
+# the svd parser) by their fully qualified names, e.g. 'PERIPH.CLUSTER.REG'.
+# The index is built once and then every lookup is a single dictionary access.
+class SVDIndex:
+    # names of the collections that form the levels of hierarchy, in the order
+    # of precedence (same as in SVDReader: clusters come before registers)
+    _collections = ('peripherals', 'clusters', 'registers', 'fields',
+                    'enumerated_values', 'enumerated_value')
+
+    # build the index for the given device dictionary
+    def __init__(self, device: dict):
+        # maps tuples of names to the nodes
+        self._index = dict()
+        # paths of the nodes whose sub-trees may have been replaced (see
+        # 'invalidate()')
+        self._stale = set()
+        # walk the whole tree
+        self._add(device, ())
+
+    # add all the elements of the node's collections to the index, 'path' is
+    # the tuple of names that leads to the node
+    def _add(self, node: dict, path: tuple):
+        # process every collection that is present within the node
+        for collection_name in self._collections:
+            # get the collection
+            collection = node.get(collection_name)
+            # not present
+            if not collection:
+                continue
+            # index all the elements
+            for name, elem in collection.items():
+                # build the path
+                elem_path = path + (name, )
+                # first one wins (clusters take precedence over registers)
+                if elem_path not in self._index:
+                    self._index[elem_path] = elem
+                    # go in depth
+                    self._add(elem, elem_path)
+
+    # follow the names from given node down the hierarchy. This is used for the
+    # elements that were not present at the time the index was built (e.g.
+    # ones that were inherited during derivation)
+    def _walk(self, node: dict, names: tuple):
+        # go down one level at a time
+        for name in names:
+            # look for the name in all the collections
+            found = None
+            for collection_name in self._collections:
+                found = found or (node.get(collection_name) or {}).get(name)
+            # nothing was found
+            if found is None:
+                return None
+            # go to the next level
+            node = found
+        # return the node that was found
+        return node
+
+    # return the tuple of names (key) that the path points to along with the
+    # node itself. Relative paths (with fewer elements than the full path) are
+    # resolved within the 'scope' which is the path (tuple of names or dotted
+    # string) of the element that contains the referencing element: path with
+    # a single element refers to its sibling, path with two elements starts
+    # one level up, and so on. Without the scope the path is treated as a
+    # fully qualified one. None is returned instead of the node when the path
+    # is not reachable.
+    def locate(self, path: str, scope=None):
+        # split path using periods
+        names = tuple(path.split('.'))
+        # no scope means the absolute path
+        if scope is None:
+            scope = names[:-1]
+        # scopes may be given as strings as well
+        elif isinstance(scope, str):
+            scope = tuple(scope.split('.')) if scope else ()
+        # if path is more parts that we have levels then there is something
+        # fishy about it!
+        if len(names) > len(scope) + 1:
+            raise Exception(f"Path {path} levels exceed the number of "
+                            f"hierarchy levels of scope {'.'.join(scope)}")
+        # build the fully qualified key
+        key = scope[:len(scope) + 1 - len(names)] + names
+        # element lies below the node that was modified: walk from the
+        # outermost such node since whatever was indexed below it may be gone
+        if self._stale:
+            for depth in range(1, len(key)):
+                ancestor = self._index.get(key[:depth])
+                if key[:depth] in self._stale and ancestor is not None:
+                    return key, self._walk(ancestor, key[depth:])
+        # simplest case: the element is indexed
+        node = self._index.get(key)
+        # not indexed, start from the closest indexed ancestor. Top level
+        # elements are always indexed so there is no need to go that far
+        if node is None:
+            # look for the ancestor
+            depth = len(key) - 1
+            while depth and key[:depth] not in self._index:
+                depth -= 1
+            # walk the rest of the path
+            if depth:
+                node = self._walk(self._index[key[:depth]], key[depth:])
+            # remember the result
+            if node is not None:
+                self._index[key] = node
+        # return the key along with the node
+        return key, node
+
+    # mark the sub-tree of the node under given path (tuple of names) as
+    # modified: the node itself is still the same object but its children
+    # may have been replaced (e.g. by the copy-on-write merge during the
+    # derivation), so the elements below it are looked up by walking from
+    # the node from now on
+    def invalidate(self, path: tuple):
+        self._stale.add(tuple(path))
+
+    # return the node that the path points to (see 'locate()')
+    def resolve(self, path: str, scope=None):
+        # look for the node
+        _, node = self.locate(path, scope)
+        # oops! nothing was found!
+        if node is None:
+            raise Exception(f"Path {path} is unreachable within the device")
+        # return the node
+        return node
+
+    # return the node under the fully qualified path or default if the path
+    # is not reachable
+    def get(self, path: str, default=None):
+        # look for the node
+        _, node = self.locate(path)
+        # return whatever was found
+        return default if node is None else node
+
+    # check if fully qualified path is present within the index
+    def __contains__(self, path: str):
+        return self.get(path) is not None
+
+    # number of indexed elements
+    def __len__(self):
+        return len(self._index)
+
+    # iterate over all the fully qualified paths
+    def __iter__(self):
+        return ('.'.join(key) for key in self._index)
@@ -0,0 +1,190 @@
+import copy
+from collections.abc import Mapping
+import xml.etree.ElementTree as ET
+from SVDReader import SVDReader
+from SVDIncremental import SVDIncremental
+
+
+# read-only view of the device in which the peripherals are parsed on first
+# access. The document is only scanned once for the byte ranges of the
+# peripheral elements (and their names), the device element without the
+# peripherals is parsed right away. Accessing the peripheral parses it along
+# with the peripherals it derives from (following the 'derivedFrom' chains)
+# and resolves all of these within the partial device, the results are kept
+# so every peripheral is parsed and resolved at most once. The time to the
+# first lookup depends on what is used, not on the size of the document.
+# Lists of peripherals (e.g. 'UART%s') are resolved up-front since the names
+# of their elements are needed for the keys. Produces the same dictionaries
+# as 'SVDReader.process()' with the arrays and lists resolved eagerly.
+class LazyDevice(Mapping):
+    # scan the svd document: path, file object or the contents as bytes.
+    # Options are the same as in 'SVDReader.process()'
+    def __init__(self, source, resolve_derivations=True,
+                 resolve_inheritance=True, resolve_arrays_lists=True):
+        self.resolve_derivations = resolve_derivations
+        self.resolve_inheritance = resolve_inheritance
+        self.resolve_arrays_lists = resolve_arrays_lists
+        # get the contents
+        if isinstance(source, (bytes, bytearray)):
+            data = bytes(source)
+        elif hasattr(source, 'read'):
+            data = source.read()
+        else:
+            with open(source, 'rb') as f:
+                data = f.read()
+        self._data = data
+        # find the peripherals (see 'SVDReader._scan_peripherals()'), every
+        # one is parsed with the declaration of the document so that the
+        # encoding stays the same
+        self._prolog, peripherals, contents = \
+            SVDReader._scan_peripherals(data)
+        # peripheral name -> (start, end) of its element
+        self._ranges = {name: (start, end) for name, start, end in peripherals}
+        # parse the device without the peripherals
+        if contents is not None:
+            data = data[:contents[0]] + data[contents[1]:]
+        self._device = SVDReader._process_device(ET.fromstring(data))
+        # name -> parsed (not resolved) peripheral
+        self._raw = dict()
+        # name -> names of the peripherals it derives from
+        self._deps = dict()
+        # name -> dictionary of the resolved peripherals (more than one when
+        # the peripheral is a list)
+        self._resolved = dict()
+        # key -> name of the peripheral that produces it, in the document
+        # order (these only differ for the elements of the lists)
+        self._keys = dict()
+        for name in self._ranges:
+            if self.resolve_arrays_lists and "%s" in name and \
+                    "[%s]" not in name:
+                self._resolve([name])
+                self._keys.update((k, name) for k in self._resolved[name])
+            else:
+                self._keys[name] = name
+        # view of the peripherals
+        self._peripherals = LazyPeripherals(self)
+
+    # names of the peripherals that were parsed and resolved so far
+    @property
+    def parsed(self):
+        return set(self._raw)
+
+    @property
+    def resolved(self):
+        return set(self._resolved)
+
+    # parse the peripheral (once)
+    def _parse(self, name: str):
+        peripheral = self._raw.get(name)
+        if peripheral is None:
+            start, end = self._ranges[name]
+            p_name, peripheral = SVDReader._process_peripheral(
+                ET.fromstring(self._prolog + self._data[start:end]))
+            # scanned name has to be the same as the parsed one
+            if p_name != name:
+                raise Exception(f"Peripheral {name} was parsed as {p_name}")
+            self._raw[name] = peripheral
+            self._deps[name] = SVDIncremental._dependencies(peripheral)
+        return peripheral
+
+    # resolve the peripherals (and everything that they derive from) within
+    # the partial device
+    def _resolve(self, names):
+        # peripherals required for the resolution: the ones requested along
+        # with all that these depend on
+        required, todo = set(), list(names)
+        while todo:
+            name = todo.pop()
+            if name in required:
+                continue
+            required.add(name)
+            self._parse(name)
+            # unknown peripherals are reported by the resolution
+            if self.resolve_derivations:
+                todo.extend(n for n in self._deps[name] if n in self._ranges)
+        # resolve within a device that only holds the required peripherals
+        # (copies, since resolution of derivations works in place) in the
+        # document order
+        partial = {**self._device, 'peripherals': {
+            n: copy.deepcopy(self._raw[n]) for n in self._ranges
+            if n in required}}
+        partial = SVDReader._resolve_dict(partial, self.resolve_derivations,
+                                          self.resolve_inheritance, False)
+        # create the arrays and lists, peripherals that were resolved
+        # before stay as they were
+        for name in required:
+            if name in self._resolved:
+                continue
+            peripheral = partial['peripherals'][name]
+            self._resolved[name] = SVDReader._resolve_arrays_lists(
+                peripheral, 'peripherals') if self.resolve_arrays_lists \
+                else {name: peripheral}
+
+    # get the resolved peripheral by its key
+    def _peripheral(self, key: str):
+        name = self._keys[key]
+        if name not in self._resolved:
+            self._resolve([name])
+        return self._resolved[name][key]
+
+    # get the value of the device, peripherals are the lazy view
+    def __getitem__(self, key):
+        if key == 'peripherals':
+            return self._peripherals
+        return self._device[key]
+
+    # iterate over the keys of the device
+    def __iter__(self):
+        return iter(self._device)
+
+    # number of keys
+    def __len__(self):
+        return len(self._device)
+
+    # produce a plain dictionary, all the peripherals that are still left
+    # are resolved at once
+    def materialize(self) -> dict:
+        left = [n for n in self._ranges if n not in self._resolved]
+        if left:
+            self._resolve(left)
+        return {**self._device, 'peripherals': {
+            key: self._resolved[name][key]
+            for key, name in self._keys.items()}}
+
+    # show what we are
+    def __repr__(self):
+        return f"{type(self).__name__}({self._device.get('name')!r})"
+
+
+# read-only view of the peripherals of the lazy device: keys are known
+# up-front, the peripherals are parsed and resolved on access
+class LazyPeripherals(Mapping):
+    __slots__ = ('_device', )
+
+    # create the view of the 'device' peripherals
+    def __init__(self, device: LazyDevice):
+        self._device = device
+
+    # get the peripheral by its name
+    def __getitem__(self, key):
+        return self._device._peripheral(key)
+
+    # check the name without parsing anything
+    def __contains__(self, key):
+        return key in self._device._keys
+
+    # iterate over the names in the document order
+    def __iter__(self):
+        return iter(self._device._keys)
+
+    # number of the peripherals
+    def __len__(self):
+        return len(self._device._keys)
+
+    # produce a plain dictionary with all the peripherals
+    def materialize(self) -> dict:
+        return self._device.materialize()['peripherals']
+
+    # show what we are
+    def __repr__(self):
+        return f"{type(self).__name__}({list(self)!r})"
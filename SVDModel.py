@@ -0,0 +1,172 @@
+from collections.abc import Mapping
+
+
+# base class for the compact representation of the device elements. Every
+# element stores its values in slots instead of a per-instance dictionary and
+# yet it still behaves like a (read-only) mapping so the code that walks the
+# dictionaries produced by the svd parser keeps working. Attribute access is
+# supported as well: register.offset == register['offset']
+class SVDElement(Mapping):
+    # keys that do not have a slot of their own end up in '_extra'
+    __slots__ = ('_extra', )
+
+    # names of the slots that map to keys, filled in by subclasses
+    _keys = ()
+
+    # set the value of a key
+    def _set(self, key, value):
+        # known key
+        if key in self._keys:
+            setattr(self, key, value)
+        # something we did not expect
+        else:
+            if getattr(self, '_extra', None) is None:
+                self._extra = dict()
+            self._extra[key] = value
+
+    # get the value of a key
+    def __getitem__(self, key):
+        # known key
+        if key in self._keys:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key)
+        # one of the extra keys
+        extra = getattr(self, '_extra', None)
+        if extra is not None and key in extra:
+            return extra[key]
+        # nothing found
+        raise KeyError(key)
+
+    # iterate over the keys that are set
+    def __iter__(self):
+        # keys with slots
+        for key in self._keys:
+            if hasattr(self, key):
+                yield key
+        # extra keys
+        yield from getattr(self, '_extra', None) or ()
+
+    # number of keys that are set
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    # produce the plain dictionary
+    def materialize(self) -> dict:
+        return {k: SVDModel.materialize(v) for k, v in self.items()}
+
+    # show what we are
+    def __repr__(self):
+        return f"{type(self).__name__}({self.get('name')!r})"
+
+
+# device
+class Device(SVDElement):
+    _keys = ('name', 'description', 'version', 'width', 'address_unit_bits',
+             'cpu', 'reg_properties', 'peripherals', 'fully_defined')
+    __slots__ = _keys
+
+
+# peripheral
+class Peripheral(SVDElement):
+    _keys = ('name', 'group_name', 'description', 'base_address',
+             'alternate_to', 'header_struct_name', 'reg_properties', 'dim',
+             'derived_from', 'fully_defined', 'address_block', 'interrupts',
+             'registers', 'clusters', 'is_array')
+    __slots__ = _keys
+
+
+# cluster of registers (may contain nested clusters)
+class Cluster(SVDElement):
+    _keys = ('name', 'description', 'offset', 'alternate_to',
+             'header_struct_name', 'reg_properties', 'dim', 'derived_from',
+             'fully_defined', 'clusters', 'registers', 'is_array')
+    __slots__ = _keys
+
+
+# register
+class Register(SVDElement):
+    _keys = ('name', 'description', 'offset', 'alternate_to',
+             'reg_properties', 'dim', 'derived_from', 'fully_defined',
+             'fields', 'is_array')
+    __slots__ = _keys
+
+
+# bit-field of the register
+class Field(SVDElement):
+    _keys = ('name', 'description', 'reg_properties', 'dim', 'bit_offset',
+             'bit_width', 'derived_from', 'fully_defined',
+             'enumerated_values', 'is_array')
+    __slots__ = _keys
+
+
+# set of enumerated values of the field
+class EnumeratedValues(SVDElement):
+    _keys = ('name', 'header_name', 'description', 'derived_from',
+             'fully_defined', 'enumerated_value')
+    __slots__ = _keys
+
+
+# single enumerated value
+class EnumeratedValue(SVDElement):
+    _keys = ('name', 'description', 'header_name', 'value', 'is_default',
+             'fully_defined')
+    __slots__ = _keys
+
+
+# conversion between the dictionaries produced by the svd parser and the
+# compact object model
+class SVDModel:
+    # classes used on the levels of the hierarchy
+    _classes = {
+        'device': Device,
+        'peripherals': Peripheral,
+        'clusters': Cluster,
+        'registers': Register,
+        'fields': Field,
+        'enumerated_values': EnumeratedValues,
+        'enumerated_value': EnumeratedValue,
+    }
+
+    # convert a single node that belongs to given level. 'memo' keeps the
+    # already converted nodes (along with the sources so that their ids stay
+    # valid) so that sub-trees shared within the dictionary are shared
+    # within the object model as well.
+    @staticmethod
+    def _convert(node: Mapping, level: str, memo: dict):
+        # already converted?
+        if id(node) in memo:
+            return memo[id(node)][1]
+        # create the element
+        element = SVDModel._classes[level]()
+        # copy all the values
+        for k, v in node.items():
+            # collections of lower level elements
+            if k in SVDModel._classes:
+                v = {name: SVDModel._convert(e, k, memo)
+                     for name, e in v.items()}
+            # store the value
+            element._set(k, v)
+        # remember the result
+        memo[id(node)] = (node, element)
+        # return the element
+        return element
+
+    # convert the device dictionary (or any other mapping with the same
+    # structure) to the object model
+    @staticmethod
+    def from_dict(device: Mapping) -> Device:
+        return SVDModel._convert(device, 'device', dict())
+
+    # convert the value back to plain dictionaries
+    @staticmethod
+    def materialize(value):
+        # elements (and other views)
+        if hasattr(value, 'materialize'):
+            return value.materialize()
+        # collections of elements
+        if isinstance(value, dict):
+            return {k: SVDModel.materialize(v) for k, v in value.items()}
+        # plain value
+        return value
@@ -0,0 +1,219 @@
+import re
+import fnmatch
+
+
+# query engine over the device dictionary (as produced by the svd parser).
+# The names are indexed once: distinct names of every level of hierarchy
+# (peripherals, registers, ...) are kept within the name tables and all of
+# these within the prefix trie. Queries are paths of patterns, one per level
+# of hierarchy, e.g. 'TIM*.CR1.CEN'. Names matching every pattern are looked
+# up within the trie (using the literal prefix of the pattern) and
+# remembered, so the query itself only visits the elements that match the
+# patterns, going down the collections of the device. Pattern '**' matches
+# any number of levels, e.g. 'TIM*.**.CEN' finds the field within clusters as
+# well (this one has to visit everything below the matching peripherals).
+# Results are lazy iterators of (dotted path, node) tuples in the document
+# order.
+class SVDQuery:
+    # names of the collections that form the levels of hierarchy (same as in
+    # SVDIndex)
+    _collections = ('peripherals', 'clusters', 'registers', 'fields',
+                    'enumerated_values', 'enumerated_value')
+    # number of the patterns whose matching names are remembered
+    _cache_size = 1024
+    # characters that start the wildcards within the glob patterns
+    _wildcards = re.compile(r"[*?\[]")
+
+    # build the index for the given device dictionary
+    def __init__(self, device: dict):
+        self.device = device
+        # level name -> set of names
+        self._tables = {level: set() for level in self._collections}
+        # prefix trie of all the names: character -> sub-trie, None -> name
+        self._trie = dict()
+        # (kind, pattern) -> set of the matching names
+        self._matches = dict()
+        # gather the names, shared sub-trees are visited once
+        self._add(device, set())
+        # build the trie
+        for name in set().union(*self._tables.values()):
+            self._insert(name)
+
+    # add the names of all the elements of the node's collections (and
+    # everything below) to the name tables, 'seen' holds the ids of the
+    # visited nodes
+    def _add(self, node: dict, seen: set):
+        for level in self._collections:
+            collection = node.get(level)
+            if not collection:
+                continue
+            self._tables[level].update(collection)
+            # go in depth
+            for elem in collection.values():
+                if id(elem) not in seen:
+                    seen.add(id(elem))
+                    self._add(elem, seen)
+
+    # put the name into the prefix trie
+    def _insert(self, name: str):
+        trie = self._trie
+        for c in name:
+            trie = trie.setdefault(c, {})
+        trie[None] = name
+
+    # yield all the names that start with the prefix
+    def _prefixed(self, prefix: str):
+        # locate the sub-trie
+        trie = self._trie
+        for c in prefix:
+            trie = trie.get(c)
+            if trie is None:
+                return
+        # walk it
+        stack = [trie]
+        while stack:
+            trie = stack.pop()
+            for c, sub in trie.items():
+                if c is None:
+                    yield sub
+                else:
+                    stack.append(sub)
+
+    # set of the names that match the pattern: 'glob' one or 'regex' one (that
+    # needs to match the whole name). None stands for any number of levels
+    def _names(self, kind: str, pattern: str):
+        # any depth
+        if pattern == "**":
+            return None
+        # already known?
+        key = (kind, pattern)
+        names = self._matches.get(key)
+        if names is not None:
+            return names
+        # plain name: nothing to look for
+        if kind == 'glob' and not self._wildcards.search(pattern):
+            names = {pattern}
+        else:
+            # glob patterns are translated to regular expressions, literal
+            # prefix limits the names that are tested
+            if kind == 'glob':
+                prefix = pattern[:self._wildcards.search(pattern).start()]
+                regexp = re.compile(fnmatch.translate(pattern))
+            else:
+                prefix, regexp = "", re.compile(pattern)
+            names = {n for n in self._prefixed(prefix) if regexp.fullmatch(n)}
+        # forget the oldest one when full
+        if len(self._matches) >= self._cache_size:
+            del self._matches[next(iter(self._matches))]
+        self._matches[key] = names
+        return names
+
+    # yield (name, level, element) of all the children of the node in the
+    # document order, first one wins (clusters take precedence over
+    # registers)
+    def _children(self, node: dict):
+        names = set()
+        for level in self._collections:
+            for name, elem in (node.get(level) or {}).items():
+                if name not in names:
+                    names.add(name)
+                    yield name, level, elem
+
+    # yield (path, level, node) of the elements below the node (that is
+    # under 'path') that match the name sets starting with the i-th one.
+    # 'depths' holds the index of the deepest level worth going into for
+    # every '**'
+    def _walk(self, names: list, depths: list, i: int, path: tuple, level,
+              node: dict):
+        # all the levels matched
+        if i == len(names):
+            yield path, level, node
+            return
+        # any number of levels
+        if names[i] is None:
+            last = i + 1 == len(names)
+            # zero levels
+            if not last:
+                yield from self._walk(names, depths, i + 1, path, level, node)
+            # one level more
+            for c_name, c_level, child in self._children(node):
+                c_path = path + (c_name, )
+                if last:
+                    yield c_path, c_level, child
+                # elements below cannot match
+                if self._collections.index(c_level) >= depths[i]:
+                    continue
+                yield from self._walk(names, depths, i, c_path, c_level,
+                                      child)
+            return
+        # single name is looked up directly
+        if len(names[i]) == 1:
+            name = next(iter(names[i]))
+            for c_level in self._collections:
+                child = (node.get(c_level) or {}).get(name)
+                if child is not None:
+                    yield from self._walk(names, depths, i + 1,
+                                          path + (name, ), c_level, child)
+                    break
+            return
+        # filter the children otherwise
+        for c_name, c_level, child in self._children(node):
+            if c_name in names[i]:
+                yield from self._walk(names, depths, i + 1,
+                                      path + (c_name, ), c_level, child)
+
+    # run the query: 'patterns' is the list of patterns (one per level) of
+    # given kind
+    def _query(self, kind: str, patterns, level=None):
+        names = [self._names(kind, p) for p in patterns]
+        # some level does not match anything
+        if any(n is not None and not n for n in names):
+            return
+        # '**' only needs to go as deep as the deepest level that holds any
+        # of the names that follow it (clusters may hold clusters)
+        depths = [None] * len(names)
+        for i, n in enumerate(names):
+            if n is None:
+                follow = next((m for m in names[i + 1:] if m is not None),
+                              None)
+                depths[i] = len(self._collections) if follow is None else \
+                    max((d + (lvl == 'clusters')
+                         for d, lvl in enumerate(self._collections)
+                         if not follow.isdisjoint(self._tables[lvl])),
+                        default=0)
+        # the same element may be reached more than once with many '**'
+        seen = set() if names.count(None) > 1 else None
+        for path, elem_level, node in self._walk(names, depths, 0, (), None,
+                                                 self.device):
+            # not the top level
+            if not path:
+                continue
+            # wrong level of hierarchy
+            if level is not None and elem_level != level:
+                continue
+            # already reported
+            if seen is not None:
+                if path in seen:
+                    continue
+                seen.add(path)
+            yield '.'.join(path), node
+
+    # yield (path, node) of all the elements that match the dotted path of
+    # glob patterns, e.g. 'TIM*.CR?.*'. 'level' limits the results to the
+    # given level of hierarchy (e.g. 'registers')
+    def glob(self, pattern: str, level=None):
+        return self._query('glob', pattern.split('.'), level)
+
+    # yield (path, node) of all the elements whose names fully match the
+    # regular expressions, one per level, e.g. (r'TIM\d+', 'CR1', '.*'). '**'
+    # matches any number of levels here as well
+    def regex(self, patterns, level=None):
+        return self._query('regex', patterns, level)
+
+    # all the distinct names on given level of hierarchy
+    def names(self, level: str):
+        return frozenset(self._tables[level])
+
+    # number of the distinct names
+    def __len__(self):
+        return len(set().union(*self._tables.values()))
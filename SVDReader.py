@@ -1,8 +1,15 @@
 import xml.etree.ElementTree as ET
 import re
-import copy
-import random
-import string
+import fnmatch
+import marshal
+import hashlib
+import functools
+from xml.sax.saxutils import unescape
+from SVDIndex import SVDIndex
+from SVDModel import SVDModel
+from SVDCache import SVDCache
+from SVDStats import SVDStats
+from SVDUtils import SVDUtils
 
 
 # class for parsing SVD files
@@ -31,20 +38,45 @@ class SVDReader:
         return [(h_name, node.get(h_name))
                 for h_name in SVDReader._next_level_name(node)]
 
+    # number of the distinct literals remembered by every memoized converter.
+    # Svd documents repeat a handful of literals (sizes, reset values, bit
+    # ranges, ...) over and over again, so the converted values are looked up
+    # instead of being converted every time. Only the converters that return
+    # immutable values are memoized
+    _converter_cache_size = 4096
+
+    # precompiled patterns used by the converters
+    _enumerated_value_pattern = re.compile(
+        r"[+]?(?:(?P<hex>0[xX][0-9a-fA-F]+)|(?P<bin>(?:#|0b)[01xX]+)|"
+        r"(?P<dec>[0-9]+))")
+    _dim_index_numbers_pattern = re.compile(
+        r"(?P<start>[0-9]+)-(?P<end>[0-9]+)")
+    _dim_index_letters_pattern = re.compile(r"(?P<start>[A-Z])-(?P<end>[A-Z])")
+    _dim_index_list_pattern = re.compile(
+        r"([_0-9a-zA-Z]+)(?:,\s*([_0-9a-zA-Z]+))*")
+    _identifier_pattern = re.compile(r"[_A-Za-z]+\w*")
+    _dimable_identifier_pattern = re.compile(
+        r"((%s)|(%s)[_A-Za-z]{1}\w*)|([_A-Za-z]{1}\w*(\[%s\])?)|"
+        r"([_A-Za-z]{1}[_A-Za-z0-9]*(%s)?[_A-Za-z0-9]*)")
+    _bit_range_pattern = re.compile(r"\[((?:[0-6])?[0-9]):((?:[0-6])?[0-9])\]")
+    _revision_pattern = re.compile(r"r[0-9]*p[0-9]*")
+
     # converts integer
     @staticmethod
+    @functools.lru_cache(maxsize=_converter_cache_size)
     def _convert_integer(x: str):
         # try to perform the conversion
         try:
             value = int(x, 0)
         # oops!
         except ValueError:
-            raise Exception("Unable to convert integer {x}")
+            raise Exception(f"Unable to convert integer {x}")
         # report converted value
         return value
 
     # converts boolean value
     @staticmethod
+    @functools.lru_cache(maxsize=_converter_cache_size)
     def _convert_boolean(x: str):
         # try to perform the conversion
         try:
@@ -59,12 +91,13 @@ class SVDReader:
                 value = bool(int(x, 0))
         # oops!
         except ValueError:
-            raise Exception("Unable to convert integer {x}")
+            raise Exception(f"Unable to convert boolean {x}")
         # report converted value
         return value
 
     # converts string to non-negative integer
     @staticmethod
+    @functools.lru_cache(maxsize=_converter_cache_size)
     def _convert_scaled_non_negative_integer(x: str):
         # try to convert
         try:
@@ -75,48 +108,41 @@ class SVDReader:
                 raise ValueError
         # catch all
         except ValueError:
-            raise Exception("Unable to convert scaledNonNegativeInteger {x}")
+            raise Exception(f"Unable to convert scaledNonNegativeInteger {x}")
         # return the converted value
         return value
 
     # converts enumeratedValueDataType
     @staticmethod
+    @functools.lru_cache(maxsize=_converter_cache_size)
     def _convert_enumerated_value_data_type(x: str):
-        # allowable patterns
-        patterns = [
-            ("hex", "(0x|0X)[0-9a-fA-F]+"),
-            ("dec", "[0-9]+"),
-            ("bin", "(#|0b)[01xX]+")
-        ]
-        # allow plus sign
-        regexp = "[+]?" + "|".join([f"(?P<{p[0]}>{p[1]})" for p in patterns])
         # try the conversion
         try:
             # try to match and con
-            m = re.match(regexp, x).groupdict()
+            m = SVDReader._enumerated_value_pattern.match(x)
             # got hex value?
-            if m.get('hex'):
-                value = int(m.get('hex'), 16)
-            # decimal number
-            elif m.get('dec'):
-                value = int(m.get('dec'), 10)
+            if m.group('hex'):
+                value = int(m.group('hex'), 16)
             # binary number with unused bits marked as '[xX]'
+            elif m.group('bin'):
+                # python can't handle '#' prefix, unused bits become zeros
+                value = int(m.group('bin').lstrip("#0b").replace("x", "0")
+                            .replace("X", "0") or "0", 2)
+            # decimal number
             else:
-                # python can't handle '#' prefix
-                python_bin = re.sub("#", "0b", m.get('bin'))
-                # substitute unused bits for zeros
-                value = int(re.sub("[xX]", "0", python_bin), 2)
+                value = int(m.group('dec'), 10)
         except Exception:
-            raise Exception("Unable to convert enumeratedValueDataType {x}")
+            raise Exception(f"Unable to convert enumeratedValueDataType {x}")
         # return the converted value
         return value
 
     # convert dim index type to an iterable that represents strings to be
-    # substituted in the name placeholders
+    # substituted in the name placeholders. Not memoized since the list that
+    # is returned may be modified by the caller
     @staticmethod
     def _convert_dim_index_type(x: str):
         # try to match against start-end syntax with numerals
-        sen = re.match("(?P<start>[0-9]+|[A-Z]+)-(?P<end>[0-9]+|[A-Z]+)", x)
+        sen = SVDReader._dim_index_numbers_pattern.match(x)
         # got a match?
         if sen:
             # starting and ending index
@@ -129,11 +155,11 @@ class SVDReader:
             return [str(n) for n in range(start, end + 1)]
 
         # try to match against start-end syntax with letters
-        sel = re.match("(?P<start>[A-Z])-(?P<end>[A-Z])", x)
+        sel = SVDReader._dim_index_letters_pattern.match(x)
         # start-end letters syntax worked out!
         if sel:
             # starting and ending index
-            start, end = ord(sen.group('start')), ord(sen.group('end'))
+            start, end = ord(sel.group('start')), ord(sel.group('end'))
             # sanity check
             if start >= end:
                 raise Exception(f"Invalid dim range, {x}")
@@ -142,7 +168,7 @@ class SVDReader:
             return [chr(n) for n in range(start, end + 1)]
 
         # try to match against list syntax
-        ls = re.match("([_0-9a-zA-Z]+)(?:,\s*([_0-9a-zA-Z]+))*", x)
+        ls = SVDReader._dim_index_list_pattern.match(x)
         # list syntax worked out!
         if ls:
             return x.split(',')
@@ -154,7 +180,7 @@ class SVDReader:
     @staticmethod
     def _convert_identifier_type(x: str):
         # check name
-        if not re.match("[_A-Za-z]+\w*", x):
+        if not SVDReader._identifier_pattern.match(x):
             raise Exception(f"Unable to convert identifierType {x}")
         # return unchanged value
         return x
@@ -162,23 +188,18 @@ class SVDReader:
     # converter for 'dimable' name that follows ANSI C naming requirements
     @staticmethod
     def _covnert_dimable_identifier_type(x):
-        # allowable variants
-        variants = [
-            "((%s)|(%s)[_A-Za-z]{1}\w*)",
-            "([_A-Za-z]{1}\w*(\[%s\])?)",
-            "([_A-Za-z]{1}[_A-Za-z0-9]*(%s)?[_A-Za-z0-9]*)"
-        ]
-        # match
-        if not re.match("|".join(v for v in variants), x):
+        # match against all the allowable variants
+        if not SVDReader._dimable_identifier_pattern.match(x):
             raise Exception(f"Unable to convert dimableIdentifierType {x}")
         # return value
         return x
 
     # converter for bit range types
     @staticmethod
+    @functools.lru_cache(maxsize=_converter_cache_size)
     def _convert_bit_range_type(x: str):
         # try to match
-        m = re.match("\[((?:[0-6])?[0-9]):((?:[0-6])?[0-9])\]", x)
+        m = SVDReader._bit_range_pattern.match(x)
         if not m:
             raise Exception(f"Unable to convert bitRange {x}")
         # return the start-end tuple
@@ -204,7 +225,7 @@ class SVDReader:
     @staticmethod
     def _convert_revision_type(x: str):
         # match against revision regexp
-        if not re.match("r[0-9]*p[0-9]*", x):
+        if not SVDReader._revision_pattern.match(x):
             raise Exception(f"Invalid CPU revision {x}")
         # return as string
         return x
@@ -220,124 +241,286 @@ class SVDReader:
         # report the type as string
         return x
 
-    # helper function to get value from xml tree. If the value is not present
-    # then resort to default value. If convert is provided then use it to
-    # convert the xml text (which is always a string, obviously) to whatever
-    # you prefer
-    @staticmethod
-    def _get_val(node: ET.Element, name: str, default=None, convert=None,
-                 required=True):
-        # look for node
-        rf = node.find(name)
-        # no node
-        if rf is None:
-            # check when we expect the value to be present
-            if required:
-                raise Exception(f"Node {name} not present")
-            # use the default value
-            value = default
-        # no text situation
-        elif not rf.text:
-            raise Exception(f"Node {name} does not contain any text")
-        # node is valid
-        else:
+    # conversion tables used when reading the xml nodes. Every entry is a tuple
+    # in format: (dict_name, svd_name, required, default, converter). Tables
+    # are grouped in schemas and compiled into a tag lookup on first use
+    _cpu_conversions = (
+        ('name', 'name', True, None, _convert_cpu_name_type),
+        ('revision', 'revision', True, None, _convert_revision_type),
+        ('endian', 'endian', True, None, _convert_endian_type),
+        ('mpu_present', 'mpuPresent', True, None, _convert_boolean),
+        ('fpu_present', 'fpuPresent', True, None, _convert_boolean),
+        ('nvic_priority_bits', 'nvicPrioBits', True, None, _convert_integer),
+        ('vendor_systick', 'vendorSystickConfig', True, None,
+         _convert_boolean),
+    )
+
+    # registerPropertiesGroup
+    _register_properties_conversions = (
+        ('size', 'size', False, None, _convert_scaled_non_negative_integer),
+        ('reset_value', 'resetValue', False, None,
+         _convert_scaled_non_negative_integer),
+        ('reset_mask', 'resetMask', False, None,
+         _convert_scaled_non_negative_integer)
+    )
+
+    # dimElementGroup
+    _dim_element_conversions = (
+        ('dim', 'dim', False, None, _convert_scaled_non_negative_integer),
+        ('increment', 'dimIncrement', False, None,
+         _convert_scaled_non_negative_integer),
+        ('index', 'dimIndex', False, None, _convert_dim_index_type),
+        ('name', 'dimName', False, None, _convert_identifier_type)
+    )
+
+    # bitRange in all three notations
+    _bit_range_conversions = (
+        ('offset', 'bitOffset', False, None,
+         _convert_scaled_non_negative_integer),
+        ('width', 'bitWidth', False, None,
+         _convert_scaled_non_negative_integer),
+        ('lsb', 'lsb', False, None, _convert_scaled_non_negative_integer),
+        ('msb', 'msb', False, None, _convert_scaled_non_negative_integer),
+        ('range', 'bitRange', False, None, _convert_bit_range_type),
+    )
+
+    # addressBlock
+    _address_block_conversions = (
+        ('offset', 'offset', True, None, _convert_scaled_non_negative_integer),
+        ('size', 'size', True, None, _convert_scaled_non_negative_integer),
+        ('usage', 'usage', False, None, None),
+    )
+
+    # interrupt
+    _interrupt_conversions = (
+        ('name', 'name', True, None, None),
+        ('description', 'description', False, None, None),
+        ('value', 'value', True, None, _convert_integer),
+    )
+
+    # enumeratedValue
+    _enumerated_value_conversions = (
+        ('name', 'name', False, None, None),
+        ('description', 'description', False, None, None),
+        ('header_name', 'headerEnumName', False, None,
+         _convert_identifier_type),
+        ('value', 'value', False, None, _convert_enumerated_value_data_type),
+        ('is_default', 'isDefault', False, None, _convert_boolean)
+    )
+
+    # enumeratedValues
+    _enumerated_values_conversions = (
+        ('name', 'name', False, None, None),
+        ('header_name', 'headerEnumName', False, None,
+         _convert_identifier_type),
+        ('description', 'description', False, None, None)
+    )
+
+    # field
+    _field_conversions = (
+        ('name', 'name', True, None, _covnert_dimable_identifier_type),
+        ('description', 'description', False, None, None)
+    )
+
+    # register
+    _register_conversions = (
+        ('name', 'name', True, None, _covnert_dimable_identifier_type),
+        ('description', 'description', False, None, None),
+        ('offset', 'addressOffset', False, None,
+         _convert_scaled_non_negative_integer),
+        ('alternate_to', 'alternateRegister', False, None,
+         _convert_identifier_type)
+    )
+
+    # cluster
+    _cluster_conversions = (
+        ('name', 'name', True, None, _covnert_dimable_identifier_type),
+        ('description', 'description', False, None, None),
+        ('offset', 'addressOffset', True, None,
+         _convert_scaled_non_negative_integer),
+        ('alternate_to', 'alternateCluster', False, None,
+         _convert_identifier_type),
+        ('header_struct_name', 'headerStructName', False, None,
+         _convert_identifier_type),
+    )
+
+    # peripheral
+    _peripheral_conversions = (
+        ('name', 'name', True, None, _covnert_dimable_identifier_type),
+        ('group_name', 'groupName', False, None, None),
+        ('description', 'description', False, None, None),
+        ('base_address', 'baseAddress', True, None,
+         _convert_scaled_non_negative_integer),
+        ('alternate_to', 'alternatePeripheral', False, None,
+         _convert_identifier_type),
+        ('header_struct_name', 'headerStructName', False, None,
+         _convert_identifier_type),
+    )
+
+    # device
+    _device_conversions = (
+        ('name', 'name', True, None, None),
+        ('description', 'description', True, None, None),
+        ('version', 'version', True, None, None),
+        ('width', 'width', True, None, _convert_scaled_non_negative_integer),
+        ('address_unit_bits', 'addressUnitBits', True, None,
+         _convert_scaled_non_negative_integer)
+    )
+
+    # schemas group the tables of the values that share the same xml node so
+    # that the node is walked only once for all of them
+    _field_schema = (_field_conversions, _register_properties_conversions,
+                     _dim_element_conversions, _bit_range_conversions)
+    _register_schema = (_register_conversions,
+                        _register_properties_conversions,
+                        _dim_element_conversions)
+    _cluster_schema = (_cluster_conversions, _register_properties_conversions,
+                       _dim_element_conversions)
+    _peripheral_schema = (_peripheral_conversions,
+                          _register_properties_conversions,
+                          _dim_element_conversions)
+    _device_schema = (_device_conversions, _register_properties_conversions)
+
+    # tags that hold free text (which may span multiple lines), whitespaces
+    # get normalized only for these. All the other values are just stripped
+    _free_text_tags = ('description', )
+
+    # regexp used for the whitespace normalization
+    _whitespaces = re.compile(r"\s+")
+
+    # compiled conversion tables keyed by the id of the table (or schema)
+    _compiled_conversions = dict()
+
+    # compile a schema (tuple of conversion tables) into a lookup keyed by the
+    # svd tag name: tag -> (table_index, dict_name, converter, is_free_text)
+    # and a list of entries that need to be checked after the node was
+    # processed: (table_index, dict_name, svd_name, required, default)
+    @staticmethod
+    def _compile_schema(schema: tuple):
+        # start with empty lookup and checklist
+        lookup, checks = dict(), []
+        # process all the tables
+        for index, table in enumerate(schema):
+            for dict_name, svd_name, req, default, converter in table:
+                # all tables share the same children so the tags must not
+                # repeat
+                if svd_name in lookup:
+                    raise Exception(f"Tag {svd_name} is converted twice")
+                # tables are defined within the class body so these may still
+                # be wrapped in 'staticmethod'
+                converter = getattr(converter, '__func__', converter)
+                # store the conversion
+                lookup[svd_name] = (index, dict_name, converter,
+                                    svd_name in SVDReader._free_text_tags)
+                # missing value needs to be reported or defaulted
+                if req or default is not None:
+                    checks.append((index, dict_name, svd_name, req, default))
+        # return compiled schema
+        return len(schema), lookup, checks
+
+    # read the values of all the children of the node in a single pass and
+    # convert these using the compiled schema. Returns one dictionary per
+    # table of the schema
+    @staticmethod
+    def _get_compiled_vals(node: ET.Element, compiled: tuple):
+        # unpack
+        count, lookup, checks = compiled
+        # start with empty dictionaries
+        groups = [dict() for _ in range(count)]
+        # walk the children once
+        for child in node:
+            # look for the tag within the compiled tables
+            conversion = lookup.get(child.tag)
+            # not something that we are interested in
+            if conversion is None:
+                continue
+            # unpack
+            index, dict_name, converter, free_text = conversion
+            # first occurrence wins
+            if dict_name in groups[index]:
+                continue
+            # no text situation
+            text = child.text
+            if not text:
+                raise Exception(f"Node {child.tag} does not contain any text")
             # get rid of whitespaces
-            text = re.sub("\s+", r" ", rf.text).rstrip()
+            if free_text:
+                text = SVDReader._whitespaces.sub(" ", text).rstrip()
+            else:
+                text = text.strip()
             # cast if needed
-            value = convert(text) if convert else text
-        # return value
-        return value
+            groups[index][dict_name] = converter(text) if converter else text
+        # check for the missing values
+        for index, dict_name, svd_name, req, default in checks:
+            if dict_name not in groups[index]:
+                # check when we expect the value to be present
+                if req:
+                    raise Exception(f"Node {svd_name} not present")
+                # use the default value
+                groups[index][dict_name] = default
+        # return read values
+        return groups
+
+    # return a list of dictionaries (one per conversion table of the schema)
+    # holding values that are read from the node
+    @staticmethod
+    def _get_groups(node: ET.Element, schema: tuple):
+        # get the compiled version of the schema
+        compiled = SVDReader._compiled_conversions.get(id(schema))
+        # not yet compiled?
+        if compiled is None:
+            compiled = SVDReader._compile_schema(schema)
+            SVDReader._compiled_conversions[id(schema)] = compiled
+        # read the values
+        return SVDReader._get_compiled_vals(node, compiled)
 
     # return a dictionary of values that are read from the node and are
-    # converted using the conversion logic. conversions is a list of tuples
-    # in format: (dict_name, svd_name, required, default, converter)
+    # converted using the conversion table
     @staticmethod
-    def _get_vals(node: ET.Element, conversions: list):
-        # start with empty dictionary
-        d = dict()
-        # process all conversions
-        for dict_name, svd_name, req, default, converter in conversions:
-            d[dict_name] = SVDReader._get_val(node, svd_name, default,
-                                              converter, req)
-        # return entries that are not empty
-        return {k: v for k, v in d.items() if v is not None}
+    def _get_vals(node: ET.Element, conversions: tuple):
+        # get the compiled version of the table
+        compiled = SVDReader._compiled_conversions.get(id(conversions))
+        # not yet compiled?
+        if compiled is None:
+            compiled = SVDReader._compile_schema((conversions, ))
+            SVDReader._compiled_conversions[id(conversions)] = compiled
+        # read the values
+        return SVDReader._get_compiled_vals(node, compiled)[0]
 
-    # generate random string that starts with '$' sign
+    # generate the name for the element that has none: '$' sign followed by
+    # the hash of the element contents and its position within the parent.
+    # Names do not change between the parses of the same document, so the
+    # results may be compared, cached and deduplicated. Equal anonymous
+    # elements at the same position (e.g. in different fields) share the name
     @staticmethod
-    def _random_string(length=8):
-        return "$" + ''.join(random.choices(string.hexdigits, k=length))
+    def _content_name(values: dict, position: int, length=8):
+        digest = hashlib.sha256(repr((position, values)).encode()).hexdigest()
+        return "$" + digest[:length]
 
     # process cpu record
     @staticmethod
     def _process_cpu(node: ET.Element):
-        # all the conversions
-        conversions = [
-            ('name', 'name', True, None, SVDReader._convert_cpu_name_type),
-            ('revision', 'revision', True, None,
-             SVDReader._convert_revision_type),
-            ('endian', 'endian', True, None, SVDReader._convert_endian_type),
-            ('mpu_present', 'mpuPresent', True, None,
-             SVDReader._convert_boolean),
-            ('fpu_present', 'fpuPresent', True, None,
-             SVDReader._convert_boolean),
-            ('nvic_priority_bits', 'nvicPrioBits', True, None,
-             SVDReader._convert_integer),
-            ('vendor_systick', 'vendorSystickConfig', True, None,
-             SVDReader._convert_boolean),
-        ]
         # return read values
-        return SVDReader._get_vals(node, conversions)
+        return SVDReader._get_vals(node, SVDReader._cpu_conversions)
 
     # process register property group
     @staticmethod
     def _process_register_properties_group(node: ET.Element):
-        # all the conversions
-        conversions = [
-            ('size', 'size', False, None,
-             SVDReader._convert_scaled_non_negative_integer),
-            ('reset_value', 'resetValue', False, None,
-             SVDReader._convert_scaled_non_negative_integer),
-            ('reset_mask', 'resetMask', False, None,
-             SVDReader._convert_scaled_non_negative_integer)
-        ]
         # return read value
-        return SVDReader._get_vals(node, conversions)
+        return SVDReader._get_vals(node,
+                                   SVDReader._register_properties_conversions)
 
     # process dimensional element group
     @staticmethod
     def _process_dim_element_group(node: ET.Element):
-        # all the conversions
-        conversions = [
-            ('dim', 'dim', False, None,
-             SVDReader._convert_scaled_non_negative_integer),
-            ('increment', 'dimIncrement', False, None,
-             SVDReader._convert_scaled_non_negative_integer),
-            ('index', 'dimIndex', False, None,
-             SVDReader._convert_dim_index_type),
-            ('name', 'dimName', False, None,
-             SVDReader._convert_identifier_type)
-        ]
         # return read value
-        return SVDReader._get_vals(node, conversions)
+        return SVDReader._get_vals(node, SVDReader._dim_element_conversions)
 
     # process bit range
     @staticmethod
     def _process_bit_range(node: ET.Element):
-        # all the conversions
-        conversions = [
-            ('offset', 'bitOffset', False, None,
-             SVDReader._convert_scaled_non_negative_integer),
-            ('width', 'bitWidth', False, None,
-             SVDReader._convert_scaled_non_negative_integer),
-            ('lsb', 'lsb', False, None,
-             SVDReader._convert_scaled_non_negative_integer),
-            ('msb', 'msb', False, None,
-             SVDReader._convert_scaled_non_negative_integer),
-            ('range', 'bitRange', False, None,
-             SVDReader._convert_bit_range_type),
-        ]
         # return read value
-        return SVDReader._get_vals(node, conversions)
+        return SVDReader._get_vals(node, SVDReader._bit_range_conversions)
 
     # resolve processed bit-range to offset-width notation
     @staticmethod
@@ -346,13 +529,15 @@ class SVDReader:
         if bit_range.get('offset') is not None:
             bit_offset = bit_range.get('offset')
             bit_width = bit_range.get('width', 1)
-        # msb-lsb notation
-        elif bit_range.get('lsb') is not None and bit_range.get('msb'):
+        # msb-lsb notation, both ends are inclusive
+        elif bit_range.get('lsb') is not None and \
+                bit_range.get('msb') is not None:
             bit_offset = bit_range.get('lsb')
-            bit_width = bit_range.get('msb') - bit_offset
-        # range-notation
+            bit_width = bit_range.get('msb') - bit_offset + 1
+        # range-notation: [msb:lsb]
         elif bit_range.get('range') is not None:
-            bit_offset, bit_width = bit_range.get('range')
+            msb, bit_offset = bit_range.get('range')
+            bit_width = msb - bit_offset + 1
         # unsupported case
         else:
             raise Exception("Unable to resolve bit range")
@@ -362,64 +547,35 @@ class SVDReader:
     # process address block
     @staticmethod
     def _process_address_block(node: ET.Element):
-        # all the conversions
-        conversions = [
-            ('offset', 'offset', True, None,
-             SVDReader._convert_scaled_non_negative_integer),
-            ('size', 'size', True, None,
-             SVDReader._convert_scaled_non_negative_integer),
-            ('usage', 'usage', False, None, None),
-        ]
         # return read value
-        return SVDReader._get_vals(node, conversions)
+        return SVDReader._get_vals(node, SVDReader._address_block_conversions)
 
     @staticmethod
     def _process_interrupt(node: ET.Element):
-        # all the conversions
-        conversions = [
-            ('name', 'name', True, None, None),
-            ('description', 'description', False, None, None),
-            ('value', 'value', True, None, SVDReader._convert_integer),
-        ]
         # do the conversions
-        int_val = SVDReader._get_vals(node, conversions)
+        int_val = SVDReader._get_vals(node, SVDReader._interrupt_conversions)
         # return read value
         return int_val.get('name'), int_val
 
     # process enumerated value
     @staticmethod
-    def _process_enumerated_value(node: ET.Element):
-        # all the conversions
-        conversions = [
-            ('name', 'name', False, None, None),
-            ('description', 'description', False, None, None),
-            ('header_name', 'headerEnumName', False, None,
-             SVDReader._convert_identifier_type),
-            ('value', 'value', False, None,
-             SVDReader._convert_enumerated_value_data_type),
-            ('is_default', 'isDefault', False, None,
-             SVDReader._convert_boolean)
-        ]
+    def _process_enumerated_value(node: ET.Element, position=0):
         # get basic information
-        enum_val = SVDReader._get_vals(node, conversions)
+        enum_val = SVDReader._get_vals(
+            node, SVDReader._enumerated_value_conversions)
         # these are always fully-defined
         enum_val['fully_defined'] = True
-        # return name (which may be randomly generated if none is provided)
-        # and read value
-        return enum_val.get('name', SVDReader._random_string()), enum_val
+        # return name (which is generated from the contents if none is
+        # provided) and read value
+        return enum_val.get('name') or \
+            SVDReader._content_name(enum_val, position), enum_val
 
     # process enumerated values
     @staticmethod
-    def _process_enumerated_values(node: ET.Element):
-        # all the conversions
-        conversions = [
-            ('name', 'name', False, None, None),
-            ('header_name', 'headerEnumName', False, None,
-             SVDReader._convert_identifier_type),
-            ('description', 'description', False, None, None)
-        ]
+    def _process_enumerated_values(node: ET.Element, position=0):
         # get basic information
-        enums = SVDReader._get_vals(node, conversions)
+        enums = SVDReader._get_vals(node,
+                                    SVDReader._enumerated_values_conversions)
         # derived field?
         if 'derivedFrom' in node.attrib:
             enums['derived_from'] = node.attrib['derivedFrom']
@@ -430,34 +586,31 @@ class SVDReader:
         enums['enumerated_value'] = dict()
         # process all values. we use 'iter' because enumeratedValue is
         # at the same level as 'node' itself
-        for n in node.iter('enumeratedValue') or []:
+        for i, n in enumerate(node.iter('enumeratedValue')):
             # process peripheral data
-            ev_name, ev_data = SVDReader._process_enumerated_value(n)
+            ev_name, ev_data = SVDReader._process_enumerated_value(n, i)
             # store within the device
             enums['enumerated_value'][ev_name] = ev_data
-        # return name (which may be randomly generated if none is provided)
-        # and read value
-        return enums.get('name', SVDReader._random_string()), enums
-
-    # process fields that belong to registers
-    @staticmethod
-    def _process_field(node: ET.Element):
-        # all the conversions
-        conversions = [
-            ('name', 'name', True, None,
-             SVDReader._covnert_dimable_identifier_type),
-            ('description', 'description', False, None, None)
-        ]
-        # get basic information
-        field = SVDReader._get_vals(node, conversions)
+        # return name (which is generated from the contents if none is
+        # provided) and read value
+        return enums.get('name') or \
+            SVDReader._content_name(enums, position), enums
+
+    # process fields that belong to registers, 'selection' tells which parts
+    # of the element are converted (see '_process_selected()')
+    @staticmethod
+    def _process_field(node: ET.Element, selection=None):
+        # get basic information along with the register properties,
+        # dimensional element and bit range groups
+        field, reg_properties, dim, bit_range = \
+            SVDReader._get_groups(node, SVDReader._field_schema)
         # registers property group may also be present
-        field['reg_properties'] = \
-            SVDReader._process_register_properties_group(node)
+        field['reg_properties'] = reg_properties
         # dimensional element group might be present
-        field['dim'] = SVDReader._process_dim_element_group(node)
+        field['dim'] = dim
         # resolve the notation to bit offset/bit_width
         field['bit_offset'], field['bit_width'] = \
-            SVDReader._resolve_bit_range(SVDReader._process_bit_range(node))
+            SVDReader._resolve_bit_range(bit_range)
         # derived field?
         if 'derivedFrom' in node.attrib:
             field['derived_from'] = node.attrib['derivedFrom']
@@ -466,11 +619,14 @@ class SVDReader:
             field['fully_defined'] = True
         # build up the field list
         field['enumerated_values'] = dict()
+        # enumerations are not needed
+        if selection and selection['skip_enums']:
+            return field.get('name'), field
         # process all peripherals. we use 'iter' since these are on the same
         # level as the 'node'
-        for n in node.iter('enumeratedValues') or []:
+        for i, n in enumerate(node.iter('enumeratedValues')):
             # proces peripheral data
-            evs_name, evs_data = SVDReader._process_enumerated_values(n)
+            evs_name, evs_data = SVDReader._process_enumerated_values(n, i)
             # store within the device
             field['enumerated_values'][evs_name] = evs_data
         # return read value
@@ -478,24 +634,15 @@ class SVDReader:
 
     # process register information
     @staticmethod
-    def _process_register(node: ET.Element):
-        # all the conversions
-        conversions = [
-            ('name', 'name', True, None,
-             SVDReader._covnert_dimable_identifier_type),
-            ('description', 'description', False, None, None),
-            ('offset', 'addressOffset', False, None,
-             SVDReader._convert_scaled_non_negative_integer),
-            ('alternate_to', 'alternateRegister', False, None,
-             SVDReader._convert_identifier_type)
-        ]
-        # get basic information
-        register = SVDReader._get_vals(node, conversions)
+    def _process_register(node: ET.Element, selection=None):
+        # get basic information along with the register properties and
+        # dimensional element groups
+        register, reg_properties, dim = \
+            SVDReader._get_groups(node, SVDReader._register_schema)
         # registers property group may also be present
-        register['reg_properties'] = \
-            SVDReader._process_register_properties_group(node)
+        register['reg_properties'] = reg_properties
         # dimensional element group might be present
-        register['dim'] = SVDReader._process_dim_element_group(node)
+        register['dim'] = dim
         # derived register?
         if 'derivedFrom' in node.attrib:
             register['derived_from'] = node.attrib['derivedFrom']
@@ -508,7 +655,7 @@ class SVDReader:
         # 'fields' tag
         for n in node.find('fields') or []:
             # proces peripheral data
-            f_name, f_data = SVDReader._process_field(n)
+            f_name, f_data = SVDReader._process_field(n, selection)
             # store within the device
             register['fields'][f_name] = f_data
         # return read value
@@ -518,26 +665,15 @@ class SVDReader:
     # clusters express hierarchical structures of registers (and make my life
     # miserable due to recursive programming which I hate).
     @staticmethod
-    def _process_cluster(node: ET.Element):
-        # all the conversions
-        conversions = [
-            ('name', 'name', True, None,
-             SVDReader._covnert_dimable_identifier_type),
-            ('description', 'description', False, None, None),
-            ('offset', 'addressOffset', True, None,
-             SVDReader._convert_scaled_non_negative_integer),
-            ('alternate_to', 'alternateCluster', False, None,
-             SVDReader._convert_identifier_type),
-            ('header_struct_name', 'headerStructName', False, None,
-             SVDReader._convert_identifier_type),
-        ]
-        # get basic information
-        cluster = SVDReader._get_vals(node, conversions)
+    def _process_cluster(node: ET.Element, selection=None):
+        # get basic information along with the register properties and
+        # dimensional element groups
+        cluster, reg_properties, dim = \
+            SVDReader._get_groups(node, SVDReader._cluster_schema)
         # registers property group may also be present
-        cluster['reg_properties'] = \
-            SVDReader._process_register_properties_group(node)
+        cluster['reg_properties'] = reg_properties
         # dimensional element group might be present
-        cluster['dim'] = SVDReader._process_dim_element_group(node)
+        cluster['dim'] = dim
         # derived register?
         if 'derivedFrom' in node.attrib:
             cluster['derived_from'] = node.attrib['derivedFrom']
@@ -550,7 +686,7 @@ class SVDReader:
         # clusters may contain nested clusters. how neat.
         for n in node.findall('cluster') or []:
             # go down the cluster tree
-            c_name, c_data = SVDReader._process_cluster(n)
+            c_name, c_data = SVDReader._process_cluster(n, selection)
             # store information
             cluster['clusters'][c_name] = c_data
 
@@ -558,37 +694,118 @@ class SVDReader:
         cluster['registers'] = dict()
         # process registers
         for n in node.findall('register') or []:
+            # not selected
+            if not SVDReader._selected(n, selection):
+                continue
             # process peripheral data
-            r_name, r_data = SVDReader._process_register(n)
+            r_name, r_data = SVDReader._process_register(n, selection)
             # store within the device
             cluster['registers'][r_name] = r_data
 
         # return data
         return cluster.get('name'), cluster
 
+    # build the selection for '_process_device()' out of the filters given
+    # to 'process()', None if everything is to be converted. Filters are
+    # predicates that take the name of the element (as it is in the document,
+    # e.g. 'UART%s') or glob patterns (single one or any iterable of these)
+    @staticmethod
+    def _selection(peripherals=None, registers=None, skip_enums=False):
+        # nothing to filter
+        if peripherals is None and registers is None and not skip_enums:
+            return None
+        # turn the patterns into the predicates
+        def predicate(spec):
+            if spec is None or callable(spec):
+                return spec
+            patterns = [spec] if isinstance(spec, str) else list(spec)
+            regexp = re.compile("|".join(fnmatch.translate(p)
+                                         for p in patterns))
+            return lambda name: regexp.match(name) is not None
+        # 'keep' holds the names of the registers needed by the derivations,
+        # 'skipped' the names of the registers of the current peripheral
+        # that were filtered out
+        return {'peripherals': predicate(peripherals),
+                'registers': predicate(registers), 'skip_enums': skip_enums,
+                'keep': set(), 'skipped': set()}
+
+    # check if the register element is to be converted
+    @staticmethod
+    def _selected(node: ET.Element, selection):
+        # no filtering at all
+        if not selection or selection['registers'] is None:
+            return True
+        name = (node.findtext('name') or '').strip()
+        # needed by the derivation or selected
+        if name in selection['keep'] or selection['registers'](name):
+            return True
+        # remember what was skipped
+        selection['skipped'].add(name)
+        return False
+
+    # yield all the derivation paths within the node
+    @staticmethod
+    def _derivation_paths(node: dict):
+        if node.get('derived_from'):
+            yield node['derived_from']
+        for _, collection in SVDReader._next_level(node):
+            for elem in collection.values():
+                yield from SVDReader._derivation_paths(elem)
+
+    # process the selected peripheral elements (see '_selection()'), yields
+    # (name, data) tuples in the document order. Peripherals and registers
+    # that the derivations refer to are pulled in as well: every name along
+    # the derivation paths is kept (which may keep a few more registers than
+    # strictly needed) and the peripherals that skipped any of the newly
+    # needed registers are processed again until nothing changes
+    @staticmethod
+    def _process_selected(peripherals: list, selection: dict):
+        # name -> element
+        elements = {(n.findtext('name') or '').strip(): n for n in peripherals}
+        # start with the peripherals that were asked for
+        select = selection['peripherals']
+        todo = [n for n in elements if select is None or select(n)]
+        pending = set(todo)
+        # name -> (data, names of the skipped registers)
+        processed = dict()
+        while todo:
+            name = todo.pop()
+            pending.discard(name)
+            selection['skipped'] = set()
+            _, data = SVDReader._process_peripheral(elements[name], selection)
+            processed[name] = (data, selection['skipped'])
+            # names along the derivation paths
+            parts = {part for path in SVDReader._derivation_paths(data)
+                     for part in path.split('.')}
+            new = parts - selection['keep']
+            selection['keep'].update(new)
+            # peripherals that are needed
+            needed = [n for n in parts if n in elements and
+                      n not in processed]
+            # ones that have skipped the registers that are needed now
+            if new:
+                needed.extend(n for n, (_, skipped) in processed.items()
+                              if skipped & new)
+            for n in needed:
+                if n not in pending:
+                    pending.add(n)
+                    todo.append(n)
+        # in the document order
+        for name in elements:
+            if name in processed:
+                yield processed[name][0].get('name'), processed[name][0]
+
     # process single peripheral, return derivation path as well
     @staticmethod
-    def _process_peripheral(node: ET.Element):
-        # all the conversions
-        conversions = [
-            ('name', 'name', True, None,
-             SVDReader._covnert_dimable_identifier_type),
-            ('group_name', 'groupName', False, None, None),
-            ('description', 'description', False, None, None),
-            ('base_address', 'baseAddress', True, None,
-             SVDReader._convert_scaled_non_negative_integer),
-            ('alternate_to', 'alternatePeripheral', False, None,
-             SVDReader._convert_identifier_type),
-            ('header_struct_name', 'headerStructName', False, None,
-             SVDReader._convert_identifier_type),
-        ]
-        # get basic information
-        peripheral = SVDReader._get_vals(node, conversions)
+    def _process_peripheral(node: ET.Element, selection=None):
+        # get basic information along with the register properties and
+        # dimensional element groups
+        peripheral, reg_properties, dim = \
+            SVDReader._get_groups(node, SVDReader._peripheral_schema)
         # registers property group may also be present
-        peripheral['reg_properties'] = \
-            SVDReader._process_register_properties_group(node)
+        peripheral['reg_properties'] = reg_properties
         # dimensional element group might be present
-        peripheral['dim'] = SVDReader._process_dim_element_group(node)
+        peripheral['dim'] = dim
         # derived peripheral?
         if 'derivedFrom' in node.attrib:
             peripheral['derived_from'] = node.attrib['derivedFrom']
@@ -597,9 +814,10 @@ class SVDReader:
             peripheral['fully_defined'] = True
 
         # process address block (it might be not present)
-        if node.find('addressBlock'):
+        node_address_block = node.find('addressBlock')
+        if node_address_block:
             peripheral['address_block'] = \
-                SVDReader._process_address_block(node.find('addressBlock'))
+                SVDReader._process_address_block(node_address_block)
 
         # initialize with empty dictionary
         peripheral['interrupts'] = dict()
@@ -619,236 +837,402 @@ class SVDReader:
             # process clusters
             for n in node_registers.findall('cluster'):
                 # go down the cluster tree
-                c_name, c_data = SVDReader._process_cluster(n)
+                c_name, c_data = SVDReader._process_cluster(n, selection)
                 # store information
                 peripheral['clusters'][c_name] = c_data
 
             # process clusters
             for n in node_registers.findall('register'):
+                # not selected
+                if not SVDReader._selected(n, selection):
+                    continue
                 # go down the cluster tree
-                c_name, c_data = SVDReader._process_register(n)
+                c_name, c_data = SVDReader._process_register(n, selection)
                 # store information
                 peripheral['registers'][c_name] = c_data
 
         # return read value
         return peripheral.get('name'), peripheral
 
-    # process the device entry
-    @staticmethod
-    def _process_device(node: ET.Element):
-        # all the conversions
-        conversions = [
-            ('name', 'name', True, None, None),
-            ('description', 'description', True, None, None),
-            ('version', 'version', True, None, None),
-            ('width', 'width', True, None,
-             SVDReader._convert_scaled_non_negative_integer),
-            ('address_unit_bits', 'addressUnitBits', True, None,
-             SVDReader._convert_scaled_non_negative_integer)
-        ]
-        # convert all the device fields
-        device = SVDReader._get_vals(node, conversions)
+    # process the device entry, with 'selection' set only the selected
+    # peripherals are processed (see '_process_selected()')
+    @staticmethod
+    def _process_device(node: ET.Element, selection=None):
+        # convert all the device fields along with the register properties
+        device, reg_properties = \
+            SVDReader._get_groups(node, SVDReader._device_schema)
         # store the information about the cpu
         device['cpu'] = SVDReader._process_cpu(node.find('cpu'))
         # registers property group may also be present
-        device['reg_properties'] = \
-            SVDReader._process_register_properties_group(node)
+        device['reg_properties'] = reg_properties
         # build up the peripheral list
         device['peripherals'] = dict()
         # devices are always fully defined
         device['fully_defined'] = True
-        # process all peripherals
-        for n in node.find('peripherals') or []:
-            # process peripheral data
-            p_name, p_data = SVDReader._process_peripheral(n)
-            # store within the device
+        # peripheral elements
+        peripherals = list(node.find('peripherals') or [])
+        # process the selected peripherals only
+        if selection is not None:
+            processed = SVDReader._process_selected(peripherals, selection)
+        else:
+            processed = map(SVDReader._process_peripheral, peripherals)
+        # store within the device (in document order)
+        for p_name, p_data in processed:
             device['peripherals'][p_name] = p_data
         # return read value
         return device
 
-    # update all the fields of 'update_to' with fields from 'update_from'.
-    # 'update_to' is our working dictionary.
+    # parts of the document that the peripheral scan cares about: the
+    # comments and character data are skipped, the (closing) tags of the
+    # peripherals give us the ranges. Groups are: closing slash, plural 's'
+    # and the self-closing slash
+    _scan_tokens = re.compile(rb"<!--.*?-->|<!\[CDATA\[.*?\]\]>|"
+                              rb"<(/?)peripheral(s?)\b[^>]*?(/?)>", re.S)
+    # xml declaration (along with the byte order mark)
+    _scan_declaration = re.compile(rb"(?:\xef\xbb\xbf)?\s*(<\?xml[^>]*\?>)")
+    # encoding given within the declaration
+    _scan_encoding = re.compile(rb"encoding\s*=\s*[\"']([^\"']+)[\"']")
+    # name of the peripheral (first one that appears within the element)
+    _scan_name = re.compile(rb"<name>(.*?)</name>", re.S)
+
+    # scan the raw svd document for the peripheral elements without parsing
+    # it. Returns the xml declaration (to be put in front of every part of
+    # the document that gets parsed on its own so that the encoding stays the
+    # same), the list of (name, start, end) byte ranges of the peripherals in
+    # the document order and the (start, end) range of the contents of the
+    # 'peripherals' element (None if there is no such element)
+    @staticmethod
+    def _scan_peripherals(data: bytes):
+        # declaration and the encoding
+        declaration = SVDReader._scan_declaration.match(data)
+        prolog = declaration.group(1) if declaration else b""
+        encoding = SVDReader._scan_encoding.search(prolog)
+        encoding = encoding.group(1).decode() if encoding else 'utf-8'
+        # find the peripherals
+        peripherals, head, tail, start = [], None, None, None
+        for m in SVDReader._scan_tokens.finditer(data):
+            closing, plural, empty = m.groups()
+            # comment or character data
+            if closing is None:
+                continue
+            # the collection
+            if plural:
+                if closing:
+                    tail = m.start()
+                elif not empty:
+                    head = m.end()
+            # opening tag of the peripheral
+            elif not closing:
+                start = None if empty else m.start()
+            # closing one, the name comes first within the element
+            elif start is not None:
+                name = SVDReader._scan_name.search(data, start, m.end())
+                if name is None:
+                    raise Exception(f"Peripheral without the name at the "
+                                    f"byte {start}")
+                name = unescape(name.group(1).decode(encoding)).strip()
+                peripherals.append((name, start, m.end()))
+                start = None
+        # return what was found
+        contents = (head, tail) if head is not None and tail is not None \
+            else None
+        return prolog, peripherals, contents
+
+    # process the raw svd document (bytes). With 'workers' greater than one
+    # the document is only scanned for the byte ranges of the peripherals
+    # (see '_scan_peripherals()'), the parent process parses the device
+    # without these while the pool of processes parses the peripherals
+    @staticmethod
+    def _process_document(data: bytes, workers=None, selection=None):
+        # parallel processing, filters are not passed to the workers
+        if workers and workers > 1 and selection is None:
+            prolog, peripherals, contents = SVDReader._scan_peripherals(data)
+            if contents is not None and len(peripherals) > 1:
+                # device without the peripherals
+                device = SVDReader._process_device(ET.fromstring(
+                    data[:contents[0]] + data[contents[1]:]))
+                # peripherals in the document order
+                for p_name, p_data in SVDReader._process_peripherals_parallel(
+                        data, prolog, peripherals, workers):
+                    device['peripherals'][p_name] = p_data
+                return device
+        # serial processing
+        return SVDReader._process_device(ET.fromstring(data), selection)
+
+    # number of chunks that every worker gets (on average). More chunks even
+    # out the load when peripherals differ in size, fewer chunks mean less
+    # overhead per chunk
+    _chunks_per_worker = 4
+
+    # process the chunk of the document that holds consecutive peripheral
+    # elements. This is what the worker processes run: it returns the list
+    # of (name, data) tuples in the order of the elements within the chunk,
+    # marshalled since that is way faster to load for the parent than the
+    # pickle that the pool would use
+    @staticmethod
+    def _process_peripherals_chunk(chunk: bytes):
+        # rebuild the elements
+        elements = ET.fromstring(chunk)
+        # process them one by one
+        return marshal.dumps([SVDReader._process_peripheral(n)
+                              for n in elements])
+
+    # process the peripherals (byte ranges of the document as returned by
+    # '_scan_peripherals()') using a pool of 'workers' processes. Chunks of
+    # consecutive peripherals are sliced out of the document as they are,
+    # results are yielded in document order
     @staticmethod
-    def _update_elements(update_to: dict, update_from: dict, overwrite=True,
-                         exemptions=None):
+    def _process_peripherals_parallel(data: bytes, prolog: bytes,
+                                      peripherals: list, workers: int):
+        # imported here as this is only needed for the parallel processing
+        from concurrent.futures import ProcessPoolExecutor
+        # size of the chunk
+        n_chunks = workers * SVDReader._chunks_per_worker
+        size = max(1, -(-len(peripherals) // n_chunks))
+        # slice the chunks out of the document
+        chunks = [prolog + b"<peripherals>" +
+                  data[peripherals[i][1]:
+                       peripherals[min(i + size, len(peripherals)) - 1][2]] +
+                  b"</peripherals>"
+                  for i in range(0, len(peripherals), size)]
+        # process the chunks in parallel, map() keeps the order
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for result in executor.map(SVDReader._process_peripherals_chunk,
+                                       chunks):
+                yield from marshal.loads(result)
+
+    # merge all the fields of 'merge_from' into 'merge_to' without modifying
+    # any of these. Unchanged sub-dictionaries are not copied but shared with
+    # the source, new dictionaries are only created along the paths where
+    # something actually changes (copy-on-write). If nothing changes then
+    # 'merge_to' itself is returned.
+    @staticmethod
+    def _merge_elements(merge_to: dict, merge_from: dict, overwrite=True,
+                        exemptions=None):
+        # output is the same as the input until first write occurs
+        output = merge_to
         # process key-value pairs from the source ('from') dictionary
-        for k in update_from:
+        for k in merge_from:
             # skip all the entries that we do not want to propagate
             if exemptions and k in exemptions:
                 continue
-            # if entry exists in 'from' but not in 'to' then it is copied
-            # using deepcopy as it may contain nested dictionaries
-            if k not in update_to:
-                update_to[k] = copy.deepcopy(update_from[k])
+            # if entry exists in 'from' but not in 'to' then it is shared
+            if k not in output:
+                value = merge_from[k]
+            # element that has its own derivation shall not be merged with
+            # anything else, it is fully defined by what it derives from
+            elif isinstance(merge_from[k], dict) and \
+                    merge_from[k].get('derived_from') and \
+                    not merge_from[k].get('fully_defined'):
+                value = merge_from[k]
             # both entries exist and both are dictionaries, need to go deeper
-            elif isinstance(update_to[k], dict) and \
-                    isinstance(update_from[k], dict):
-                SVDReader._update_elements(update_to[k], update_from[k],
-                                           overwrite)
+            elif isinstance(output[k], dict) and \
+                    isinstance(merge_from[k], dict):
+                value = SVDReader._merge_elements(output[k], merge_from[k],
+                                                  overwrite)
             # 'other types
             elif overwrite:
-                update_to[k] = copy.deepcopy(update_from[k])
-
-    # function walks the derivation path and returns the matching entry
-    @staticmethod
-    def _follow_derivation_path(path: str, level_collections: list):
-        # split path using periods
-        path_elems = path.split(".")
-        # if path is more parts that we have level collections then there is
-        # something fishy about it!
-        if len(level_collections) < len(path_elems):
-            raise Exception("path {path} levels exceed the number of hierarchy "
-                            "'levels' provided")
-        # both: absolute and relative cases are handled here
-        else:
-            # when looking into absolute path start from the very beginning of
-            # the levels provided. For relative paths (path_elems is shorter
-            # than level_collections)
-            lc = level_collections[-len(path_elems)]
-            # this will hold the collection that matches path element on the
-            # level that we are currently processing
-            found_col = None
-            # process every part in path
-            for p in path_elems:
-                # reset
-                found_col = None
-                # do we have the name present among the list
-                for level_name, level_collection in lc:
-                    found_col = found_col or level_collection.get(p)
-                # nothing was found?
-                if found_col is None:
-                    break
-                # got a match! go to next level
-                else:
-                    lc = SVDReader._next_level(found_col)
-            # store result
-            result = found_col
-        # oops! nothing was found!
-        if result is None:
-            raise Exception(f"Path {path} is unreachable within provided level "
-                            f"collection")
-        # return the result
-        return result
-
-    # function used to construct the derivation list for nested derivations,
-    # list contains all elements that we derive from until a non-derived element
-    # is found (which is the last element on the list). For example if current
-    # element A derives from B which derives from C then the list will be as
-    # follows: [B, C]
-    @staticmethod
-    def _build_derivation_list(elem: dict, level_collections: list):
-        # the infamous derivation list
-        derivation_list = [elem]
-        # go in depth
-        while elem.get('derived_from') and not elem.get('fully_defined'):
-            # get the derived element
-            derived_from = \
-                SVDReader._follow_derivation_path(elem['derived_from'],
-                                                  level_collections)
-            # add to list
-            derivation_list += [derived_from]
-            # update the element
-            elem = derived_from
-        # return the gathered information
-        return derivation_list
-
-    # function used to merge all the elements from the derivation list
-    @staticmethod
-    def _apply_derivation_list(derivation_list: list, level_name: str):
-        # start with the empty dictionary. we also return all the element that
-        # had their derivations resolved along the way
-        output, output_list = dict(), []
-        # do we have any exemptions for this level
-        level_exemptions = SVDReader._derivation_exemptions.get(level_name)
-        # process derivation list
-        for level_collection in reversed(derivation_list):
-            # udpate the current output with data from 'd'
-            SVDReader._update_elements(output, level_collection,
-                                       exemptions=level_exemptions)
-            # store the state on the list
-            output_list.append(copy.deepcopy(output))
-        # return a list that represents all the steps of the derivation
-        return reversed(output_list)
-
-    # generate element instances based on the 'derivedFrom' property
-    @staticmethod
-    # TODO make functional
-    def _resolve_derivations(node: dict, name=None, level_name='device',
-                             levels_collections=None):
-        # initialize list that represent the levels that we reach as we go
-        # down the hierarchy
-        if levels_collections is None:
-            levels_collections = []
-
-        # obtain a list of collections for the next level in hierarchy
-        next_level_collections = SVDReader._next_level(node)
+                value = merge_from[k]
+            # existing value stays
+            else:
+                continue
+            # nothing has changed
+            if k in output and output[k] is value:
+                continue
+            # first write, time to make a copy
+            if output is merge_to:
+                output = dict(merge_to)
+            # store the value
+            output[k] = value
+        # return the merged dictionary
+        return output
+
+    # collect all the derived elements of the tree in document order. Every
+    # element is stored as a tuple: (node, name, level_name, scope, parent,
+    # parent_vertex) where 'scope' is the path of the parent and
+    # 'parent_vertex' is the index of the closest derived ancestor (or None).
+    # 'spans' maps the ids of all the nodes to the (start, end) range of the
+    # derived elements that are found within their sub-trees
+    @staticmethod
+    def _collect_derivations(node: dict, name, level_name, scope, parent,
+                             parent_vertex, vertices: list, spans: dict):
+        # derived elements within the sub-tree start here
+        start = len(vertices)
         # element derives from something?
         if not node.get('fully_defined'):
-            # build the list of all things that we derive from
-            dl = SVDReader._build_derivation_list(node, levels_collections)
-            # produce merged outputs on all levels of derivation, zip these with
-            # current values of elements  that were used for the whole
-            # derivation process and finally update them with derived data.
-            # 'update()' is safe here since '_apply_derivation_list()' produces
-            # deep-copies of the data provided
-            al = SVDReader._apply_derivation_list(dl, level_name)
-            for dst, src in zip(dl, al):
-                dst.update(src)
-
-            # enumerated value[s] do not need to have their name specified and
-            # so it might be a subject of change. If enumerated value 'name'
-            # field differs than the key-name that is is availabe under in the
-            # collection then we shall use the derived name
-            new_name = node.get('name')
-            # those two differ?
-            if name != new_name:
-                # get the collections for current level
-                level_collections = levels_collections[-1]
-                # look for one with the matching name
-                for col_name, col in level_collections:
-                    # if found then change the key
-                    if name in col:
-                        col[new_name] = col.pop(name)
-                        break
-
-        # this process goes as far as registers go
-        for next_level_name, next_level_collection in next_level_collections:
-            # go in depth
-            for name, elem in next_level_collection.items():
-                # we update level collections here so that a new list is created
-                # and we don't mess up the lists from  previous calls of this
-                # recursive function
-                SVDReader._resolve_derivations(elem, name, next_level_name,
-                                               levels_collections +
-                                               [next_level_collections])
+            vertices.append((node, name, level_name, scope, parent,
+                             parent_vertex))
+            # this is now the closest derived ancestor of the children
+            parent_vertex = start
+        # path of the node, this is the scope for all of its children
+        node_scope = () if scope is None else scope + (name, )
+        # go in depth
+        for next_level_name, next_level_collection in \
+                SVDReader._next_level(node):
+            for elem_name, elem in next_level_collection.items():
+                SVDReader._collect_derivations(elem, elem_name,
+                                               next_level_name, node_scope,
+                                               node, parent_vertex, vertices,
+                                               spans)
+        # store the range
+        spans[id(node)] = (start, len(vertices))
+
+    # resolve the derivation of a single derived element (vertex) after
+    # resolving everything that it depends on: its derived ancestors, the
+    # element it derives from and all the derived elements within the latter.
+    # Every vertex is resolved exactly once, circular derivations are
+    # reported before any of the elements along the cycle gets modified
+    @staticmethod
+    def _resolve_derivation(vertex: int, graph: tuple):
+        # unpack the graph
+        vertices, spans, states, vertex_ids, index, stack = graph
+        # already resolved
+        if states[vertex] == 2:
+            return
+        # unpack the vertex
+        node, name, level_name, scope, parent, parent_vertex = vertices[vertex]
+        # got back to the vertex that is being resolved?
+        if states[vertex] == 1:
+            # show the whole loop
+            cycle = stack[stack.index(vertex):] + [vertex]
+            raise Exception("Circular derivation: " + " -> ".join(
+                ".".join(vertices[v][3] + (vertices[v][1], )) for v in cycle))
+        # mark as being resolved
+        states[vertex] = 1
+        stack.append(vertex)
+        # derived ancestors go first since the element we derive from may be
+        # one that the ancestor inherits
+        if parent_vertex is not None:
+            SVDReader._resolve_derivation(parent_vertex, graph)
+        # get the element we derive from
+        key, base = index.locate(node['derived_from'], scope)
+        # not there (yet)? the element may only appear once the derived
+        # element along its path inherits it, so resolve these first (outer
+        # ones first) and try again
+        for depth in range(1, len(key)):
+            if base is not None:
+                break
+            _, prefix = index.locate('.'.join(key[:depth]))
+            if prefix is None:
+                break
+            prefix_vertex = vertex_ids.get(id(prefix))
+            if prefix_vertex is not None and states[prefix_vertex] != 2:
+                SVDReader._resolve_derivation(prefix_vertex, graph)
+                key, base = index.locate(node['derived_from'], scope)
+        # oops! nothing was found!
+        if base is None:
+            raise Exception(f"Path {node['derived_from']} is unreachable "
+                            f"from {'.'.join(scope)}")
+        # the element itself and everything derived within its sub-tree
+        # needs to be resolved before we can merge
+        if id(base) in vertex_ids:
+            SVDReader._resolve_derivation(vertex_ids[id(base)], graph)
+        for v in range(*spans.get(id(base), (0, 0))):
+            SVDReader._resolve_derivation(v, graph)
+        # do we have any exemptions for this level
+        exemptions = SVDReader._derivation_exemptions.get(level_name, [])
+        # merge resolved base with the element. Derived elements share all
+        # the sub-trees that they do not override with the elements they
+        # derive from. Exempted keys are neither inherited nor overwritten.
+        node.update(SVDReader._merge_elements(
+            {k: v for k, v in base.items() if k not in exemptions}, node,
+            exemptions=exemptions))
+        # sub-trees of the node were replaced by the merge, index entries
+        # below it are stale now
+        index.invalidate(scope + (name, ))
+
+        # enumerated value[s] do not need to have their name specified and
+        # so it might be a subject of change. If enumerated value 'name'
+        # field differs than the key-name that is is availabe under in the
+        # collection then we shall use the derived name
+        new_name = node.get('name')
+        # those two differ?
+        if name != new_name:
+            # look for the collection that holds the element
+            for col_name, col in SVDReader._next_level(parent):
+                # if found then change the key
+                if col.get(name) is node:
+                    col[new_name] = col.pop(name)
+                    break
+        # done
+        states[vertex] = 2
+        stack.pop()
+
+    # generate element instances based on the 'derivedFrom' property. The
+    # dependency graph of all the derived elements is built once and then the
+    # elements are resolved in dependency order, each one merged with its
+    # already resolved base. This makes the whole process linear in the number
+    # of derivations no matter how deep the derivation chains are.
+    @staticmethod
+    def _resolve_derivations(device: dict):
+        # gather all the derived elements
+        vertices, spans = [], dict()
+        SVDReader._collect_derivations(device, None, 'device', None, None,
+                                       None, vertices, spans)
+        # index of all the elements is built once for the whole device
+        index = SVDIndex(device)
+        # graph: vertices, spans, states, vertex ids, index and the stack of
+        # vertices that are being resolved
+        graph = (vertices, spans, [0] * len(vertices),
+                 {id(v[0]): i for i, v in enumerate(vertices)}, index, [])
+        # resolve all of them in document order, dependencies first
+        for vertex in range(len(vertices)):
+            SVDReader._resolve_derivation(vertex, graph)
+        # report the number of resolved derivations
+        return len(vertices)
 
     # process all the fields that have the following property: elements of lower
     # level group overwrite the elements from more general level. Currently this
     # deals with 'registerPropertiesGroup' but you can add more in the
-    # 'initial conditions'
+    # 'initial conditions'. Since sub-trees may be shared between elements
+    # (see '_merge_elements()') nodes are never modified. Instead the function
+    # returns the node itself if nothing has changed or its updated copy.
     @staticmethod
-    # TODO make functional
-    def _resolve_implicit_inheritance(node: dict, inheritance=None):
+    def _resolve_implicit_inheritance(node: dict, inheritance=None, memo=None):
         # initial conditions
         if inheritance is None:
             inheritance = {k: dict() for k in ['reg_properties']}
+        # shared nodes that are reached with the same inheritance produce the
+        # same result
+        if memo is None:
+            memo = dict()
+        # build the memo key
+        key = (id(node), tuple((k, tuple(sorted(v.items())))
+                               for k, v in inheritance.items()))
+        # already processed?
+        if key in memo:
+            return memo[key]
 
-        # dive into the hierarchy levels
-        next_level_collections = SVDReader._next_level(node)
-        # process every entry within the inheritance
-        for k in inheritance:
-            # update with what was inherited
-            SVDReader._update_elements(node[k], inheritance[k], overwrite=False)
-            # this is now our new inheritance
-            inheritance[k] = node.get(k)
-
+        # update with what was inherited, this is now our new inheritance
+        inherited = {k: SVDReader._merge_elements(node[k], inheritance[k],
+                                                  overwrite=False)
+                     for k in inheritance}
+        # all the changes made to the node
+        updates = dict(inherited)
         # process all collections
-        for next_level_name, next_level_collection in next_level_collections:
+        for next_level_name, next_level_collection in \
+                SVDReader._next_level(node):
             # this process goes as far as registers go
-            if next_level_name != 'fields':
-                # go in depth
-                for name, elem in next_level_collection.items():
-                    SVDReader._resolve_implicit_inheritance(elem, inheritance)
+            if next_level_name == 'fields':
+                continue
+            # go in depth
+            collection = {name: SVDReader._resolve_implicit_inheritance(
+                elem, inherited, memo)
+                for name, elem in next_level_collection.items()}
+            # store the collection only if any of the elements has changed
+            if any(collection[name] is not elem
+                   for name, elem in next_level_collection.items()):
+                updates[next_level_name] = collection
+        # copy-on-write
+        if any(v is not node.get(k) for k, v in updates.items()):
+            output = {**node, **updates}
+        # nothing has changed
+        else:
+            output = node
+        # store the result
+        memo[key] = output
+        # return the node with inherited data
+        return output
 
     # create an iterable that represents all strings that shall be generated
     # based on provided 'dimElementGroup' data
@@ -869,16 +1253,20 @@ class SVDReader:
         # return the resulting namespace
         return namespace
 
+    # names of the fields that hold the offset on the given level, these are
+    # updated when list elements are created
+    _dim_offsets = {
+        'peripherals': 'base_address',
+        'registers': 'offset',
+        'clusters': 'offset',
+        'fields': 'bit_offset'
+    }
+
     # create instances based on the dim information provided
     @staticmethod
     def _create_arrays_lists(node: dict, level: str):
         # level-offset field name lookup table
-        lut = {
-            'peripherals': 'base_address',
-            'registers': 'offset',
-            'clusters': 'offset',
-            'fields': 'bit_offset'
-        }
+        lut = SVDReader._dim_offsets
         # array? store the is_array flag
         if "[%s]" in node['name']:
             # new node is the exact copy of the old one
@@ -908,52 +1296,372 @@ class SVDReader:
         # return all the nodes that were created
         return output
 
-    # resolve dimensional information to produce arrays and lists
+    # resolve dimensional information to produce arrays and lists. Nodes are
+    # not modified, new ones are created only where something has changed
     @staticmethod
-    def _resolve_arrays_lists(node: dict, level_name='device'):
+    def _resolve_arrays_lists(node: dict, level_name='device', memo=None):
+        # shared nodes produce the same output
+        if memo is None:
+            memo = dict()
+        # already processed?
+        if (id(node), level_name) in memo:
+            return memo[id(node), level_name]
         # create node collection based on array/list generation
         new_nodes = SVDReader._create_arrays_lists(node, level_name)
         # process every produced output
         for new_node_name, new_node in new_nodes.items():
-            # next hierarchy level name
-            next_lvl_collections = SVDReader._next_level(new_node)
+            # underlying collections that have changed
+            updates = dict()
             # process all underlying collections
-            for next_lvl_name, next_lvl_collection in next_lvl_collections:
+            for next_lvl_name, next_lvl_collection in \
+                    SVDReader._next_level(new_node):
                 # this process goes as far as fields
-                if next_lvl_name != 'enumerated_values':
-                    # go in depth
-                    for name, elem in next_lvl_collection.items():
-                        # generate new nodes for the underlying level
-                        next_lvl_new_nodes = \
-                            SVDReader._resolve_arrays_lists(elem, next_lvl_name)
-                        # apply to what's already been generated
-                        new_node[next_lvl_name].update(next_lvl_new_nodes)
+                if next_lvl_name == 'enumerated_values':
+                    continue
+                # generated nodes that are to replace the current collection
+                collection = dict()
+                # go in depth
+                for name, elem in next_lvl_collection.items():
+                    # generate new nodes for the underlying level
+                    collection.update(SVDReader._resolve_arrays_lists(
+                        elem, next_lvl_name, memo))
+                # store the collection only if it differs from the original
+                if collection.keys() != next_lvl_collection.keys() or \
+                        any(collection[name] is not elem
+                            for name, elem in next_lvl_collection.items()):
+                    updates[next_lvl_name] = collection
+            # copy-on-write
+            if updates:
+                new_nodes[new_node_name] = {**new_node, **updates}
+        # store the result
+        memo[id(node), level_name] = new_nodes
         # return all the gathered information
-        return new_nodes if level_name != 'device' else new_nodes.popitem()[1]
+        return new_nodes if level_name != 'device' else \
+            next(iter(new_nodes.values()))
 
-    # process the device from the root of the svd document.If the processing
-    # succeeds then a dictionary will be returned in which the structure of the
-    # device will be contained. All the derivations and inheritances are getting
-    # taken care of so the dictionary will be a top-down tree (without any
-    # cycles or other funny-business). That, my dear friend should help you in
-    # cases such as generating your own *.h files for MCU projects.
+    # run all the requested resolution passes on the device dictionary as
+    # produced by '_process_device()'
     @staticmethod
-    def process(root: ET.Element, resolve_derivations=True,
-                resolve_inheritance=True, resolve_arrays_lists=True):
-        # build up the device dictionary as defined in the svd file
-        device = SVDReader._process_device(root)
+    def _resolve(device: dict, resolve_derivations=True,
+                 resolve_inheritance=True, resolve_arrays_lists=True,
+                 lazy_arrays_lists=False, model='dict', stats=None,
+                 deduplicate=False):
+        # resolve everything that ends up within the plain dictionary
+        device = SVDReader._resolve_dict(
+            device, resolve_derivations, resolve_inheritance,
+            resolve_arrays_lists and not lazy_arrays_lists, stats,
+            deduplicate)
+        # present it as requested
+        return SVDReader._present(device,
+                                  resolve_arrays_lists and lazy_arrays_lists,
+                                  model, stats)
 
+    # run the resolution passes that produce the plain dictionary. Time spent
+    # in every pass and the number of the elements it has produced are
+    # reported to 'stats' (see SVDStats) unless it is None. With
+    # 'deduplicate' set the identical sub-trees and strings of the result are
+    # shared (see 'SVDUtils.deduplicate()')
+    @staticmethod
+    def _resolve_dict(device: dict, resolve_derivations=True,
+                      resolve_inheritance=True, resolve_arrays_lists=True,
+                      stats=None, deduplicate=False):
         # resolve all derivations so that we end up with fully expanded
         # list of peripherals/registers/etc...
         if resolve_derivations:
-            SVDReader._resolve_derivations(device)
+            with SVDStats.timer(stats, 'resolve_derivations'):
+                derivations = SVDReader._resolve_derivations(device)
+            if stats is not None:
+                stats.add('derivations', derivations)
         # resolve the inheritance within the device tree according
         # to svd rules
         if resolve_inheritance:
-            SVDReader._resolve_implicit_inheritance(device)
+            memo = dict()
+            with SVDStats.timer(stats, 'resolve_implicit_inheritance'):
+                device = SVDReader._resolve_implicit_inheritance(device,
+                                                                 memo=memo)
+            if stats is not None:
+                stats.add('inheritance_nodes', len(memo))
         # # create lists and arrays!
         if resolve_arrays_lists:
-            device = SVDReader._resolve_arrays_lists(device)
+            memo = dict()
+            with SVDStats.timer(stats, 'resolve_arrays_lists'):
+                device = SVDReader._resolve_arrays_lists(device, memo=memo)
+            # count the elements generated out of the list templates
+            if stats is not None:
+                stats.add('array_elements', sum(len(v) for v in memo.values()
+                                                if len(v) > 1))
+        # count the elements of the result
+        if stats is not None:
+            stats.add_levels('resolved', device)
+        # store the identical sub-trees only once
+        if deduplicate:
+            with SVDStats.timer(stats, 'deduplicate'):
+                device, saved = SVDUtils.deduplicate(device)
+            if stats is not None:
+                stats.add('deduplicated_bytes', saved)
+        # return the processed device
+        return device
 
+    # wrap the resolved dictionary in the lazy array/list view and/or convert
+    # it to the requested model
+    @staticmethod
+    def _present(device: dict, lazy_arrays_lists=False, model='dict',
+                 stats=None):
+        # wrap the device in a view that creates arrays and lists on access.
+        # (imported here since the views depend on this very class)
+        if lazy_arrays_lists:
+            from SVDArrays import SVDArrayElement
+            device = SVDArrayElement(device)
+        # convert to the requested model
+        if model == 'objects':
+            with SVDStats.timer(stats, 'convert_model'):
+                device = SVDModel.from_dict(device)
+        # unknown model
+        elif model != 'dict':
+            raise Exception(f"Unknown model {model}")
         # return the processed device
         return device
+
+    # process the device from the root of the svd document.If the processing
+    # succeeds then a dictionary will be returned in which the structure of the
+    # device will be contained. All the derivations and inheritances are getting
+    # taken care of so the dictionary will be a top-down tree (without any
+    # cycles or other funny-business). That, my dear friend should help you in
+    # cases such as generating your own *.h files for MCU projects. With
+    # 'lazy_arrays_lists' set the arrays and lists are not expanded up-front,
+    # a read-only mapping view is returned instead which generates their
+    # elements on access (see SVDArrays). Use model='objects' to get the
+    # compact object model instead of nested dictionaries (see SVDModel).
+    # The root may also be the raw document (bytes), with 'workers' greater
+    # than one the peripherals of such document are then parsed by the pool
+    # of that many processes (an element tree that was already parsed is
+    # always processed serially). Pass SVDStats instance as 'stats' to get the
+    # time spent in every phase along with the element counts. With
+    # 'deduplicate' set the identical parts of the device are stored once.
+    # 'peripherals' and 'registers' are the filters (predicates that take the
+    # name or glob patterns) of the elements that are converted at all, with
+    # 'skip_enums' set the enumerated values are skipped. Elements that the
+    # selected ones derive from are pulled in automatically. Filtering is
+    # done serially, 'workers' are not used then.
+    @staticmethod
+    def process(root, resolve_derivations=True,
+                resolve_inheritance=True, resolve_arrays_lists=True,
+                lazy_arrays_lists=False, model='dict', workers=None,
+                stats=None, deduplicate=False, peripherals=None,
+                registers=None, skip_enums=False):
+        # build up the device dictionary as defined in the svd file
+        selection = SVDReader._selection(peripherals, registers, skip_enums)
+        with SVDStats.timer(stats, 'process_device'):
+            # raw document
+            if isinstance(root, (bytes, bytearray)):
+                device = SVDReader._process_document(bytes(root), workers,
+                                                     selection)
+            # parsed one
+            else:
+                device = SVDReader._process_device(root, selection)
+        # count what was parsed
+        if stats is not None:
+            stats.add_levels('parsed', device)
+        # return the processed device
+        return SVDReader._resolve(device, resolve_derivations,
+                                  resolve_inheritance, resolve_arrays_lists,
+                                  lazy_arrays_lists, model, stats,
+                                  deduplicate)
+
+    # walk the svd document incrementally and yield every peripheral element
+    # as soon as it is closed, followed by the (by then peripheral-less) device
+    # element. Peripherals are detached from the tree right after being
+    # consumed so that only one of them is kept in memory at any given time
+    @staticmethod
+    def _iterparse(source):
+        # elements that are currently open, root first
+        path = []
+        # go through the document
+        for event, elem in ET.iterparse(source, events=('start', 'end')):
+            # element was opened, we only need to know its parent for now
+            if event == 'start':
+                path.append(elem)
+                continue
+            # element is now complete
+            path.pop()
+            # peripheral that is a direct child of the 'peripherals' tag
+            if elem.tag == 'peripheral' and path and \
+                    path[-1].tag == 'peripherals':
+                yield elem
+                # detach the finished subtree and release its contents
+                path[-1].remove(elem)
+                elem.clear()
+            # root element got closed which means that we are done
+            elif not path:
+                yield elem
+
+    # iterate over all the peripherals of the svd file (path or file object)
+    # without building the whole element tree first. Yields tuples in format:
+    # (peripheral_name, peripheral_dict). Note that no derivations,
+    # inheritances or arrays are resolved since these require the knowledge of
+    # the whole device
+    @staticmethod
+    def iter_peripherals(source):
+        # process the peripherals one by one as they come
+        for elem in SVDReader._iterparse(source):
+            if elem.tag == 'peripheral':
+                yield SVDReader._process_peripheral(elem)
+
+    # streaming counterpart of 'process()' that takes the svd file (path or
+    # file object) instead of the parsed xml root. The xml tree is never held
+    # in memory as a whole, only the resulting dictionary is.
+    @staticmethod
+    def process_stream(source, resolve_derivations=True,
+                       resolve_inheritance=True, resolve_arrays_lists=True,
+                       lazy_arrays_lists=False, model='dict', stats=None,
+                       deduplicate=False):
+        # peripherals are gathered as they come, device element comes last
+        peripherals, root = dict(), None
+        # go through the document (parsing and conversion are interleaved)
+        with SVDStats.timer(stats, 'parse_process_device'):
+            for elem in SVDReader._iterparse(source):
+                # process peripheral data
+                if elem.tag == 'peripheral':
+                    p_name, p_data = SVDReader._process_peripheral(elem)
+                    # store within the device
+                    peripherals[p_name] = p_data
+                # this is the root
+                else:
+                    root = elem
+            # build up the device dictionary from what is left of the tree
+            device = SVDReader._process_device(root)
+            # put the peripherals back in place
+            device['peripherals'] = peripherals
+        # count what was parsed
+        if stats is not None:
+            stats.add_levels('parsed', device)
+        # return the processed device
+        return SVDReader._resolve(device, resolve_derivations,
+                                  resolve_inheritance, resolve_arrays_lists,
+                                  lazy_arrays_lists, model, stats,
+                                  deduplicate)
+
+    # load and process the svd file under given path. With 'cache_dir' set
+    # the processed device is stored within the on-disk cache (see SVDCache)
+    # and subsequent loads of the same document with the same options skip
+    # the parsing and resolution altogether. 'cache_size' limits the total
+    # size of the cache in bytes.
+    @staticmethod
+    def load(path: str, cache_dir=None, resolve_derivations=True,
+             resolve_inheritance=True, resolve_arrays_lists=True,
+             lazy_arrays_lists=False, model='dict',
+             cache_size=256 * 1024 * 1024, workers=None, stats=None,
+             deduplicate=False):
+        # plain dictionary is cached, lazy views are created after loading
+        eager = resolve_arrays_lists and not lazy_arrays_lists
+        # read the whole document
+        with SVDStats.timer(stats, 'read'):
+            with open(path, 'rb') as f:
+                data = f.read()
+        # try the cache first
+        device, cache = None, None
+        if cache_dir is not None:
+            with SVDStats.timer(stats, 'cache_get'):
+                cache = SVDCache(cache_dir, cache_size)
+                key = SVDCache.key(data,
+                                   resolve_derivations=resolve_derivations,
+                                   resolve_inheritance=resolve_inheritance,
+                                   resolve_arrays_lists=eager,
+                                   deduplicate=deduplicate)
+                device = cache.get(key)
+            if stats is not None:
+                stats.add('cache_hits' if device is not None else
+                          'cache_misses')
+        # not cached, do the processing
+        if device is None:
+            with SVDStats.timer(stats, 'process_device'):
+                device = SVDReader._process_document(data, workers)
+            if stats is not None:
+                stats.add_levels('parsed', device)
+            device = SVDReader._resolve_dict(device, resolve_derivations,
+                                             resolve_inheritance, eager,
+                                             stats, deduplicate)
+            # store for the next time
+            if cache is not None:
+                with SVDStats.timer(stats, 'cache_put'):
+                    cache.put(key, device)
+        # return the processed device
+        return SVDReader._present(device,
+                                  resolve_arrays_lists and lazy_arrays_lists,
+                                  model, stats)
+
+    # describe the exception the way 'process_many()' reports the errors,
+    # called from within the 'except' clause
+    @staticmethod
+    def _batch_error(e: Exception):
+        # imported here as this is only needed for the batch processing
+        import traceback
+        return {
+            'type': type(e).__name__,
+            'message': str(e),
+            'traceback': traceback.format_exc()
+        }
+
+    # load and process a single file for 'process_many()'. Never raises: the
+    # outcome is reported as a dictionary with the path, the device (None on
+    # failure or when only the 'summary' is asked for), the summary of the
+    # device (its name and the number of peripherals, None on failure), the
+    # error (None on success) and the processing time
+    @staticmethod
+    def _process_file(path: str, options: dict, summary_only=False):
+        # imported here as this is only needed for the batch processing
+        import time
+        # start the clock
+        start = time.perf_counter()
+        device, summary, error = None, None, None
+        # try to load the device
+        try:
+            device = SVDReader.load(path, **options)
+            summary = {'name': device.get('name'),
+                       'peripherals': len(device['peripherals'])}
+        # report what went wrong
+        except Exception as e:
+            error = SVDReader._batch_error(e)
+        # return the outcome
+        return {
+            'path': path,
+            'device': None if summary_only else device,
+            'summary': summary,
+            'error': error,
+            'elapsed': time.perf_counter() - start
+        }
+
+    # load and process many files (see 'load()' for the options). With
+    # 'workers' greater than one the files are spread over the pool of that
+    # many processes. Results (see '_process_file()') are yielded as soon as
+    # the files are done, so the order is not the order of 'paths'. Files that
+    # fail to process do not stop the batch, their errors are reported within
+    # the results instead. The same goes for the failures of the pool (e.g.
+    # the worker killed by the system), the elapsed time of such files is
+    # None. With 'summary_only' set the devices are not returned (nor sent
+    # back from the workers), only their summaries are
+    @staticmethod
+    def process_many(paths, workers=None, summary_only=False, **options):
+        # process within this very process
+        if not workers or workers <= 1:
+            for path in paths:
+                yield SVDReader._process_file(path, options, summary_only)
+            return
+        # imported here as this is only needed for the parallel processing
+        from concurrent.futures import ProcessPoolExecutor, as_completed
+        # spread the files over the pool
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(SVDReader._process_file, path, options,
+                                       summary_only): path
+                       for path in paths}
+            # report the results as they come
+            for future in as_completed(futures):
+                try:
+                    result = future.result()
+                # pool itself has failed, the file is reported as failed
+                except Exception as e:
+                    result = {'path': futures[future], 'device': None,
+                              'summary': None,
+                              'error': SVDReader._batch_error(e),
+                              'elapsed': None}
+                yield result
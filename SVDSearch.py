@@ -0,0 +1,287 @@
+import heapq
+from bisect import bisect_left, insort
+from collections import Counter
+from itertools import chain
+from SVDIndex import SVDIndex
+
+
+# trigram index of the texts: every text is split into (lowercase) trigrams
+# and every trigram refers to all the texts that contain it, shortest ones
+# first. Every text holds the set of the ids of the symbols that it belongs
+# to, texts are dropped as soon as these are gone
+class _TrigramIndex:
+    # underscores separate the words just like the spaces do
+    _separators = str.maketrans("_", " ")
+
+    def __init__(self):
+        # trigram -> sorted list of (number of trigrams, text)
+        self._postings = dict()
+        # text -> [set of symbol ids, set of trigrams]
+        self._texts = dict()
+        # lists of texts are kept sorted, unless these are built in bulk
+        self._sorted = True
+
+    # trigrams of the text, padded so that the beginning (and the end) of
+    # the text (and of every word) count as well
+    @staticmethod
+    def trigrams(text: str, pad_end=True):
+        text = text.lower().translate(_TrigramIndex._separators)
+        text = f" {text} " if pad_end else f" {text}"
+        return frozenset(text[i:i + 3] for i in range(len(text) - 2))
+
+    # add the text of the symbol
+    def add(self, text: str, sid: int):
+        entry = self._texts.get(text)
+        # new text
+        if entry is None:
+            trigrams = self.trigrams(text)
+            entry = self._texts[text] = [set(), trigrams]
+            key = (len(trigrams), text)
+            for t in trigrams:
+                postings = self._postings.setdefault(t, [])
+                if self._sorted:
+                    insort(postings, key)
+                else:
+                    postings.append(key)
+        entry[0].add(sid)
+
+    # add the texts in bulk: lists are sorted once, when 'sorted' is set back
+    def bulk(self, sorted_lists: bool):
+        if sorted_lists and not self._sorted:
+            for postings in self._postings.values():
+                postings.sort()
+        self._sorted = sorted_lists
+
+    # remove the text of the symbol
+    def remove(self, text: str, sid: int):
+        entry = self._texts[text]
+        entry[0].discard(sid)
+        # last one gone
+        if not entry[0]:
+            del self._texts[text]
+            key = (len(entry[1]), text)
+            for t in entry[1]:
+                postings = self._postings[t]
+                del postings[bisect_left(postings, key)]
+                if not postings:
+                    del self._postings[t]
+
+    # symbol ids of the text
+    def symbols(self, text: str):
+        return self._texts[text][0]
+
+    # yield (text, number of shared trigrams, number of trigrams) of the
+    # texts that contain all the trigrams, shortest first. Only the shortest
+    # list of texts is walked
+    def containing(self, trigrams: frozenset):
+        lists = [self._postings.get(t) for t in trigrams]
+        # some trigram is not present at all
+        if not lists or None in lists:
+            return
+        for size, text in min(lists, key=len):
+            if trigrams <= self._texts[text][1]:
+                yield text, len(trigrams), size
+
+    # yield (text, 1, number of trigrams) of the texts that have a word
+    # starting with the prefix that is too short for a trigram (a single
+    # character), shortest first. Lists of all the trigrams that start the
+    # same way are merged
+    def starting(self, prefix: str):
+        head = f" {prefix}"
+        lists = [postings for t, postings in self._postings.items()
+                 if t.startswith(head)]
+        # same text may be in more of these, duplicates come one after another
+        last = None
+        for size, text in heapq.merge(*lists):
+            if text != last:
+                last = text
+                yield text, 1, size
+
+    # yield (text, number of shared trigrams, number of trigrams) of the
+    # texts that share the most trigrams with the query, 'count' at most
+    def sharing(self, trigrams: frozenset, count: int):
+        shared = Counter(chain.from_iterable(
+            self._postings.get(t, ()) for t in trigrams))
+        for (size, text), n in shared.most_common(count):
+            yield text, n, size
+
+    # number of the distinct texts
+    def __len__(self):
+        return len(self._texts)
+
+
+# fuzzy search over the names of all the elements of the device (as produced
+# by the svd parser): peripherals, clusters, registers, fields and
+# enumerations (anonymous ones are skipped), and optionally their
+# descriptions. Names are kept within the trigram index, every distinct name
+# once, so the query only touches the names that share any trigram with it.
+# Names are ranked by the similarity of their trigram sets, exact, prefix and
+# substring matches come first. Descriptions are ranked by the part of the
+# query trigrams these contain, with the lower weight. Symbols of every
+# peripheral are tracked separately so that a changed peripheral may be
+# re-indexed on its own.
+class SVDSearch:
+    # names of the collections that form the levels of hierarchy below the
+    # peripherals (same as in SVDIndex)
+    _collections = SVDIndex._collections[1:]
+    # weight of the description matches relative to the name matches
+    _description_weight = 0.5
+    # bonuses of the names that equal, start with or contain the query
+    _exact_bonus, _prefix_bonus, _substring_bonus = 1.0, 0.5, 0.25
+    # least number of the candidate texts that are scored
+    _candidates = 64
+
+    # build the index for the device, with 'descriptions' set these are
+    # searched as well
+    def __init__(self, device: dict, descriptions=False):
+        self.descriptions = descriptions
+        # symbol id -> (path, level, node)
+        self._symbols = dict()
+        # peripheral name -> list of symbol ids
+        self._peripherals = dict()
+        # names and descriptions
+        self._names, self._texts = _TrigramIndex(), _TrigramIndex()
+        # next symbol id
+        self._next = 0
+        # index all the peripherals, in bulk
+        self._names.bulk(False)
+        self._texts.bulk(False)
+        for name, peripheral in (device.get('peripherals') or {}).items():
+            self.update(name, peripheral)
+        self._names.bulk(True)
+        self._texts.bulk(True)
+
+    # add the symbol, returns its id
+    def _add(self, path: str, level: str, node: dict):
+        sid, self._next = self._next, self._next + 1
+        self._symbols[sid] = (path, level, node)
+        self._names.add(path.rsplit('.', 1)[-1], sid)
+        # description is searched as well
+        if self.descriptions and node.get('description'):
+            self._texts.add(node['description'], sid)
+        return sid
+
+    # add the symbols of the node's collections (and everything below), first
+    # one wins (clusters take precedence over registers)
+    def _add_children(self, node: dict, path: str, sids: list):
+        names = set()
+        for level in self._collections:
+            for name, elem in (node.get(level) or {}).items():
+                if name in names:
+                    continue
+                names.add(name)
+                elem_path = f"{path}.{name}"
+                # anonymous elements are not searchable, the ones within
+                # these are
+                if not name.startswith('$'):
+                    sids.append(self._add(elem_path, level, elem))
+                self._add_children(elem, elem_path, sids)
+
+    # (re-)index the peripheral, None removes it
+    def update(self, name: str, peripheral):
+        # forget the previous symbols
+        self.remove(name)
+        # nothing more to do
+        if peripheral is None:
+            return
+        # add the new ones
+        sids = [self._add(name, 'peripherals', peripheral)]
+        self._add_children(peripheral, name, sids)
+        self._peripherals[name] = sids
+
+    # remove the peripheral from the index
+    def remove(self, name: str):
+        for sid in self._peripherals.pop(name, ()):
+            path, level, node = self._symbols.pop(sid)
+            self._names.remove(path.rsplit('.', 1)[-1], sid)
+            if self.descriptions and node.get('description'):
+                self._texts.remove(node['description'], sid)
+
+    # return up to 'limit' best matches as the list of (score, path, node)
+    # tuples, best first (ties are ordered by the path). The query is
+    # treated as the beginning of the word, so the names are matched as the
+    # user types: names that contain all the trigrams of the query are looked
+    # for first (shortest ones first), the ones that share the most trigrams
+    # with it only if there are not enough of these. Descriptions need to
+    # contain all the trigrams of the query. A single character query has
+    # no trigrams, so the names that have a word starting with it are taken
+    # (shortest ones first) and the descriptions are not searched. 'level'
+    # limits the results to the given level of hierarchy (e.g. 'registers')
+    def search(self, query: str, limit=20, level=None):
+        q = query.lower().translate(_TrigramIndex._separators)
+        # nothing to look for
+        if not q:
+            return []
+        trigrams = _TrigramIndex.trigrams(q, pad_end=False)
+        # symbol id -> score
+        scores = dict()
+        # too short for a trigram: names with a word that starts with it
+        if not trigrams:
+            self._collect(scores, self._names.starting(q), q, 1, 1.0, limit,
+                          level)
+        # names that contain the query
+        else:
+            found = self._collect(scores, self._names.containing(trigrams),
+                                  q, len(trigrams), 1.0, limit, level)
+            # fuzzy matches if needed
+            if found < limit:
+                self._collect(scores, self._names.sharing(
+                    trigrams, self._candidates), q, len(trigrams), 1.0, limit,
+                    level)
+        # descriptions
+        if self.descriptions and trigrams:
+            self._collect(scores, self._texts.containing(trigrams), None,
+                          len(trigrams), self._description_weight, limit,
+                          level)
+        # best symbols first
+        best = heapq.nsmallest(limit, ((-score, self._symbols[sid][0], sid)
+                                       for sid, score in scores.items()))
+        return [(-score, path, self._symbols[sid][2])
+                for score, path, sid in best]
+
+    # score the symbols of the candidate (text, shared trigrams, trigrams)
+    # tuples and store the best scores, 'count' is the number of the query
+    # trigrams. Names ('q' is the lowercase query) are scored by the
+    # similarity of the trigram sets (jaccard) with the bonuses,
+    # descriptions ('q' is None) by the part of the query these contain.
+    # Candidates come roughly in the order of the scores, so these are taken
+    # until there are 'limit' symbols (of given level) and at least
+    # '_candidates' texts were seen. Returns the number of the symbols
+    def _collect(self, scores: dict, candidates, q, count: int, weight: float,
+                 limit: int, level):
+        found, seen = 0, 0
+        index = self._texts if q is None else self._names
+        for text, shared, size in candidates:
+            # enough
+            if found >= limit and seen >= self._candidates:
+                break
+            seen += 1
+            # descriptions: part of the query that these contain
+            if q is None:
+                score = weight * shared / count
+            # names: similarity with the bonuses
+            else:
+                score = weight * shared / (count + size - shared)
+                lower = text.lower().translate(_TrigramIndex._separators)
+                if lower == q:
+                    score += self._exact_bonus
+                elif lower.startswith(q):
+                    score += self._prefix_bonus
+                elif q in lower:
+                    score += self._substring_bonus
+            # symbols of the text (all have the same score) in the order of
+            # their paths, as many as these are needed: ties are ordered by
+            # the path
+            taken = heapq.nsmallest(
+                limit, (sid for sid in index.symbols(text)
+                        if level is None or self._symbols[sid][1] == level),
+                key=lambda sid: self._symbols[sid][0])
+            for sid in taken:
+                if score > scores.get(sid, 0):
+                    scores[sid] = score
+            found += len(taken)
+        return found
+
+    # number of the indexed symbols
+    def __len__(self):
+        return len(self._symbols)
@@ -0,0 +1,403 @@
+import os
+import re
+import sys
+import json
+import socket
+import asyncio
+import hashlib
+import argparse
+import xml.etree.ElementTree as ET
+from collections import OrderedDict
+from SVDReader import SVDReader
+from SVDIndex import SVDIndex
+from SVDAddressMap import AddressMap
+
+
+# long-running lookup daemon: keeps the processed devices in memory and serves
+# the lookups over the unix domain socket, so that the short-lived tools do
+# not need to parse the same svd file over and over again. The protocol is a
+# json-lines one: every request is a single line with the json object that
+# holds the operation ('op'), the path of the svd file ('path') and the
+# operation's parameters, every response is a single line with
+# {"ok": true, "result": ...} or {"ok": false, "error": "..."} (the request's
+# 'id' is echoed back if present). Operations are:
+#   peripheral  - peripheral by its 'name'
+#   register    - any element by its fully qualified 'name', e.g. 'TIM0.CR1'
+#   address     - register at the 'address' along with the layout of fields
+#   decode      - split the 'value' of the register (given by 'name' or
+#                 'address') into its fields and their enumerated values
+#   stats       - number of devices and bytes held, hits and misses
+# Elements may be trimmed with 'depth' (collections below it are replaced with
+# the lists of names). Elements of the arrays may be named with their indices
+# (e.g. 'TIM1.CH[1].CCR', as reported by 'address'). Devices are kept within
+# the LRU keyed by the real path of the file and the hash of its contents, the
+# total (estimated) size of these is bounded. A file is only hashed again once
+# its modification time or size changes. Run as: python -m SVDServer --help
+class SVDServer:
+    # names of the collections that form the levels of hierarchy (same as in
+    # SVDIndex)
+    _collections = SVDIndex._collections
+    # name of the array element, e.g. 'CH[1]'
+    _array_element = re.compile(r"(.*)\[(\d+)\]")
+
+    # create the server listening on 'socket_path', 'max_bytes' is the limit of
+    # the total size of the devices held in memory, 'options' are passed to
+    # 'SVDReader.process()'
+    def __init__(self, socket_path: str, max_bytes=512 * 1024 * 1024,
+                 **options):
+        self.socket_path = socket_path
+        self.max_bytes = max_bytes
+        self.options = options
+        # (real path, content hash) -> entry (device, index, address map,
+        # size), least recently used first
+        self._devices = OrderedDict()
+        # real path -> ((modification time, size), key) of the last load
+        self._stamps = dict()
+        # key -> future of the device being loaded
+        self._loading = dict()
+        # total size of the entries and the counters
+        self.size, self.hits, self.misses = 0, 0, 0
+        # operation name -> handler
+        self._operations = {
+            'peripheral': self._peripheral,
+            'register': self._register,
+            'address': self._address,
+            'decode': self._decode,
+        }
+
+    # estimated size (in bytes) of the value and everything it refers to,
+    # 'seen' holds the ids of the objects that were already counted (shared
+    # sub-trees are counted once)
+    @staticmethod
+    def _footprint(value, seen: set):
+        size, stack = 0, [value]
+        while stack:
+            value = stack.pop()
+            if id(value) in seen:
+                continue
+            seen.add(id(value))
+            size += sys.getsizeof(value)
+            # go in depth
+            if isinstance(value, dict):
+                stack.extend(value.keys())
+                stack.extend(value.values())
+            elif isinstance(value, (list, tuple, set, frozenset)):
+                stack.extend(value)
+        return size
+
+    # read and process the file, build the lookup structures. Runs within the
+    # executor so that the other clients are served in the meantime
+    def _load(self, path: str, data: bytes):
+        device = SVDReader.process(ET.fromstring(data), **self.options)
+        entry = {'path': path, 'device': device, 'index': SVDIndex(device),
+                 'address_map': AddressMap(device)}
+        # everything the entry holds, shared nodes counted once
+        entry['size'] = self._footprint(
+            [device, vars(entry['index']), vars(entry['address_map'])], set())
+        return entry
+
+    # read the file and hash its contents
+    @staticmethod
+    def _read(path: str):
+        with open(path, 'rb') as f:
+            data = f.read()
+        return data, hashlib.sha256(data).hexdigest()
+
+    # drop the least recently used entries until the total size fits within
+    # the limit, the most recent one is always kept
+    def _evict(self):
+        while self.size > self.max_bytes and len(self._devices) > 1:
+            _, entry = self._devices.popitem(last=False)
+            self.size -= entry['size']
+
+    # get the entry of the device stored within the file, loading it if
+    # needed
+    async def _device(self, path: str):
+        path = os.path.realpath(path)
+        st = os.stat(path)
+        stamp = (st.st_mtime_ns, st.st_size)
+        # file has not changed since the last time
+        known = self._stamps.get(path)
+        if known is not None and known[0] == stamp and \
+                known[1] in self._devices:
+            self.hits += 1
+            self._devices.move_to_end(known[1])
+            return self._devices[known[1]]
+        # hash the contents
+        loop = asyncio.get_running_loop()
+        data, digest = await loop.run_in_executor(None, self._read, path)
+        key = (path, digest)
+        self._stamps[path] = (stamp, key)
+        # touched but not changed
+        if key in self._devices:
+            self.hits += 1
+            self._devices.move_to_end(key)
+            return self._devices[key]
+        # somebody else is loading it already
+        if key in self._loading:
+            return await asyncio.shield(self._loading[key])
+        # load it
+        self.misses += 1
+        future = self._loading[key] = loop.run_in_executor(None, self._load,
+                                                           path, data)
+        try:
+            entry = await future
+        finally:
+            del self._loading[key]
+        # previous contents of the file are of no use anymore
+        for old in [k for k in self._devices if k[0] == path]:
+            self.size -= self._devices.pop(old)['size']
+        # store the new one
+        self._devices[key] = entry
+        self.size += entry['size']
+        self._evict()
+        return entry
+
+    # copy of the node with the collections below 'depth' levels replaced with
+    # the lists of names, None leaves the node as it is
+    @staticmethod
+    def _trim(node: dict, depth):
+        if depth is None:
+            return node
+        trimmed = dict(node)
+        for level in SVDServer._collections:
+            collection = node.get(level)
+            if not collection:
+                continue
+            trimmed[level] = list(collection) if depth <= 0 else \
+                {name: SVDServer._trim(elem, depth - 1)
+                 for name, elem in collection.items()}
+        return trimmed
+
+    # element under the fully qualified name, None if there is none. The
+    # device only holds the arrays themselves ('TIM1.CH[%s].CCR'), so the
+    # indices of the elements are checked against the dimensions of these
+    @staticmethod
+    def _element(entry: dict, path: str):
+        index = entry['index']
+        names = path.split('.')
+        for i, name in enumerate(names):
+            match = SVDServer._array_element.fullmatch(name)
+            if match is None:
+                continue
+            # the array that holds the element
+            names[i] = match.group(1) + "[%s]"
+            array = index.get('.'.join(names[:i + 1]))
+            if array is None or int(match.group(2)) >= \
+                    ((array.get('dim') or {}).get('dim') or 0):
+                return None
+        return index.get('.'.join(names))
+
+    # addresses may be given as numbers or strings ('0x40010000')
+    @staticmethod
+    def _integer(value):
+        return int(value, 0) if isinstance(value, str) else int(value)
+
+    # peripheral by its name
+    def _peripheral(self, entry: dict, request: dict):
+        name = request['name']
+        node = None if '.' in name else self._element(entry, name)
+        if node is None:
+            raise Exception(f"No peripheral {request['name']}")
+        return self._trim(node, request.get('depth'))
+
+    # any element by its fully qualified name
+    def _register(self, entry: dict, request: dict):
+        node = self._element(entry, request['name'])
+        if node is None:
+            raise Exception(f"Path {request['name']} is unreachable within "
+                            f"the device")
+        return self._trim(node, request.get('depth'))
+
+    # register at the address
+    def _address(self, entry: dict, request: dict):
+        info = entry['address_map'].lookup(self._integer(request['address']))
+        if info is None:
+            return None
+        return {k: info[k] for k in ('path', 'address', 'size', 'fields',
+                                     'alternates')}
+
+    # split the value of the register into the fields
+    def _decode(self, entry: dict, request: dict):
+        # register given by the address
+        if request.get('address') is not None:
+            info = entry['address_map'].lookup(
+                self._integer(request['address']))
+            if info is None:
+                raise Exception(f"No register at the address "
+                                f"{request['address']}")
+            path, register = info['path'], info['node']
+        # or by the name
+        else:
+            path = request['name']
+            register = self._element(entry, path)
+            if register is None:
+                raise Exception(f"Path {path} is unreachable within the "
+                                f"device")
+        value = self._integer(request['value'])
+        # extract every field along with the name of its enumerated value
+        # (the description for the anonymous ones, their keys are made up)
+        fields = dict()
+        for name, field in (register.get('fields') or {}).items():
+            bits = (value >> (field.get('bit_offset') or 0)) & \
+                ((1 << (field.get('bit_width') or 0)) - 1)
+            enum = next((v.get('name') or v.get('description')
+                         for e in (field.get('enumerated_values') or
+                                   {}).values()
+                         for v in (e.get('enumerated_value') or {}).values()
+                         if v.get('value') == bits), None)
+            fields[name] = {'value': bits, 'enum': enum}
+        return {'path': path, 'value': value, 'fields': fields}
+
+    # serve a single request, returns the response
+    async def _serve(self, request: dict):
+        op = request.get('op')
+        # server itself
+        if op == 'stats':
+            return {'devices': len(self._devices), 'bytes': self.size,
+                    'max_bytes': self.max_bytes, 'hits': self.hits,
+                    'misses': self.misses}
+        # device lookups
+        handler = self._operations.get(op)
+        if handler is None:
+            raise Exception(f"Unknown operation {op}")
+        return handler(await self._device(request['path']), request)
+
+    # talk to a single client: one response per request line, in order
+    async def _client(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                # client is gone
+                if not line:
+                    break
+                # skip the empty lines
+                if not line.strip():
+                    continue
+                request = None
+                try:
+                    request = json.loads(line)
+                    response = {'ok': True,
+                                'result': await self._serve(request)}
+                # report what went wrong, the connection stays open
+                except Exception as e:
+                    response = {'ok': False,
+                                'error': f"{type(e).__name__}: {e}"}
+                # echo the id back
+                if isinstance(request, dict) and 'id' in request:
+                    response['id'] = request['id']
+                writer.write(json.dumps(response, separators=(',', ':'))
+                             .encode() + b'\n')
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    # listen on the socket and serve the clients until cancelled
+    async def serve(self):
+        # remove the socket left behind by the previous run
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        # no limit on the line length: elements may be big
+        server = await asyncio.start_unix_server(self._client,
+                                                 self.socket_path,
+                                                 limit=2 ** 31 - 1)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+
+    # parse the command line and run the server
+    @staticmethod
+    def main(argv=None):
+        # build the parser
+        parser = argparse.ArgumentParser(
+            prog="python -m SVDServer",
+            description="Serve the lookups of svd devices over a unix socket")
+        parser.add_argument('-s', '--socket', default='svd.sock',
+                            help="path of the unix domain socket")
+        parser.add_argument('--max-bytes', type=int,
+                            default=512 * 1024 * 1024,
+                            help="limit of the memory held by the devices")
+        parser.add_argument('--no-derivations', action='store_true',
+                            help="do not resolve the derivations")
+        parser.add_argument('--no-inheritance', action='store_true',
+                            help="do not resolve the implicit inheritance")
+        parser.add_argument('--deduplicate', action='store_true',
+                            help="store identical sub-trees only once")
+        args = parser.parse_args(argv)
+        # run until interrupted
+        server = SVDServer(args.socket, args.max_bytes,
+                           resolve_derivations=not args.no_derivations,
+                           resolve_inheritance=not args.no_inheritance,
+                           deduplicate=args.deduplicate)
+        try:
+            asyncio.run(server.serve())
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+
+# blocking client of the lookup daemon for the short-lived tools: a single
+# connection is kept open and every request waits for its response
+class SVDClient:
+    # connect to the server listening on 'socket_path'
+    def __init__(self, socket_path: str, timeout=None):
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._socket.settimeout(timeout)
+        self._socket.connect(socket_path)
+        self._file = self._socket.makefile('rb')
+
+    # send the request, return the result or raise the exception with the
+    # error reported by the server
+    def request(self, op: str, **params):
+        self._socket.sendall(json.dumps({'op': op, **params}).encode() +
+                             b'\n')
+        line = self._file.readline()
+        # server is gone
+        if not line:
+            raise Exception("Connection closed by the server")
+        response = json.loads(line)
+        if not response['ok']:
+            raise Exception(response['error'])
+        return response['result']
+
+    # peripheral by its name
+    def peripheral(self, path: str, name: str, depth=None):
+        return self.request('peripheral', path=path, name=name, depth=depth)
+
+    # any element by its fully qualified name
+    def register(self, path: str, name: str, depth=None):
+        return self.request('register', path=path, name=name, depth=depth)
+
+    # register at the address (None if there is none)
+    def address(self, path: str, address: int):
+        return self.request('address', path=path, address=address)
+
+    # fields of the register value, register is given by the name or address
+    def decode(self, path: str, value: int, name=None, address=None):
+        return self.request('decode', path=path, value=value, name=name,
+                            address=address)
+
+    # statistics of the server
+    def stats(self):
+        return self.request('stats')
+
+    # close the connection
+    def close(self):
+        self._file.close()
+        self._socket.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# run from the command line
+if __name__ == '__main__':
+    sys.exit(SVDServer.main())
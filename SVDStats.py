@@ -0,0 +1,88 @@
+import time
+
+
+# context manager that does nothing, used when the statistics are disabled
+class _NoTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+# context manager that adds the time spent within to the phase
+class _Timer:
+    __slots__ = ('_stats', '_name', '_start')
+
+    def __init__(self, stats, name: str):
+        self._stats, self._name = stats, name
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._stats.add_time(self._name, time.perf_counter() - self._start)
+        return False
+
+
+# statistics gathered while processing the device: wall time of every phase
+# and the counters (elements per hierarchy level, derivations resolved, ...).
+# Pass the instance as 'stats' to 'SVDReader.process()' (and the others) or
+# 'SVDWriter.process()'. Nothing is gathered (and nothing is spent on it) when
+# 'stats' is None, so the instrumentation may stay in the code permanently.
+class SVDStats:
+    # the one and only no-op timer
+    _no_timer = _NoTimer()
+    # hierarchy levels that hold collections of elements
+    _levels = ('peripherals', 'clusters', 'registers', 'fields',
+               'enumerated_values', 'enumerated_value', 'interrupts')
+
+    # start with nothing measured
+    def __init__(self):
+        # phase name -> seconds
+        self.phases = dict()
+        # counter name -> value
+        self.counts = dict()
+
+    # get the timer of the phase for given statistics (which may be None)
+    @staticmethod
+    def timer(stats, name: str):
+        return SVDStats._no_timer if stats is None else _Timer(stats, name)
+
+    # add time to the phase
+    def add_time(self, name: str, seconds: float):
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    # add to the counter
+    def add(self, name: str, n=1):
+        self.counts[name] = self.counts.get(name, 0) + n
+
+    # count the elements of all the hierarchy levels of the node, counters are
+    # named 'prefix.level'. Shared sub-trees are counted every time they are
+    # reached, as these are logically separate elements.
+    def add_levels(self, prefix: str, node):
+        for level, collection in node.items():
+            # only the collections of elements are of interest
+            if level not in SVDStats._levels:
+                continue
+            self.add(f"{prefix}.{level}", len(collection))
+            # go in depth
+            for elem in collection.values():
+                self.add_levels(prefix, elem)
+
+    # total count of the elements of all the levels with given prefix
+    def total(self, prefix: str):
+        return sum(v for k, v in self.counts.items()
+                   if k.startswith(prefix + "."))
+
+    # all the statistics as a (json friendly) dictionary
+    def as_dict(self):
+        return {'phases': dict(self.phases), 'counts': dict(self.counts)}
+
+    # human readable form
+    def __str__(self):
+        lines = [f"{name}: {seconds * 1000:.3f} ms"
+                 for name, seconds in self.phases.items()]
+        lines += [f"{name}: {value}" for name, value in self.counts.items()]
+        return "\n".join(lines)
@@ -1,5 +1,6 @@
 import copy
 import re
+import sys
 
 # utility class
 class SVDUtils:
@@ -70,4 +71,74 @@ class SVDUtils:
         # return the constructed block
         return dim
 
+    # replace the value with its canonical (structurally identical) copy
+    # from the table. Dictionaries and lists are processed bottom-up so that
+    # by the time the node is looked up all of its children are canonical
+    # already and the node can be identified by its scalar values and the
+    # identities of its children. 'seen' maps ids of the processed nodes to
+    # their canonical copies, 'saved' is the list holding the single number of
+    # bytes that were released.
+    @staticmethod
+    def _hash_cons(value, table: dict, seen: dict, saved: list):
+        # strings are interned as they are
+        if isinstance(value, str):
+            canonical = table.setdefault((str, value), value)
+            if canonical is not value:
+                saved[0] += sys.getsizeof(value)
+            return canonical
+        # containers
+        if isinstance(value, (dict, list)):
+            # shared sub-trees are processed once
+            if id(value) in seen:
+                return seen[id(value)]
+            # make the children canonical, build up the key as we go
+            if isinstance(value, dict):
+                for k, v in value.items():
+                    c = SVDUtils._hash_cons(v, table, seen, saved)
+                    if c is not v:
+                        value[k] = c
+                key = (dict, tuple(
+                    (k, SVDUtils._identity(v)) for k, v in value.items()))
+            else:
+                value[:] = [SVDUtils._hash_cons(v, table, seen, saved)
+                            for v in value]
+                key = (list, tuple(SVDUtils._identity(v) for v in value))
+            # look for the identical node
+            canonical = table.setdefault(key, value)
+            # this one is a duplicate that can be released
+            if canonical is not value:
+                saved[0] += sys.getsizeof(value)
+            # remember the result
+            seen[id(value)] = canonical
+            return canonical
+        # everything else stays as it is
+        return value
+
+    # part of the key that identifies the (canonical) value: containers and
+    # strings by their identity, other values by their type and value (so
+    # that e.g. True and 1 do not get mixed up)
+    @staticmethod
+    def _identity(value):
+        if isinstance(value, (dict, list, str)):
+            return id(value)
+        return type(value), value
 
+    # hash-cons the device: structurally identical sub-trees (enumerated
+    # values, register properties, whole registers, ...) and equal strings
+    # (descriptions, names) are stored only once and shared. The device is
+    # modified in place (only the values are replaced with the identical ones,
+    # so this is safe for the sub-trees shared by the derivations). Pass the
+    # same 'table' when processing more devices to share their contents as
+    # well, note that the table keeps all the canonical values alive. Returns
+    # the device (which may be shared as well!) and the number of bytes
+    # released.
+    @staticmethod
+    def deduplicate(device: dict, table=None):
+        # start with an empty table
+        if table is None:
+            table = dict()
+        # process the whole device
+        saved = [0]
+        device = SVDUtils._hash_cons(device, table, dict(), saved)
+        # return the device and the number of bytes released
+        return device, saved[0]
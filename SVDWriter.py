@@ -1,4 +1,129 @@
 import xml.etree.ElementTree as ET
+from collections.abc import Mapping
+from xml.sax.saxutils import escape
+from SVDStats import SVDStats
+
+
+# sink that builds the element tree out of the events produced by the writer
+class _TreeSink:
+    # start with an empty tree
+    def __init__(self):
+        # elements that are currently open
+        self._stack = []
+        # root of the tree (available once it is closed)
+        self.root = None
+        # number of the elements produced
+        self.elements = 0
+
+    # open the element
+    def start(self, tag: str, attrib=None):
+        # sub-element of the currently open one or the root
+        if self._stack:
+            elem = ET.SubElement(self._stack[-1], tag, attrib or {})
+        else:
+            elem = ET.Element(tag, attrib or {})
+        # this one is open now
+        self._stack.append(elem)
+        self.elements += 1
+
+    # element without any sub-elements
+    def leaf(self, tag: str, text: str):
+        ET.SubElement(self._stack[-1], tag).text = text
+        self.elements += 1
+
+    # close the most recently opened element
+    def end(self):
+        self.root = self._stack.pop()
+
+
+# sink that writes the xml text as the events come using the 'write' function
+# (that takes strings). Output is the same as the one produced by serializing
+# the tree built by '_TreeSink' (after '_make_pretty' if 'indentation' is
+# given) but nothing is kept in memory besides the small write buffer.
+class _StreamSink:
+    # attribute values have some more characters escaped
+    _attrib_entities = {'"': "&quot;", "\r": "&#13;", "\n": "&#10;",
+                        "\t": "&#09;"}
+
+    # set up the sink, 'indentation' of None means no pretty printing
+    def __init__(self, write, indentation=None, buffer_size=64 * 1024):
+        self._write = write
+        self._indentation = indentation
+        self._buffer_size = buffer_size
+        # pending output and its length
+        self._buffer, self._buffered = [], 0
+        # open elements: [tag, has sub-elements]
+        self._stack = []
+        # number of the elements produced
+        self.elements = 0
+
+    # add text to the output
+    def _emit(self, text: str):
+        self._buffer.append(text)
+        self._buffered += len(text)
+        # time to write?
+        if self._buffered >= self._buffer_size:
+            self.flush()
+
+    # xml declaration, goes before the root element
+    def declaration(self, encoding: str):
+        self._emit(f"<?xml version='1.0' encoding='{encoding}'?>\n")
+
+    # write whatever is pending
+    def flush(self):
+        if self._buffer:
+            self._write("".join(self._buffer))
+            self._buffer, self._buffered = [], 0
+
+    # prepare the parent for the new sub-element: close its start tag if this
+    # is the first sub-element and put the indentation in place
+    def _child(self):
+        # nothing to do for the root
+        if not self._stack:
+            return
+        # first sub-element closes the start tag of the parent
+        parent = self._stack[-1]
+        if not parent[1]:
+            self._emit(">")
+            parent[1] = True
+        # indent
+        if self._indentation is not None:
+            self._emit("\n" + self._indentation * len(self._stack))
+
+    # open the element
+    def start(self, tag: str, attrib=None):
+        self._child()
+        # start tag is left open until we know if there are any sub-elements
+        self._emit("<" + tag + "".join(
+            f' {k}="{escape(str(v), self._attrib_entities)}"'
+            for k, v in (attrib or {}).items()))
+        self._stack.append([tag, False])
+        self.elements += 1
+
+    # element without any sub-elements
+    def leaf(self, tag: str, text: str):
+        self._child()
+        # elements without text are self-closing
+        if text:
+            self._emit(f"<{tag}>{escape(text)}</{tag}>")
+        else:
+            self._emit(f"<{tag} />")
+        self.elements += 1
+
+    # close the most recently opened element
+    def end(self):
+        tag, has_children = self._stack.pop()
+        # self-closing element
+        if not has_children:
+            self._emit(" />")
+        # end tag goes to its own line
+        else:
+            if self._indentation is not None:
+                self._emit("\n" + self._indentation * len(self._stack))
+            self._emit(f"</{tag}>")
+        # the whole document is done
+        if not self._stack and self._indentation is not None:
+            self._emit("\n")
 
 
 # class for writing the svd files from dictionary produced by the svd
@@ -51,14 +176,14 @@ class SVDWriter:
             if level and (not elem.tail or not elem.tail.strip()):
                 elem.tail = i
 
-    # populates an xml tree with elements with data from dictionary after
-    # mapping and conversion. conversion is a dict keyed by the field names
+    # emits the elements with data from dictionary after mapping and
+    # conversion to the sink. conversion is a dict keyed by the field names
     # from the data dictionary and contains tuples as values in form:
     # (xml_node_name, conversion function (None for str(x) conversion)).
     # If a key does not exist in 'conversions' then the value is rewritten to
     # xml one-to-one basis
     @staticmethod
-    def _build_tree(tree: ET.Element, data: dict, conversions: dict):
+    def _build_tree(sink, data: dict, conversions: dict):
         # do the conversion
         for name, v in conversions.items():
             # no data
@@ -81,19 +206,23 @@ class SVDWriter:
             # defaults
             xml_name = xml_name or name
             xml_conv = xml_conv or SVDWriter._convert_str
-            # build up the sub-element
-            se = ET.SubElement(tree, xml_name)
-            # set text value
-            se.text = xml_conv(data[name])
-        # return the tree
-        return tree
+            # emit the sub-element with its text value
+            sink.leaf(xml_name, xml_conv(data[name]))
+
+    # attributes of the element that may be derived
+    @staticmethod
+    def _derivation_attrib(node: dict):
+        # got the derivation set-up?
+        if not node.get('fully_defined') and node.get('derived_from'):
+            return {'derivedFrom': node['derived_from']}
+        # no attributes
+        return None
 
     # fill the information regarding the registerPropertiesGroup type
     @staticmethod
-    def _append_register_properties_group(xml: ET.Element,
-                                          reg_properties: dict):
+    def _append_register_properties_group(sink, reg_properties: dict):
         # build tree
-        SVDWriter._build_tree(xml, reg_properties, {
+        SVDWriter._build_tree(sink, reg_properties, {
             'size': None,
             'reset_value': ('resetValue', SVDWriter._convert_hex),
             'reset_mask': ('resetMask', SVDWriter._convert_hex)
@@ -101,9 +230,9 @@ class SVDWriter:
 
     # fill the dimensional information
     @staticmethod
-    def _append_dim_element_group(xml: ET.Element, dim: dict):
+    def _append_dim_element_group(sink, dim: dict):
         # prepare basic information
-        SVDWriter._build_tree(xml, dim, {
+        SVDWriter._build_tree(sink, dim, {
             'dim': None,
             'increment': 'dimIncrement',
             'index': ('dimIndex', SVDWriter._convert_dim_index_type)
@@ -111,47 +240,39 @@ class SVDWriter:
 
     # prepare information about a single enumerated value
     @staticmethod
-    def _populate_enumerated_value(enumerated_value: dict):
-        # return the enumerated value sub-tree
-        return SVDWriter._build_tree(ET.Element('enumeratedValue'),
-                                     enumerated_value, {
+    def _populate_enumerated_value(sink, enumerated_value: dict):
+        # emit the enumerated value sub-tree
+        sink.start('enumeratedValue')
+        SVDWriter._build_tree(sink, enumerated_value, {
             'name': None,
             'description': None,
             'value': None,
             'is_default': ('isDefault', SVDWriter._convert_bool)
         })
+        sink.end()
 
     # prepare information about a group of enumerated values
     @staticmethod
-    def _populate_enumerated_values(enumerated_values: dict):
+    def _populate_enumerated_values(sink, enumerated_values: dict):
         # create a root
-        xml_enumerated_values = ET.Element('enumeratedValues')
-        # got the derivation set-up?
-        if not enumerated_values.get('fully_defined') and \
-                enumerated_values.get('derived_from'):
-            xml_enumerated_values.set('derivedFrom',
-                                      enumerated_values['derived_from'])
+        sink.start('enumeratedValues',
+                   SVDWriter._derivation_attrib(enumerated_values))
         # build up the basic information
-        SVDWriter._build_tree(xml_enumerated_values,
-                              enumerated_values, {'name': None})
+        SVDWriter._build_tree(sink, enumerated_values, {'name': None})
         # process all fields within register
         if enumerated_values.get('enumerated_value'):
             for _, ev in enumerated_values['enumerated_value'].items():
-                xml_enumerated_values.append(
-                    SVDWriter._populate_enumerated_value(ev))
-        # return the generated tree
-        return xml_enumerated_values
+                SVDWriter._populate_enumerated_value(sink, ev)
+        # done
+        sink.end()
 
     # prepare a sub-tree containing information about a single field
     @staticmethod
-    def _populate_field(field: dict):
+    def _populate_field(sink, field: dict):
         # root element for the register
-        xml_field = ET.Element('field')
-        # got the derivation set-up?
-        if not field.get('fully_defined') and field.get('derived_from'):
-            xml_field.set('derivedFrom', field['derived_from'])
+        sink.start('field', SVDWriter._derivation_attrib(field))
         # prepare basic information
-        SVDWriter._build_tree(xml_field, field, {
+        SVDWriter._build_tree(sink, field, {
             'name': None,
             'description': None,
             'bit_offset': 'bitOffset',
@@ -160,34 +281,31 @@ class SVDWriter:
         # multiple enumerated values are supported
         if field.get('enumerated_values'):
             for _, evs in field['enumerated_values'].items():
-                xml_field.append(SVDWriter._populate_enumerated_values(evs))
-        # return the tree
-        return xml_field
+                SVDWriter._populate_enumerated_values(sink, evs)
+        # done
+        sink.end()
 
     # prepare tree of fields
     @staticmethod
-    def _populate_fields(register: dict):
+    def _populate_fields(sink, register: dict):
         # create a root
-        xml_fields = ET.Element('fields')
+        sink.start('fields')
         # process all fields within register
         for _, f in register['fields'].items():
-            xml_fields.append(SVDWriter._populate_field(f))
-        # return the generated tree
-        return xml_fields
+            SVDWriter._populate_field(sink, f)
+        # done
+        sink.end()
 
     # write a single register information
     @staticmethod
-    def _populate_register(register: dict):
+    def _populate_register(sink, register: dict):
         # root element for the register
-        xml_register = ET.Element('register')
-        # got the derivation set-up?
-        if not register.get('fully_defined') and register.get('derived_from'):
-            xml_register.set('derivedFrom', register['derived_from'])
+        sink.start('register', SVDWriter._derivation_attrib(register))
         # populate dim information
         if register.get('dim'):
-            SVDWriter._append_dim_element_group(xml_register, register['dim'])
+            SVDWriter._append_dim_element_group(sink, register['dim'])
         # prepare basic information
-        SVDWriter._build_tree(xml_register, register, {
+        SVDWriter._build_tree(sink, register, {
             'name': None,
             'description': None,
             'alternate_to': 'alternateRegister',
@@ -196,26 +314,23 @@ class SVDWriter:
         # populate registers properties information
         if register.get('reg_properties'):
             SVDWriter._append_register_properties_group(
-                xml_register, register['reg_properties'])
+                sink, register['reg_properties'])
         # store register fields
         if register.get('fields'):
-            xml_register.append(SVDWriter._populate_fields(register))
-        # return the xml representing the register
-        return xml_register
+            SVDWriter._populate_fields(sink, register)
+        # done
+        sink.end()
 
     # write cluster information (may be recursive)
     @staticmethod
-    def _populate_cluster(cluster: dict):
+    def _populate_cluster(sink, cluster: dict):
         # prepare root for the cluster
-        xml_cluster = ET.Element('cluster')
-        # got the derivation set-up?
-        if not cluster.get('fully_defined') and cluster.get('derived_from'):
-            xml_cluster.set('derivedFrom', cluster['derived_from'])
+        sink.start('cluster', SVDWriter._derivation_attrib(cluster))
         # populate dim information
         if cluster.get('dim'):
-            SVDWriter._append_dim_element_group(xml_cluster, cluster['dim'])
+            SVDWriter._append_dim_element_group(sink, cluster['dim'])
         # prepare basic information
-        SVDWriter._build_tree(xml_cluster, cluster, {
+        SVDWriter._build_tree(sink, cluster, {
             'name': None,
             'description': None,
             'alternate_to': 'alternateCluster',
@@ -225,58 +340,55 @@ class SVDWriter:
         # populate registers properties information
         if cluster.get('reg_properties'):
             SVDWriter._append_register_properties_group(
-                xml_cluster, cluster['reg_properties'])
+                sink, cluster['reg_properties'])
         # support for nested clusters
         if cluster.get('clusters'):
             for _, c in cluster['clusters'].items():
-                xml_cluster.append(SVDWriter._populate_cluster(c))
+                SVDWriter._populate_cluster(sink, c)
         # prepare register information
         if cluster.get('registers'):
             for _, r in cluster['registers'].items():
-                xml_cluster.append(SVDWriter._populate_register(r))
-        # return gathered information
-        return xml_cluster
+                SVDWriter._populate_register(sink, r)
+        # done
+        sink.end()
 
     # write registers information
     @staticmethod
-    def _populate_registers(peripheral: dict):
+    def _populate_registers(sink, peripheral: dict):
         # registers root element
-        xml_registers = ET.Element('registers')
+        sink.start('registers')
         # process every cluster
         if peripheral.get('clusters'):
             for _, c in peripheral['clusters'].items():
-                xml_registers.append(SVDWriter._populate_cluster(c))
+                SVDWriter._populate_cluster(sink, c)
         # process every peripheral
         if peripheral.get('registers'):
             for _, r in peripheral['registers'].items():
-                xml_registers.append(SVDWriter._populate_register(r))
-        # return peripherals
-        return xml_registers
+                SVDWriter._populate_register(sink, r)
+        # done
+        sink.end()
 
     # prepare subtree containing information about a single interrupt
     @staticmethod
-    def _populate_interrupt(interrupt: dict):
+    def _populate_interrupt(sink, interrupt: dict):
         # build a single interrupt sub-node
-        return SVDWriter._build_tree(ET.Element('interrupt'), interrupt, {
+        sink.start('interrupt')
+        SVDWriter._build_tree(sink, interrupt, {
             'name': None,
             'value': None
         })
+        sink.end()
 
     # populate single peripheral information
     @staticmethod
-    def _populate_peripheral(peripheral: dict):
+    def _populate_peripheral(sink, peripheral: dict):
         # root peripheral element
-        xml_peripheral = ET.Element('peripheral')
-        # got the derivation set-up?
-        if not peripheral.get('fully_defined') and \
-                peripheral.get('derived_from'):
-            xml_peripheral.set('derivedFrom', peripheral['derived_from'])
+        sink.start('peripheral', SVDWriter._derivation_attrib(peripheral))
         # populate dim information
         if peripheral.get('dim'):
-            SVDWriter._append_dim_element_group(xml_peripheral,
-                                                peripheral['dim'])
+            SVDWriter._append_dim_element_group(sink, peripheral['dim'])
         # populate basic information
-        SVDWriter._build_tree(xml_peripheral, peripheral, {
+        SVDWriter._build_tree(sink, peripheral, {
             'name': None,
             'description': None,
             'alternate_to': 'alternatePeripheral',
@@ -287,33 +399,40 @@ class SVDWriter:
         # populate registers properties information
         if peripheral.get('reg_properties'):
             SVDWriter._append_register_properties_group(
-                xml_peripheral, peripheral['reg_properties'])
+                sink, peripheral['reg_properties'])
         # store interrupt information
         if peripheral.get('interrupts'):
             for _, i in peripheral['interrupts'].items():
-                xml_peripheral.append(SVDWriter._populate_interrupt(i))
-        # populate registers information
-        if peripheral.get('registers'):
-            xml_peripheral.append(SVDWriter._populate_registers(peripheral))
-        # return the populated peripheral
-        return xml_peripheral
+                SVDWriter._populate_interrupt(sink, i)
+        # populate registers information (clusters go there as well)
+        if peripheral.get('registers') or peripheral.get('clusters'):
+            SVDWriter._populate_registers(sink, peripheral)
+        # done
+        sink.end()
 
-    # write peripherals
+    # write peripherals. These are either given as a mapping (as in the
+    # dictionary produced by the svd parser) or any iterable of (name,
+    # peripheral) tuples, e.g. a generator such as the one returned by
+    # 'SVDReader.iter_peripherals()'
     @staticmethod
-    def _populate_peripherals(device: dict):
+    def _populate_peripherals(sink, peripherals):
         # peripherals root element
-        xml_peripherals = ET.Element('peripherals')
+        sink.start('peripherals')
+        # mappings are iterated over their items
+        if isinstance(peripherals, Mapping):
+            peripherals = peripherals.items()
         # process every peripheral
-        for k, v in device['peripherals'].items():
-            xml_peripherals.append(SVDWriter._populate_peripheral(v))
-        # return peripherals
-        return xml_peripherals
+        for _, v in peripherals:
+            SVDWriter._populate_peripheral(sink, v)
+        # done
+        sink.end()
 
     # write device cpu information
     @staticmethod
-    def _populate_cpu(device: dict):
+    def _populate_cpu(sink, device: dict):
         # populate the entries
-        return SVDWriter._build_tree(ET.Element('cpu'), device['cpu'], {
+        sink.start('cpu')
+        SVDWriter._build_tree(sink, device['cpu'], {
             'name': None,
             'revision': None,
             'endian': None,
@@ -322,10 +441,12 @@ class SVDWriter:
             'nvic_priority_bits': 'nvicPrioBits',
             'vendor_systick': ('vendorSystickConfig', SVDWriter._convert_bool),
         })
+        sink.end()
 
-    # write device description
+    # write device description, 'peripherals' (if given) are written instead
+    # of the ones stored within the device
     @staticmethod
-    def _populate_device(device: dict):
+    def _populate_device(sink, device: dict, peripherals=None):
         # list of all root node attributes
         attributes = {
             'schemaVersion': "1.3",
@@ -333,35 +454,71 @@ class SVDWriter:
             'xs:noNamespaceSchemaLocation': "CMSIS-SVD.xsd",
         }
         # build the root entry
-        root = ET.Element('device', attrib=attributes)
+        sink.start('device', attributes)
         # append basic information
-        SVDWriter._build_tree(root, device, {
+        SVDWriter._build_tree(sink, device, {
             'name': None,
             'version': None,
             'description': None,
 
         })
         # append the cpu information
-        root.append(SVDWriter._populate_cpu(device))
+        SVDWriter._populate_cpu(sink, device)
         # append basic information
-        SVDWriter._build_tree(root, device, {
+        SVDWriter._build_tree(sink, device, {
             'address_unit_bits': 'addressUnitBits',
             'width': None,
         })
 
         # append peripheral information
-        root.append(SVDWriter._populate_peripherals(device))
-        # return the xml root node element
-        return root
+        SVDWriter._populate_peripherals(
+            sink, device['peripherals'] if peripherals is None else
+            peripherals)
+        # done
+        sink.end()
 
-    # process the device describing dictionary as produced by the svd parser
+    # process the device describing dictionary as produced by the svd parser.
+    # Pass SVDStats instance as 'stats' to get the time spent in every phase
+    # along with the number of elements produced.
     @staticmethod
-    def process(device: dict, make_pretty=True, **kwargs):
+    def process(device: dict, make_pretty=True, stats=None, **kwargs):
         # process device
-        xml_device = SVDWriter._populate_device(device)
+        with SVDStats.timer(stats, 'writer_populate'):
+            sink = _TreeSink()
+            SVDWriter._populate_device(sink, device)
+            xml_device = sink.root
         # add whitespaces, newlines tabs, etc.. to make the xml more readable
         # when converted to string
         if make_pretty:
-            SVDWriter._make_pretty(xml_device, **kwargs)
+            with SVDStats.timer(stats, 'writer_make_pretty'):
+                SVDWriter._make_pretty(xml_device, **kwargs)
+        # count the produced elements
+        if stats is not None:
+            stats.add('written_elements', sink.elements)
         # return gathered data
         return xml_device
+
+    # write the device describing dictionary straight to the binary file
+    # object (utf-8 encoded, with the xml declaration) without building the
+    # element tree. Output is the same as the one of the tree returned by
+    # 'process()' written with 'ET.ElementTree.write()'. 'peripherals' may be
+    # given separately as an iterable of (name, peripheral) tuples so that
+    # these can be written as they come (e.g. from a generator), otherwise
+    # the ones from the device are written. 'stats' gathers the same counters
+    # as in 'process()'
+    @staticmethod
+    def write(device: dict, fileobj, pretty=True, indentation="\t",
+              peripherals=None, stats=None):
+        # encode the text as it is being written
+        sink = _StreamSink(lambda text: fileobj.write(text.encode('utf-8')),
+                           indentation if pretty else None)
+        with SVDStats.timer(stats, 'writer_write'):
+            # xml declaration
+            sink.declaration('utf-8')
+            # process device
+            SVDWriter._populate_device(sink, device, peripherals)
+            # write whatever is left
+            sink.flush()
+        # count the produced elements
+        if stats is not None:
+            stats.add('written_elements', sink.elements)